@@ -10,12 +10,23 @@ class PackageConfig(object):
     ENABLE_LOGGING = True
     OVERRIDE_WEIGHTS = False
     TRAIN_MODEL = False
+    INFERENCE_BATCH_SIZE = 256 # Videos classified with a single forward pass of our classifier
+    OUTPUT_FLUSH_INTERVAL = 100 # Records written to the JSONL outputs (downloaded data and runs) between flushes
+
+    # Streaming pipeline for run.py all/audit (worker threads per stage and max videos buffered between stages)
+    PIPELINE_DOWNLOAD_WORKERS = 8
+    PIPELINE_PREPROCESS_WORKERS = 2
+    PIPELINE_EMBED_WORKERS = 1
+    PIPELINE_CLASSIFY_WORKERS = 1
+    PIPELINE_QUEUE_SIZE = 64
+    PIPELINE_BATCH_TIMEOUT = 0.5 # Max seconds to wait for a classification micro-batch to fill up
 
     # RELATIVE PATH FOR AUDIT DATA Note: The path your run.py is executing look something like this:
     # User/repo/run.py, so final path would be User/repo/relative_path
     DATA_FILE_NAME = "video_ids"
     AUDIT_DATA = f"data/raw_data/{DATA_FILE_NAME}.txt"
     DOWNLOADED_AUDIT_DATA = "data/test_data/"
+    DOWNLOAD_JOURNAL = f"{DOWNLOADED_AUDIT_DATA}{DATA_FILE_NAME}.journal.jsonl" # Per-video progress of the audit download (used to resume it)
     TEST_AUDIT_DATA = "test/testdata/test_user_watch_history_videos.json"
     WEIGHTS = "src/pseudoscientificvideosdetection/models/pseudoscience_model_final.hdf5"
 
@@ -6,6 +6,7 @@ import json
 import time
 import logging
 import logging.handlers
+import itertools
 from pymongo.errors import ServerSelectionTimeoutError
 
 # Config files
@@ -17,9 +18,15 @@ sys.path.insert(0, 'src')
 # Imports from source folder
 from dataset.DatasetUtils import DatasetUtils
 from classifier.featureengineering.FeatureEngineeringModels import FeatureEngineeringModels
+from classifier.featureengineering.DataPreparation import DataPreparation
+from dataset.ArtifactManifest import ArtifactManifest
 from classifier.training.ClassifierTraining import ClassifierTraining
 from pseudoscientificvideosdetection.PseudoscienceClassifier import PseudoscienceClassifier
-from youtubehelpers.YouTubeVideoDownloader import YouTubeVideoDownloader
+from pseudoscientificvideosdetection.StreamingInferencePipeline import StreamingInferencePipeline
+from pseudoscientificvideosdetection.ClassificationServer import ClassificationServer
+from youtubehelpers.ConcurrentVideoDownloader import ConcurrentVideoDownloader
+from youtubehelpers.config.YouTubeAPIConfig import Config as YouTubeAPIConfig
+from youtubehelpers.DownloadJournal import DownloadJournal
 
 if PackageConfig.ENABLE_LOGGING:
     # Logging variables
@@ -116,6 +123,33 @@ def fineTuneBranches(dataset):
 
     return
 
+def reportArtifactsStatus(dataset):
+    '''
+    Print whether each cached feature and embedding
+    artifact is fresh, stale, or missing, i.e., what
+    would be rebuilt by the next training run.
+    '''
+    featureEngineeringModels = FeatureEngineeringModels(dataset_object=dataset)
+    dataPreparation = DataPreparation(dataset_object=dataset)
+
+    totalStale = 0
+    print("\n{0:<18} {1:<22} {2:<8} {3}".format("MODALITY", "ARTIFACT", "STATE", "CHANGED INPUTS"))
+    for modality in ['video_snippet', 'video_tags', 'video_transcript', 'video_comments']:
+        artifacts = [
+            ("text features", dataset.get_text_features_manifest(modality=modality), dataset.get_text_features_inputs(modality=modality)),
+            ("fasttext train data", ArtifactManifest(artifact_filename=featureEngineeringModels.get_fasttext_data_filename(model_type=modality)), featureEngineeringModels.get_fasttext_data_inputs(model_type=modality)),
+            ("sentence embeddings", dataPreparation.get_embeddings_manifest(model_type=modality), dataPreparation.get_embeddings_inputs(model_type=modality)),
+        ]
+        for name, manifest, inputs in artifacts:
+            state, changedInputs = manifest.get_status(inputs=inputs)
+            if state != ArtifactManifest.FRESH:
+                totalStale += 1
+            print("{0:<18} {1:<22} {2:<8} {3}".format(modality, name, state, ', '.join(changedInputs)))
+
+    print(f"\n{totalStale} artifact(s) will be rebuilt.")
+    logging.info(f"{totalStale} artifact(s) will be rebuilt.")
+    return totalStale
+
 def trainClassifier(dataset, override = PackageConfig.OVERRIDE_WEIGHTS):
     '''
     Train our classifier
@@ -171,9 +205,73 @@ def loadModel():
 
     return model
 
+def readItems(filename):
+    '''
+    Lazily read the records of a JSONL file (one JSON
+    object per line). Files in the legacy { "items":[...] }
+    format are still supported, but they are loaded at once.
+    '''
+    with open(filename) as fh:
+        firstLine = fh.readline()
+        try:
+            firstItem = json.loads(firstLine) if firstLine.strip() else None
+            isLegacy = isinstance(firstItem, dict) and list(firstItem.keys()) == ['items']
+        except ValueError:
+            # Legacy file written across multiple lines
+            firstItem, isLegacy = None, True
+
+        if isLegacy:
+            fh.seek(0)
+            yield from json.load(fh)['items']
+            return
+
+        if firstItem is not None:
+            yield firstItem
+        for line in fh:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Partially written last line (e.g., after a crash)
+                print(f"Skipped malformed record in {filename}")
+                logging.info(f"Skipped malformed record in {filename}")
+
+def writeRecord(f, item, totalWritten):
+    '''
+    Append a record to a JSONL file that is being written
+    incrementally, flushing it periodically so that partial
+    results survive a crash
+    '''
+    f.write(json.dumps(item) + '\n')
+    if totalWritten % PackageConfig.OUTPUT_FLUSH_INTERVAL == 0:
+        f.flush()
+
+def getDownloadedDataFile():
+    '''
+    Get the file of our downloaded audit data (JSONL, or the
+    legacy JSON file), or None if it has not been downloaded
+    '''
+    for extension in ['jsonl', 'json']:
+        downloadedDataFile = PackageConfig.DOWNLOADED_AUDIT_DATA + f'/{PackageConfig.DATA_FILE_NAME}.{extension}'
+        if os.path.exists(downloadedDataFile):
+            return downloadedDataFile
+    return None
+
+def readVideoIds(filename):
+    '''
+    Lazily read a file with one YouTube video ID per line
+    '''
+    with open(filename) as fh:
+        for line in fh:
+            videoId = line.strip()
+            if videoId:
+                yield videoId
+
 def loadAuditData():
     '''
     Load the list of IDs for our Audit Data.
+    The IDs are read lazily, as they are consumed.
     
     For Test, this function does not execute.
     '''
@@ -182,8 +280,9 @@ def loadAuditData():
     print("Loading our audit video IDs...")
     logging.info("Loading our audit video IDs...")
     try:
-        with open(PackageConfig.AUDIT_DATA) as fh:
-            video_ids = [line.strip("\n") for line in fh.readlines()]
+        # Ensure that our audit data can be read before streaming it
+        open(PackageConfig.AUDIT_DATA).close()
+        video_ids = readVideoIds(PackageConfig.AUDIT_DATA)
 
         end = time.time()
         print(f"Loaded our video IDs in {end - start} seconds")
@@ -199,129 +298,173 @@ def loadAuditData():
 
     return video_ids
 
-def downloadAuditData(video_ids):
+def finalizeDownloadedData(journal):
     '''
-    Download our data with our IDs
-
-    For Test, this function does not execute.
+    Write all the videos downloaded in our download journal
+    to our downloaded data file (JSONL), once all of them
+    have been downloaded
+    '''
+    downloadedDataFile = PackageConfig.DOWNLOADED_AUDIT_DATA + f'/{PackageConfig.DATA_FILE_NAME}.jsonl'
+    totalDownloaded = 0
+    with open(downloadedDataFile + '.partial', 'w+') as f:
+        for video_details in journal.iterate_downloaded_videos():
+            totalDownloaded += 1
+            writeRecord(f, video_details, totalDownloaded)
+    os.replace(downloadedDataFile + '.partial', downloadedDataFile)
+    return downloadedDataFile
+
+def predictBatch(videos, model, isTest = False, batch_size = PackageConfig.INFERENCE_BATCH_SIZE):
+    '''
+    Make our predictions in batches, running a single
+    forward pass of our classifier for each batch.
+    The videos are consumed and the predictions are
+    yielded lazily, one batch at a time.
     '''
-    
     start = time.time()
-    logging.info("Downloading our audit videos...")
-    print("Downloading our audit videos")
-
-    try: 
-        ytDownloader = YouTubeVideoDownloader()
-
-        if (os.path.exists(PackageConfig.DOWNLOADED_AUDIT_DATA + f'/{PackageConfig.DATA_FILE_NAME}.json')):
-            print("Data already downloaded!")
-            logging.info("Data already downloaded!")
-            return json.load(open(PackageConfig.DOWNLOADED_AUDIT_DATA + f'/{PackageConfig.DATA_FILE_NAME}.json'))['items']
-
-        videos = []
-        for id in video_ids:
-            logging.info(f"Downloading {id}...")
-            print(f"Downloading {id}...")
-
-            video_details = ytDownloader.download_video(video_id=id)
-            videos.append(video_details)
-
-            if len(video_details) > 0:
-                print(f"Downloaded {id} successfully")
-                logging.info(f"Downloaded {id} successfully")
-            else:
-                print(f"Download for {id} failed")
-                logging.info(f"Download for {id} failed")
-
-        end = time.time()
-        print(f"Downloaded our videos in {end-start} seconds")
-        logging.info(f"Downloaded our videos in {end-start} seconds")
-
-        # Write our downloaded data
-        with open(PackageConfig.DOWNLOADED_AUDIT_DATA + f'/{PackageConfig.DATA_FILE_NAME}.json', 'w+') as f:
-            f.write('{ \"items\":[')
-            for i in range(len(videos)):
-                video = videos[i]
-                if i == len(videos) - 1:
-                    f.write(json.dumps(video) + '\n')
-                else:
-                    f.write(json.dumps(video) + ',\n')
-            f.write(']}')
-
+    videos = iter(videos)
+    try:
+        while True:
+            batch = list(itertools.islice(videos, batch_size))
+            if len(batch) == 0:
+                break
+            batch_predictions = model.classify_batch(videos_details=batch)
+
+            for video_details, (prediction, confidence_score) in zip(batch, batch_predictions):
+                yield {
+                    "video_id" : video_details['contentDetails']['videoId'] if isTest else video_details['id'],
+                    "prediction" : prediction,
+                    "confidence_score": confidence_score,
+                }
     except Exception as e:
         end = time.time()
-        print(f"Failed downloading in {end - start} seconds.")
-        logging.info(f"Failed downloading in {end - start} seconds.")
+        print(f"Failed prediction(s) in {end - start} seconds.")
+        logging.info(f"Failed prediction(s) in {end - start} seconds.")
         print(f"Caught exception: \n {e}")
         logging.info(f"Caught exception: \n {e}")
         exit(1)
 
-    return videos
-
-def predict(video_details, model, isTest = False):
+def streamPredictions(video_ids, model):
     '''
-    Make our prediction
+    Download, classify and write our audit videos in a
+    streaming pipeline, so that classification starts on the
+    first video while later ones are still downloading.
+
+    Predictions are written to our runs folder (JSONL) as they are made.
     '''
     start = time.time()
+    totalPredictions = 0
+    # Download our videos concurrently, within the rate limits and the quota of our API key
+    videoDownloader = ConcurrentVideoDownloader(max_in_flight_requests=YouTubeAPIConfig.DOWNLOAD_MAX_IN_FLIGHT_REQUESTS)
     try:
-        prediction, confidence_score = model.classify(video_details=video_details)
+        pipeline = StreamingInferencePipeline(model=model,
+                                              video_downloader=videoDownloader,
+                                              download_workers=PackageConfig.PIPELINE_DOWNLOAD_WORKERS,
+                                              preprocess_workers=PackageConfig.PIPELINE_PREPROCESS_WORKERS,
+                                              embed_workers=PackageConfig.PIPELINE_EMBED_WORKERS,
+                                              classify_workers=PackageConfig.PIPELINE_CLASSIFY_WORKERS,
+                                              queue_size=PackageConfig.PIPELINE_QUEUE_SIZE,
+                                              batch_size=PackageConfig.INFERENCE_BATCH_SIZE,
+                                              batch_timeout=PackageConfig.PIPELINE_BATCH_TIMEOUT)
+
+        downloadedDataFile = getDownloadedDataFile()
+        journal = None
+        if downloadedDataFile is not None:
+            print("Data already downloaded!")
+            logging.info("Data already downloaded!")
+            results = pipeline.run(videos=readItems(downloadedDataFile))
+        else:
+            # Record our downloaded data in our download journal as it streams, and
+            # on a rerun, classify the videos downloaded so far before downloading the rest
+            journal = DownloadJournal(journal_filename=PackageConfig.DOWNLOAD_JOURNAL)
+            if journal.exists():
+                print(f"Resuming download... {journal.get_summary_message()}")
+                logging.info(f"Resuming download... {journal.get_summary_message()}")
+            results = itertools.chain(pipeline.run(videos=journal.iterate_downloaded_videos()),
+                                      pipeline.run(video_ids=journal.get_pending_video_ids(video_ids)))
+
+        totalRuns = len(os.listdir('runs/all_runs'))
+        with open('runs/all_runs/run_{0}.jsonl'.format(totalRuns), 'w+') as f:
+            for video_id, video_details, prediction, downloadStatus in results:
+                if journal is not None and not journal.is_completed(video_id):
+                    if downloadStatus == DownloadJournal.FAILED:
+                        # Retried by the next run
+                        journal.record(video_id, DownloadJournal.FAILED, error="download failed")
+                    else:
+                        # Deleted or private videos are not downloaded again
+                        journal.record(video_id, downloadStatus, video_details=video_details)
+
+                if downloadStatus == DownloadJournal.UNAVAILABLE:
+                    print(f"Video {video_id} is not available")
+                    logging.info(f"Video {video_id} is not available")
+                    continue
+
+                if prediction is None:
+                    print(f"Prediction for {video_id} failed")
+                    logging.info(f"Prediction for {video_id} failed")
+                    continue
+
+                totalPredictions += 1
+                writeRecord(f, {
+                    "video_id" : video_id,
+                    "prediction" : prediction[0],
+                    "confidence_score": prediction[1],
+                }, totalPredictions)
+
+        if journal is not None:
+            journal.close()
+            print(journal.get_summary_message())
+            logging.info(journal.get_summary_message())
+            # Keep the journal (instead of our downloaded data file) until all the videos have been downloaded
+            if journal.get_summary()['total'][DownloadJournal.FAILED] == 0:
+                finalizeDownloadedData(journal)
+
+        for stage, stats in pipeline.get_stats().items():
+            print(f"[{stage.upper()}] processed: {stats['processed']} | failed: {stats['failed']} | busy: {stats['elapsed']:.2f} seconds")
+            logging.info(f"[{stage.upper()}] processed: {stats['processed']} | failed: {stats['failed']} | busy: {stats['elapsed']:.2f} seconds")
+        print(f"Download throughput: {videoDownloader.get_stats_message()}")
+        logging.info(f"Download throughput: {videoDownloader.get_stats_message()}")
+
+    except KeyboardInterrupt:
+        print("Streaming pipeline interrupted, rerun to resume it.")
+        logging.info("Streaming pipeline interrupted, rerun to resume it.")
+        exit(1)
     except Exception as e:
         end = time.time()
-        print(f"Failed prediction(s) in {end - start} seconds.")
-        logging.info(f"Failed prediction(s) in {end - start} seconds.")
+        print(f"Failed streaming pipeline in {end - start} seconds.")
+        logging.info(f"Failed streaming pipeline in {end - start} seconds.")
         print(f"Caught exception: \n {e}")
         logging.info(f"Caught exception: \n {e}")
         exit(1)
-    
-    if isTest:
-        return {
-        "video_id" : video_details['contentDetails']['videoId'],
-        "prediction" : prediction,
-        "confidence_score": confidence_score,
-        }
-
-    return {
-        "video_id" : video_details['id'],
-        "prediction" : prediction,
-        "confidence_score": confidence_score,
-    }
+    finally:
+        videoDownloader.close()
+
+    return totalPredictions
 
 def writeResults(results, isTest = False):
     '''
-    Write our results to our runs folder.
+    Write our results to our runs folder as JSONL,
+    one prediction per line as they are made.
 
     test_runs - stores run.py test runs
     all_runs - stores run.py all runs
     '''
 
     start = time.time()
+    totalResults = 0
 
     try:
+        # Run variables
         if isTest:
-            # Run variables
             totalRuns = len(os.listdir('runs/test_runs'))
-            with open('runs/test_runs/test_run_{0}.json'.format(totalRuns), 'w+') as f:
-                f.write('{ \"items\":[')
-                for i in range(len(results)):
-                    result = results[i]
-                    if i == len(results) - 1:
-                        f.write(json.dumps(result) + '\n')
-                    else:
-                        f.write(json.dumps(result) + ',\n')
-                f.write(']}')
-            return
+            runFile = 'runs/test_runs/test_run_{0}.jsonl'.format(totalRuns)
+        else:
+            totalRuns = len(os.listdir('runs/all_runs'))
+            runFile = 'runs/all_runs/run_{0}.jsonl'.format(totalRuns)
 
-        # Run variables
-        totalRuns = len(os.listdir('runs/all_runs'))
-        with open('runs/all_runs/run_{0}.json'.format(totalRuns), 'w+') as f:
-            f.write('{ \"items\":[')
-            for i in range(len(results)):
-                result = results[i]
-                if i == len(results) - 1:
-                    f.write(json.dumps(result) + '\n')
-                else:
-                    f.write(json.dumps(result) + ',\n')
-            f.write(']}')
+        with open(runFile, 'w+') as f:
+            for result in results:
+                totalResults += 1
+                writeRecord(f, result, totalResults)
 
     except Exception as e:
         end = time.time()
@@ -331,7 +474,7 @@ def writeResults(results, isTest = False):
         logging.info(f"Caught exception: \n {e}")
         exit(1)
 
-    return
+    return totalResults
 
 def clean(paths = PackageConfig.CLEAN_PATHS):
     '''
@@ -391,26 +534,17 @@ def main(targets):
         # LOAD OUR AUDIT DATA
         video_ids = loadAuditData()
 
-        # DOWNLOAD OUR AUDIT DATA
-        videos = downloadAuditData(video_ids)
-
-        # MAKE PREDICTIONS
-        print("Running inference...")
-        logging.info("Running inference...")
+        # DOWNLOAD OUR AUDIT DATA, MAKE PREDICTIONS AND WRITE TO RUNS FOLDER
+        print("Running streaming inference...")
+        logging.info("Running streaming inference...")
 
         start = time.time()
-        predictions = [predict(video_details = video, model=model) for video in videos]
+        predictions = streamPredictions(video_ids=video_ids, model=model)
         end = time.time()
 
         print(f"Completed inference in {end-start} seconds")
         logging.info(f"Completed inference in {end-start} seconds")
 
-        print("Writing to file...")
-        logging.info("Writing to file...")
-
-        # WRITE TO RUNS FOLDER
-        writeResults(predictions)
-
         print("Completed pipeline...")
         logging.info("Completed pipeline...")
 
@@ -446,28 +580,20 @@ def main(targets):
         start = time.time()
         logging.info("Downloading our audit video...")
         
-        with open(PackageConfig.TEST_AUDIT_DATA) as fh:
-            response = json.load(fh)
-            videos = response['items']
+        videos = readItems(PackageConfig.TEST_AUDIT_DATA)
         end = time.time()
         logging.info(f"Downloaded our videos in {end-start} seconds")
 
-        # MAKE PREDICTIONS
+        # MAKE PREDICTIONS AND WRITE TO RUNS FOLDER AS THEY ARE MADE
         print("Running inference...")
         logging.info("Running inference...")
 
         start = time.time()
-        predictions = [predict(video_details = video, model=model, isTest = True) for video in videos]
+        predictions = writeResults(predictBatch(videos=videos, model=model, isTest = True), isTest = True)
         end = time.time()
 
-        print(f"Completed inference in {end-start} seconds")
-        logging.info(f"Completed inference in {end-start} seconds")
-
-        print("Writing to file...")
-        logging.info("Writing to file...")
-
-        # WRITE TO RUNS FOLDER
-        writeResults(predictions, isTest = True)
+        print(f"Completed inference of {predictions} videos in {end-start} seconds")
+        logging.info(f"Completed inference of {predictions} videos in {end-start} seconds")
 
         print("Completed pipeline...")
         logging.info("Completed pipeline...")
@@ -478,6 +604,10 @@ def main(targets):
          # LOAD OUR DATA
         data = loadData()
 
+    if 'status' in targets:
+        # REPORT WHICH CACHED ARTIFACTS ARE STALE
+        reportArtifactsStatus(loadData())
+
     if 'finetune' in targets:
         # FINE TUNE BRANCHES AND GET FASTTEXT EMBEDDINGS
         fineTuneBranches(data)
@@ -490,32 +620,32 @@ def main(targets):
         # LOAD OUR AUDIT DATA
         video_ids = loadAuditData()
 
-        # DOWNLOAD OUR AUDIT DATA
-        videos = downloadAuditData(video_ids)
-
         # LOAD OUR MODEL
         model = loadModel()
 
-        # MAKE PREDICTIONS
-        print("Running inference...")
-        logging.info("Running inference...")
+        # DOWNLOAD OUR AUDIT DATA, MAKE PREDICTIONS AND WRITE TO RUNS FOLDER
+        print("Running streaming inference...")
+        logging.info("Running streaming inference...")
 
         start = time.time()
-        predictions = [predict(video_details = video, model=model) for video in videos]
+        predictions = streamPredictions(video_ids=video_ids, model=model)
         end = time.time()
 
         print(f"Completed inference in {end-start} seconds")
         logging.info(f"Completed inference in {end-start} seconds")
 
-        print("Writing to file...")
-        logging.info("Writing to file...")
-
-        # WRITE TO RUNS FOLDER
-        writeResults(predictions)
-
         print("Completed pipeline...")
         logging.info("Completed pipeline...")
     
+    if 'serve' in targets:
+        # LOAD OUR MODEL
+        model = loadModel()
+
+        # SERVE CLASSIFICATION REQUESTS WITH OUR WARM MODEL
+        print("Starting classification server...")
+        logging.info("Starting classification server...")
+        ClassificationServer(model=model).serve_forever()
+
     if 'clean' in targets:
         clean()
 
@@ -1,10 +1,15 @@
 #!/usr/bin/python
 
 from dataset.DatasetUtils import DatasetUtils
+from pseudoscientificvideosdetection.EmbeddingCache import EmbeddingCache
+from classifier.featureengineering.FeatureStore import FeatureStore
+from dataset.ArtifactManifest import ArtifactManifest
+from dataset.TextPreprocessor import TextPreprocessor
+from pseudoscientificvideosdetection.config.PseudoscienceClassifierConfig import Config as EmbeddingCacheConfig
 import fasttext
 import numpy as np
 import os
-import pickle
+import hashlib
 from keras.preprocessing.text import Tokenizer
 from keras_preprocessing.sequence import pad_sequences
 from tqdm import tqdm
@@ -23,38 +28,137 @@ class DataPreparation(object):
 
         # Get Dataset Object
         self.DATASET = dataset_object
+
+        # Create a memory-mapped Feature Store for the sentence embeddings of each Video metadata type
+        self.FEATURE_STORE = FeatureStore(features_dir=self.INPUT_FEATURES_DIR)
         return
 
+    def get_sentence_embeddings(self, model_type, texts):
+        """
+        Method that generates a single Embedding Vector for each one of the given texts using the fine-tuned
+        fastText model of the given Video metadata type. Embeddings that have been already generated by the
+        same fastText model are read from the persistent Embedding Cache
+        :param model_type: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param texts: a list of preprocessed texts
+        :return: a list with the Embedding Vector of each text
+        """
+        # Load fine-tuned fastText Model
+        fasttext_model_filename = self.get_fasttext_model_filename(model_type=model_type)
+        fasttext_model = fasttext.load_model(path=fasttext_model_filename)
+
+        # Generate a single Embedding Vector for each text
+        if EmbeddingCacheConfig.EMBEDDING_CACHE_ENABLED:
+            embedding_cache = EmbeddingCache(modality=model_type, model_filename=fasttext_model_filename)
+            embeddings = list(embedding_cache.get_sentence_vectors(fasttext_model=fasttext_model, texts=texts))
+            print('--- [EMBEDDING CACHE] HITS: {hits} | MISSES: {misses}'.format(**embedding_cache.get_stats()))
+        else:
+            embeddings = [fasttext_model.get_sentence_vector(text=text) for text in texts]
+
+        # Free some memory
+        del fasttext_model
+        return embeddings
+
+    def get_fasttext_model_filename(self, model_type):
+        """
+        Method that returns the filename of the fine-tuned fastText model of the given Video metadata type
+        :param model_type: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return:
+        """
+        return '{0}/fasttext_model_{1}.bin'.format(self.FEATURE_ENGINEERING_MODELS_DIR, model_type)
+
+    def get_embeddings_inputs(self, model_type):
+        """
+        Method that returns the current fingerprints of the inputs of the sentence embeddings of the given type,
+        i.e., the inputs of the preprocessed text features and the checksum of the fine-tuned fastText model
+        :param model_type: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: a dict of input name => fingerprint
+        """
+        fasttext_model_filename = self.get_fasttext_model_filename(model_type=model_type)
+        return {
+            'text_features': ArtifactManifest.get_inputs_digest(inputs=self.DATASET.get_text_features_inputs(modality=model_type)),
+            'preprocessing_version': TextPreprocessor.VERSION,
+            'fasttext_model': EmbeddingCache.get_file_checksum(filename=fasttext_model_filename) if os.path.isfile(fasttext_model_filename) else None,
+        }
+
+    @staticmethod
+    def get_text_hash(text):
+        """
+        Method that returns the hash of the preprocessed text of a single video
+        :param text: a preprocessed text
+        :return: the hex digest of the text
+        """
+        return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get_embeddings_manifest(self, model_type):
+        """
+        Method that returns the manifest of the sentence embeddings of the given type stored in the Feature Store
+        :param model_type: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: an ArtifactManifest
+        """
+        return ArtifactManifest(artifact_filename=self.FEATURE_STORE.get_features_filename(modality=model_type))
+
+    def get_model_input_features(self, model_type, get_raw_texts, overwrite=False):
+        """
+        Method that returns the sentence embeddings of the given Video metadata type from the Feature Store.
+        The stored embeddings are reused only if their manifest matches the current inputs (preprocessed text
+        features and fastText model). If only the preprocessed text features have changed (same preprocessing
+        version and fastText model), only the embeddings of the videos that have been added or whose preprocessed
+        text has changed are generated and spliced into the Feature Store by video id. Otherwise, all the
+        embeddings are regenerated. The hash of the preprocessed text of each video is stored along with its embedding
+        :param model_type: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param get_raw_texts: a function that returns the preprocessed text of each Ground-truth video
+        :param overwrite: True if existing pre-generated features should be re-generated, False if not
+        :return: a memory-mapped (N, 300) float32 matrix aligned with the Ground-truth videos
+        """
+        embeddings_manifest = self.get_embeddings_manifest(model_type=model_type)
+        embeddings_inputs = self.get_embeddings_inputs(model_type=model_type)
+        state, changed_inputs = embeddings_manifest.get_status(inputs=embeddings_inputs)
+        if not self.FEATURE_STORE.exists(modality=model_type):
+            state = ArtifactManifest.MISSING
+
+        stored_source_hashes = self.FEATURE_STORE.get_source_hashes(modality=model_type) if state == ArtifactManifest.STALE else None
+        if not overwrite and stored_source_hashes is not None and changed_inputs == ['text_features']:
+            # Generate the Embedding Vectors only for the Videos that have been added or whose text has changed
+            raw_texts = get_raw_texts()
+            source_hashes = [self.get_text_hash(text=text) for text in raw_texts]
+            stored_video_ids = self.FEATURE_STORE.get_video_ids(modality=model_type).tolist()
+            stored_source_hashes = dict(zip(stored_video_ids, stored_source_hashes.tolist()))
+            changed_video_indices = [i for i, video_id in enumerate(self.DATASET.GROUNDTRUTH_VIDEOS) if stored_source_hashes.get(video_id) != source_hashes[i]]
+            total_new_videos = sum(self.DATASET.GROUNDTRUTH_VIDEOS[i] not in stored_source_hashes for i in changed_video_indices)
+            print('--- [{0}] Delta build | NEW VIDEOS: {1} | CHANGED VIDEOS: {2} | REMOVED VIDEOS: {3}'.format(
+                model_type.upper(), total_new_videos, len(changed_video_indices) - total_new_videos, len(set(stored_video_ids) - set(self.DATASET.GROUNDTRUTH_VIDEOS))))
+            new_features = list()
+            if len(changed_video_indices) > 0:
+                new_features = self.get_sentence_embeddings(model_type=model_type, texts=[raw_texts[i] for i in changed_video_indices])
+            self.FEATURE_STORE.splice(modality=model_type,
+                                      video_ids=self.DATASET.GROUNDTRUTH_VIDEOS,
+                                      new_video_ids=[self.DATASET.GROUNDTRUTH_VIDEOS[i] for i in changed_video_indices],
+                                      new_features=new_features,
+                                      source_hashes=source_hashes)
+            embeddings_manifest.write(inputs=embeddings_inputs)
+        elif overwrite or state != ArtifactManifest.FRESH:
+            # Generate a single Embedding Vector for each Video
+            raw_texts = get_raw_texts()
+            features = self.get_sentence_embeddings(model_type=model_type, texts=raw_texts)
+
+            # Save sentence-level embeddings along with the hashes of their texts
+            self.FEATURE_STORE.write(modality=model_type, video_ids=self.DATASET.GROUNDTRUTH_VIDEOS, features=features,
+                                     source_hashes=[self.get_text_hash(text=text) for text in raw_texts])
+            embeddings_manifest.write(inputs=embeddings_inputs)
+
+        # Return the stored input features in the order of the Ground-truth videos
+        return self.FEATURE_STORE.get_features(modality=model_type, video_ids=self.DATASET.GROUNDTRUTH_VIDEOS)
+
     def get_video_snippet_model_input_features(self, overwrite=False):
         """
         Method that generates an Embedding Vector of each video Snippet (video title + video description)
         :param overwrite: True if existing pre-generated features should be re-generated, False if not
         :return:
         """
-        # Create Video Snippet Features filename
-        video_snippet_features_filename = '{0}/video_snippet_sentence_embeddings.p'.format(self.INPUT_FEATURES_DIR)
-
         print('\n--- Getting VIDEO SNIPPET features sentence embeddings using fine-tuned fastText model')
-        if not os.path.isfile(video_snippet_features_filename) or overwrite:
-            # Get Video Snippets raw preprocessed
-            video_snippets_raw = self.DATASET.get_video_snippet_features()
-
-            # Load fine-tuned fastText Model
-            video_snippet_fasttext_model = fasttext.load_model(path='{0}/fasttext_model_video_snippet.bin'.format(self.FEATURE_ENGINEERING_MODELS_DIR))
-
-            # Generate a single Embedding Vector for each Video Snippet
-            video_snippet_features = list()
-            for video_snippet in video_snippets_raw:
-                video_snippet_features.append(video_snippet_fasttext_model.get_sentence_vector(text=video_snippet))
-
-            # Save Video Snippet sentence-level embeddings
-            pickle.dump(video_snippet_features, open(video_snippet_features_filename, mode='wb'))
-            # Free some memory
-            del video_snippet_fasttext_model
-        else:
-            # Return pre-generated input features
-            video_snippet_features = pickle.load(open(video_snippet_features_filename, mode='rb'))
-        return video_snippet_features
+        return self.get_model_input_features(model_type='video_snippet',
+                                             get_raw_texts=self.DATASET.get_video_snippet_features,
+                                             overwrite=overwrite)
 
     def get_video_tags_model_input_features(self, overwrite=False):
         """
@@ -62,30 +166,10 @@ class DataPreparation(object):
         :param overwrite: True if existing pre-generated features should be re-generated, False if not
         :return:
         """
-        # Create Video Tags Features filename
-        video_tags_features_filename = '{0}/video_tags_sentence_embeddings.p'.format(self.INPUT_FEATURES_DIR)
-
         print('\n--- Getting VIDEO TAGS features sentence embeddings using fine-tuned fastText model')
-        if not os.path.isfile(video_tags_features_filename) or overwrite:
-            # Get Video Snippets raw preprocessed
-            video_tags_raw = self.DATASET.get_video_tags_features()
-
-            # Load fine-tuned fastText Model
-            video_tags_fasttext_model = fasttext.load_model(path='{0}/fasttext_model_video_tags.bin'.format(self.FEATURE_ENGINEERING_MODELS_DIR))
-
-            # Generate a single Embedding Vector for each Video's Tags
-            video_tags_features = list()
-            for video_tags in video_tags_raw:
-                video_tags_features.append(video_tags_fasttext_model.get_sentence_vector(text=video_tags))
-
-            # Save Video Tags sentence-level embeddings
-            pickle.dump(video_tags_features, open(video_tags_features_filename, mode='wb'))
-            # Free some memory
-            del video_tags_fasttext_model
-        else:
-            # Return pre-generated input features
-            video_tags_features = pickle.load(open(video_tags_features_filename, mode='rb'))
-        return video_tags_features
+        return self.get_model_input_features(model_type='video_tags',
+                                             get_raw_texts=self.DATASET.get_video_tags_features,
+                                             overwrite=overwrite)
 
     def get_video_transcript_model_input_features(self, overwrite=False):
         """
@@ -93,30 +177,10 @@ class DataPreparation(object):
         :param overwrite: True if existing pre-generated features should be re-generated, False if not
         :return:
         """
-        # Create Video Transcripts Features filename
-        video_transcript_features_filename = '{0}/video_transcripts_sentence_embeddings.p'.format(self.INPUT_FEATURES_DIR)
-
         print('\n--- Getting VIDEO TRANSCRIPT features sentence embeddings using fine-tuned fastText model')
-        if not os.path.isfile(video_transcript_features_filename) or overwrite:
-            # Get Video Transcript raw preprocessed
-            video_transcripts_raw = self.DATASET.get_video_transcript_features()
-
-            # Load fine-tuned fastText Model
-            video_transcript_fasttext_model = fasttext.load_model(path='{0}/fasttext_model_video_transcript.bin'.format(self.FEATURE_ENGINEERING_MODELS_DIR))
-
-            # Generate a single Embedding Vector for each Video Transcript
-            video_transcript_features = list()
-            for video_transcript in video_transcripts_raw:
-                video_transcript_features.append(video_transcript_fasttext_model.get_sentence_vector(text=video_transcript))
-
-            # Save Video Transcript sentence-level embeddings
-            pickle.dump(video_transcript_features, open(video_transcript_features_filename, mode='wb'))
-            # Free some memory
-            del video_transcript_fasttext_model
-        else:
-            # Return pre-generated input features
-            video_transcript_features = pickle.load(open(video_transcript_features_filename, mode='rb'))
-        return video_transcript_features
+        return self.get_model_input_features(model_type='video_transcript',
+                                             get_raw_texts=self.DATASET.get_video_transcript_features,
+                                             overwrite=overwrite)
 
     def get_video_comments_model_input_features(self, overwrite=False):
         """
@@ -124,28 +188,8 @@ class DataPreparation(object):
         :param overwrite: True if existing pre-generated features should be re-generated, False if not
         :return:
         """
-        # Create Video Comments Features filename
-        video_comments_features_filename = '{0}/video_comments_merged_sentence_embeddings.p'.format(self.INPUT_FEATURES_DIR)
-
         print('\n--- Getting VIDEO COMMENTS features and Embedding matrix using fine-tuned fastText model')
-        if not os.path.isfile(video_comments_features_filename) or overwrite:
-            # Get Video Comments raw preprocessed
-            video_comments_raw = self.DATASET.get_video_comments_features()
-
-            # Merge the comments of each video
-            final_video_comments_raw = [' '.join(video_comments) for video_comments in video_comments_raw]
-
-            # Load fine-tuned fastText Model
-            video_comments_fasttext_model = fasttext.load_model(path='{0}/fasttext_model_video_comments.bin'.format(self.FEATURE_ENGINEERING_MODELS_DIR))
-
-            # Generate a single Embedding Vector for each Video Comments
-            video_comments_features = [video_comments_fasttext_model.get_sentence_vector(text=video_comments_merged) for video_comments_merged in final_video_comments_raw]
-
-            # Save Video Comments sentence-level embeddings
-            pickle.dump(video_comments_features, open(video_comments_features_filename, mode='wb'))
-            # Free some memory
-            del video_comments_fasttext_model
-        else:
-            # Return pre-generated input features
-            video_comments_features = pickle.load(open(video_comments_features_filename, mode='rb'))
-        return video_comments_features
+        # Merge the comments of each video
+        return self.get_model_input_features(model_type='video_comments',
+                                             get_raw_texts=lambda: [' '.join(video_comments) for video_comments in self.DATASET.get_video_comments_features()],
+                                             overwrite=overwrite)
@@ -3,6 +3,7 @@
 import os
 import fasttext
 import multiprocessing
+from dataset.ArtifactManifest import ArtifactManifest
 
 
 class FeatureEngineeringModels(object):
@@ -23,15 +24,38 @@ class FeatureEngineeringModels(object):
         self.DATASET = dataset_object
         return
 
+    def get_fasttext_data_filename(self, model_type):
+        """
+        Method that returns the filename of the fastText input data of the given Video metadata type
+        :param model_type: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return:
+        """
+        return '{0}/{1}_train_data.txt'.format(self.DATA_DIR, model_type)
+
+    def get_fasttext_data_inputs(self, model_type):
+        """
+        Method that returns the current fingerprints of the inputs of the fastText input data of the given type
+        :param model_type: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: a dict of input name => fingerprint
+        """
+        return {'text_features': ArtifactManifest.get_inputs_digest(inputs=self.DATASET.get_text_features_inputs(modality=model_type))}
+
     def prepare_fasttext_data(self, model_type, overwrite=False):
         """
         Method that prepares the input features and stores them in a filename that will
-        be used later to fine-tune the fastText model
+        be used later to fine-tune the fastText model. Existing data is reused only if it was
+        prepared from the current preprocessed text features
         :param video_metadata_type: one of 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
         :param input_data: preprocessed data of the given Video metadata type
         :param overwrite: whether to overwrite existing saved features (if exists)
         :return:
         """
+        fasttext_input_filename = self.get_fasttext_data_filename(model_type=model_type)
+        fasttext_input_manifest = ArtifactManifest(artifact_filename=fasttext_input_filename)
+        fasttext_input_inputs = self.get_fasttext_data_inputs(model_type=model_type)
+        if not overwrite and fasttext_input_manifest.is_fresh(inputs=fasttext_input_inputs):
+            return
+
         # Get input features
         if model_type == 'video_snippet':
             input_features = self.DATASET.get_video_snippet_features()
@@ -41,15 +65,13 @@ class FeatureEngineeringModels(object):
             input_features = self.DATASET.get_video_transcript_features()
         elif model_type == 'video_comments':
             input_features = self.DATASET.get_video_comments_features()
-            
+
         # Convert into features to fastText input data
-        fasttext_input_filename = '{0}/{1}_train_data.txt'.format(self.DATA_DIR, model_type)
-        if not overwrite and os.path.isfile(fasttext_input_filename):
-            return
         with open(fasttext_input_filename, mode='w') as file:
             for row in input_features:
                 if len(row) > 0:
                     file.write('{0}\n'.format(row))
+        fasttext_input_manifest.write(inputs=fasttext_input_inputs)
         return
 
     def finetune_model(self, model_type, overwrite=False):
@@ -65,7 +87,7 @@ class FeatureEngineeringModels(object):
         fasttext_model_filename = '{0}/fasttext_model_{1}.bin'.format(self.FEATURE_ENGINEERING_MODELS_DIR, model_type)
         if not os.path.isfile(fasttext_model_filename) or overwrite:
             # Train unspervised fastText model
-            model = fasttext.train_unsupervised(input='{0}/{1}_train_data.txt'.format(self.DATA_DIR, model_type),
+            model = fasttext.train_unsupervised(input=self.get_fasttext_data_filename(model_type=model_type),
                                                 pretrainedVectors='{0}/wiki-news-300d-1M.vec'.format(self.FEATURE_ENGINEERING_MODELS_DIR),
                                                 dim=300,
                                                 minn=2,
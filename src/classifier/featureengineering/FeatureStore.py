@@ -0,0 +1,193 @@
+#!/usr/bin/python
+
+import os
+import numpy as np
+
+
+class FeatureStore(object):
+    """
+    Class that implements a store of the model input features of the Ground-truth videos. The features of each
+    modality (e.g., video_snippet) are stored as a single contiguous float32 matrix (.npy) along with an index of
+    the video id of each row (.ids.npy) and, optionally, the hash of the source text of each row (.hashes.npy). The matrices are opened with mmap_mode, hence loading them is near-instant
+    and zero-copy, and all the processes and K-Folds that read them share the same pages.
+    """
+    def __init__(self, features_dir):
+        """
+        Constructor
+        :param features_dir: the directory where the features are stored
+        """
+        self.FEATURES_DIR = features_dir
+        if not os.path.exists(features_dir):
+            os.makedirs(features_dir, exist_ok=True)
+
+        # Opened features matrices and ids indices of each modality
+        self.features = dict()  # modality => memory-mapped features matrix
+        self.video_ids = dict()  # modality => array of video ids
+        self.video_rows = dict()  # modality => {video id => row}
+        return
+
+    def get_features_filename(self, modality):
+        """
+        Method that returns the filename of the features matrix of the given modality
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return:
+        """
+        return '{0}/{1}_features.npy'.format(self.FEATURES_DIR, modality)
+
+    def get_ids_filename(self, modality):
+        """
+        Method that returns the filename of the video ids index of the given modality
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return:
+        """
+        return '{0}/{1}_features.ids.npy'.format(self.FEATURES_DIR, modality)
+
+    def get_hashes_filename(self, modality):
+        """
+        Method that returns the filename of the source text hashes of the given modality
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return:
+        """
+        return '{0}/{1}_features.hashes.npy'.format(self.FEATURES_DIR, modality)
+
+    def exists(self, modality):
+        """
+        Method that checks whether the features of the given modality have been stored
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: True if the features exist, False otherwise
+        """
+        return os.path.isfile(self.get_features_filename(modality=modality)) and os.path.isfile(self.get_ids_filename(modality=modality))
+
+    def write(self, modality, video_ids, features, source_hashes=None):
+        """
+        Method that stores the features of the given modality, replacing any previously stored features
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param video_ids: the video id of each row of the features
+        :param features: a list or an array with the feature vector of each video
+        :param source_hashes: the hash of the source text of each video (optional)
+        :return:
+        """
+        features = np.asarray(features, dtype=np.float32)
+        video_ids = np.array(video_ids, dtype=str)
+        if features.shape[0] != video_ids.shape[0]:
+            raise ValueError('Got {0} feature vectors for {1} videos'.format(features.shape[0], video_ids.shape[0]))
+        if source_hashes is not None and len(source_hashes) != video_ids.shape[0]:
+            raise ValueError('Got {0} source hashes for {1} videos'.format(len(source_hashes), video_ids.shape[0]))
+
+        # Write to temporary files and replace the previous features only when done
+        files = [(self.get_features_filename(modality=modality), features), (self.get_ids_filename(modality=modality), video_ids)]
+        if source_hashes is not None:
+            files.append((self.get_hashes_filename(modality=modality), np.array(source_hashes, dtype=str)))
+        elif os.path.isfile(self.get_hashes_filename(modality=modality)):
+            os.remove(self.get_hashes_filename(modality=modality))
+        for filename, data in files:
+            temp_filename = '{0}.tmp{1}'.format(filename, os.getpid())
+            with open(temp_filename, mode='wb') as file:
+                np.save(file, data, allow_pickle=False)
+            os.replace(temp_filename, filename)
+
+        # Close the previously opened features
+        self.features.pop(modality, None)
+        self.video_ids.pop(modality, None)
+        self.video_rows.pop(modality, None)
+        return
+
+    def splice(self, modality, video_ids, new_video_ids, new_features, source_hashes=None):
+        """
+        Method that rebuilds the stored features of the given modality for a new list of videos, taking the given
+        features for the new (or changed) videos and reusing the stored feature vector of each other video. Stored
+        videos that are not in the given list are dropped
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param video_ids: the video id of each row of the new features
+        :param new_video_ids: the ids of the videos that do not exist in the store or whose features have changed
+        :param new_features: a list or an array with the feature vector of each new video
+        :param source_hashes: the hash of the source text of each video of the new features (optional)
+        :return:
+        """
+        new_features = np.asarray(new_features, dtype=np.float32)
+        if new_features.shape[0] != len(new_video_ids):
+            raise ValueError('Got {0} feature vectors for {1} new videos'.format(new_features.shape[0], len(new_video_ids)))
+        stored_features = self.open(modality=modality)
+        if modality not in self.video_rows:
+            self.video_rows[modality] = {video_id: row for row, video_id in enumerate(self.get_video_ids(modality=modality).tolist())}
+        stored_rows = self.video_rows[modality]
+        new_rows = {video_id: row for row, video_id in enumerate(new_video_ids)}
+
+        # Copy the stored and the new feature vectors in the order of the given videos
+        features = np.empty((len(video_ids), stored_features.shape[1]), dtype=np.float32)
+        is_stored = np.array([video_id in stored_rows and video_id not in new_rows for video_id in video_ids], dtype=bool)
+        missing_video_ids = [video_id for video_id in np.array(video_ids, dtype=str)[~is_stored].tolist() if video_id not in new_rows]
+        if len(missing_video_ids) > 0:
+            raise KeyError('No {0} features for {1} videos (e.g., {2})'.format(modality, len(missing_video_ids), missing_video_ids[0]))
+        features[is_stored] = np.take(stored_features, indices=[stored_rows[video_id] for video_id, stored in zip(video_ids, is_stored) if stored], axis=0)
+        if (~is_stored).any():
+            features[~is_stored] = np.take(new_features, indices=[new_rows[video_id] for video_id, stored in zip(video_ids, is_stored) if not stored], axis=0)
+        self.write(modality=modality, video_ids=video_ids, features=features, source_hashes=source_hashes)
+        return
+
+    def open(self, modality):
+        """
+        Method that opens (memory-maps) the features of the given modality
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: the memory-mapped (N, dim) float32 features matrix
+        """
+        if modality not in self.features:
+            self.features[modality] = np.load(self.get_features_filename(modality=modality), mmap_mode='r')
+            self.video_ids[modality] = np.load(self.get_ids_filename(modality=modality), allow_pickle=False)
+        return self.features[modality]
+
+    def get_video_ids(self, modality):
+        """
+        Method that returns the video id of each row of the features of the given modality
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: an array of video ids
+        """
+        self.open(modality=modality)
+        return self.video_ids[modality]
+
+    def get_source_hashes(self, modality):
+        """
+        Method that returns the hash of the source text of each row of the features of the given modality
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: an array of hashes or None if the features were stored without hashes
+        """
+        if not os.path.isfile(self.get_hashes_filename(modality=modality)):
+            return None
+        return np.load(self.get_hashes_filename(modality=modality), allow_pickle=False)
+
+    def get_rows(self, modality, indices):
+        """
+        Method that returns the feature vectors of the given rows
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param indices: a list of row indices
+        :return: a (len(indices), dim) float32 array
+        """
+        return np.take(self.open(modality=modality), indices=indices, axis=0)
+
+    def get_rows_by_ids(self, modality, video_ids):
+        """
+        Method that returns the feature vectors of the given videos
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param video_ids: a list of video ids
+        :return: a (len(video_ids), dim) float32 array
+        """
+        if modality not in self.video_rows:
+            self.video_rows[modality] = {video_id: row for row, video_id in enumerate(self.get_video_ids(modality=modality).tolist())}
+        video_rows = self.video_rows[modality]
+        missing_video_ids = [video_id for video_id in video_ids if video_id not in video_rows]
+        if len(missing_video_ids) > 0:
+            raise KeyError('No {0} features for {1} videos (e.g., {2})'.format(modality, len(missing_video_ids), missing_video_ids[0]))
+        return self.get_rows(modality=modality, indices=[video_rows[video_id] for video_id in video_ids])
+
+    def get_features(self, modality, video_ids=None):
+        """
+        Method that returns the features of the given modality in the order of the given videos. If the videos
+        are in the same order as the stored features, the memory-mapped matrix is returned without any copy
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param video_ids: a list of video ids or None to return all features in the stored order
+        :return: a (N, dim) float32 array
+        """
+        features = self.open(modality=modality)
+        if video_ids is None or np.array_equal(self.get_video_ids(modality=modality), np.array(video_ids, dtype=str)):
+            return features
+        return self.get_rows_by_ids(modality=modality, video_ids=video_ids)
@@ -56,12 +56,14 @@ class ClassifierTraining(object):
         # Create a Pseudoscience Model Object
         self.DEEP_LEARNING_MODEL_OBJ = PseudoscienceDeepLearningModel()
 
-        # Get Dataset Videos and their Labels
-        self.dataset_videos, self.videos_classification_details = self.DATASET.get_groundtruth_videos(), self.DATASET.get_groundtruth_labels()
-        # self.dataset_videos = self.DATASET.get_groundtruth_videos()
-        self.dataset_labels = self.DATASET.get_groundtruth_labels()
-        self.dataset_labels_categorical = self.DATASET.get_groundtruth_labels_one_hot_encoded(perform_one_hot=False) # [0]
-        self.dataset_labels_one_hot = self.DATASET.get_groundtruth_labels_one_hot_encoded(perform_one_hot=True)  # [0., 0., 1., 0.]
+        # Get Dataset Videos and their Labels (aligned arrays of the Ground-truth snapshot)
+        groundtruth_snapshot = self.DATASET.GROUNDTRUTH_SNAPSHOT
+        groundtruth_snapshot.print_labels_summary()
+        self.dataset_videos = groundtruth_snapshot.VIDEO_IDS
+        self.dataset_labels = groundtruth_snapshot.LABELS
+        self.videos_classification_details = self.dataset_labels
+        self.dataset_labels_categorical = groundtruth_snapshot.LABELS_CATEGORICAL  # [0]
+        self.dataset_labels_one_hot = groundtruth_snapshot.LABELS_ONE_HOT  # [0., 0., 1., 0.]
 
         """ Early Stopper (to stop training before overfitting and save best weights) """
         self.early_stopper = EarlyStopping(mode='auto', verbose=2, monitor='val_loss', restore_best_weights=True, patience=20)
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+
+import os
+import json
+import time
+import hashlib
+from pymongo.errors import OperationFailure
+
+
+class ArtifactManifest(object):
+    """
+    Class that implements the manifest of a cached artifact (e.g., preprocessed features or sentence embeddings).
+    The manifest is stored next to the artifact ('<artifact>.manifest.json') and records the fingerprints of the
+    inputs that the artifact was built from (e.g., MongoDB collection fingerprints, preprocessing version, and
+    fastText model checksum). An artifact is reused only if it exists and all its recorded input fingerprints
+    match the current ones; artifacts without a manifest are considered stale.
+    """
+    # Artifact states
+    FRESH = 'fresh'
+    STALE = 'stale'
+    MISSING = 'missing'
+
+    def __init__(self, artifact_filename):
+        """
+        Constructor
+        :param artifact_filename: the filename of the artifact
+        """
+        self.ARTIFACT_FILENAME = artifact_filename
+        self.MANIFEST_FILENAME = '{0}.manifest.json'.format(artifact_filename)
+        return
+
+    @staticmethod
+    def get_collection_fingerprint(collection, exact=False):
+        """
+        Method that returns a fingerprint of the given MongoDB collection. By default, the fingerprint is cheap
+        (it does not scan the collection): the number of documents and the data size from the metadata of the
+        collection (collStats) and its last _id (read from the _id index). An exact fingerprint, i.e., the number
+        of documents and the hash of the collection (dbHash), requires full scans of the collection and dbHash
+        also locks the database, hence it is computed only if it is explicitly requested
+        :param collection: a pymongo collection
+        :param exact: whether to compute the exact (full scan) fingerprint
+        :return: the fingerprint of the collection as a string
+        """
+        last_document = list(collection.find({}, {'_id': 1}).sort('_id', -1).limit(1))
+        last_id = last_document[0]['_id'] if len(last_document) > 0 else None
+        if exact:
+            total_documents = collection.count_documents({})
+            try:
+                db_hash = collection.database.command('dbHash', collections=[collection.name])
+                return 'count:{0}|dbhash:{1}'.format(total_documents, db_hash['collections'][collection.name])
+            except (OperationFailure, KeyError):
+                return 'count:{0}|last_id:{1}'.format(total_documents, last_id)
+        try:
+            collection_stats = collection.database.command('collStats', collection.name)
+            return 'count:{0}|size:{1}|last_id:{2}'.format(collection_stats['count'], collection_stats['size'], last_id)
+        except (OperationFailure, KeyError):
+            return 'count:{0}|last_id:{1}'.format(collection.estimated_document_count(), last_id)
+
+    @staticmethod
+    def get_inputs_digest(inputs):
+        """
+        Method that returns a digest of the given input fingerprints
+        :param inputs: a dict of input name => fingerprint
+        :return: the hex digest of the inputs
+        """
+        return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def read(self):
+        """
+        Method that reads the manifest of the artifact
+        :return: the manifest as a dict or None if it does not exist
+        """
+        try:
+            with open(self.MANIFEST_FILENAME, mode='r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def write(self, inputs):
+        """
+        Method that writes the manifest of a (re)built artifact
+        :param inputs: a dict of input name => fingerprint that the artifact was built from
+        :return:
+        """
+        temp_manifest_filename = '{0}.tmp{1}'.format(self.MANIFEST_FILENAME, os.getpid())
+        with open(temp_manifest_filename, mode='w') as file:
+            json.dump({
+                'artifact': self.ARTIFACT_FILENAME,
+                'inputs': inputs,
+                'inputs_digest': self.get_inputs_digest(inputs=inputs),
+                'built_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            }, file, indent=2, sort_keys=True)
+        os.replace(temp_manifest_filename, self.MANIFEST_FILENAME)
+        return
+
+    def get_status(self, inputs):
+        """
+        Method that compares the recorded input fingerprints of the artifact with the given current ones
+        :param inputs: a dict of input name => current fingerprint
+        :return: the state of the artifact (FRESH, STALE, or MISSING) and a list with the names of the changed inputs
+        """
+        if not os.path.exists(self.ARTIFACT_FILENAME):
+            return self.MISSING, sorted(inputs.keys())
+        manifest = self.read()
+        if manifest is None:
+            return self.STALE, ['manifest']
+        recorded_inputs = manifest.get('inputs', dict())
+        changed_inputs = sorted([name for name in set(inputs.keys()) | set(recorded_inputs.keys()) if inputs.get(name) != recorded_inputs.get(name)])
+        return (self.STALE if len(changed_inputs) > 0 else self.FRESH), changed_inputs
+
+    def is_fresh(self, inputs):
+        """
+        Method that checks whether the artifact exists and was built from the given inputs
+        :param inputs: a dict of input name => current fingerprint
+        :return: True if the artifact can be reused, False if it has to be rebuilt
+        """
+        return self.get_status(inputs=inputs)[0] == self.FRESH
@@ -1,35 +1,53 @@
 #!/usr/bin/python
 
 from pymongo import MongoClient
-import json
 import os
-import re
-import unicodedata
-import string
+import json
+import hashlib
 import numpy as np
 import pickle
-import itertools
+import multiprocessing
 from tqdm import tqdm
 from keras.utils import to_categorical
 
-import contractions
-from bs4 import BeautifulSoup
-from nltk.tokenize import word_tokenize
-import nltk
-stop_words = set(nltk.corpus.stopwords.words('english'))
-stop_words.remove('no')
-stop_words.remove('not')
-from nltk.stem import WordNetLemmatizer
-lematizer = WordNetLemmatizer()
+from dataset.TextPreprocessor import TextPreprocessor
+from dataset.VideoPreprocessingUtils import VideoPreprocessingUtils
+from dataset.GroundtruthDatasetSnapshot import GroundtruthDatasetSnapshot
+from dataset.ArtifactManifest import ArtifactManifest
 from nltk.stem.porter import PorterStemmer
 porterStemmer = PorterStemmer()
+from dataset.config.DatasetConfig import Config
+
+# Text Preprocessor of each worker process of the preprocessing pool
+worker_text_preprocessor = None
+
+
+def init_preprocessing_worker():
+    """
+    Initializer of each worker process of the preprocessing pool
+    """
+    global worker_text_preprocessor
+    worker_text_preprocessor = TextPreprocessor()
+    return
+
+
+def preprocess_texts_worker(texts):
+    """
+    Function that preprocesses and merges the given texts of a single video in a worker process
+    :param texts: a list of texts of a single video
+    :return: the merged preprocessed text
+    """
+    return worker_text_preprocessor.preprocess_texts(texts=texts)
 
 
-class DatasetUtils(object):
+class DatasetUtils(VideoPreprocessingUtils):
     """
     Class that contains all the methods for the processing and preprocessing of our dataset
     """
     def __init__(self):
+        # Initialize the Video Preprocessing Utils
+        super(DatasetUtils, self).__init__()
+
         #
         # MongoDB Configuration
         #
@@ -42,42 +60,28 @@ class DatasetUtils(object):
         self.groundtruth_videos_comments_col = self.db.groundtruth_videos_comments
         self.groundtruth_videos_transcripts_col = self.db.groundtruth_videos_transcripts
 
-        # Video Metadata Base Directories
-        self.VIDEO_TRANSCRIPT_BASE_DIR = '/videosdata/transcript'
-        self.VIDEO_COMMENTS_BASE_DIR = '/videosdata/comments'
-
         # Input Features filenames
         self.VIDEO_SNIPPET_FEATURES_FILENAME = 'src/dataset/data/video_snippet_features.p'
         self.VIDEO_TAGS_FEATURES_FILENAME = 'src/dataset/data/video_tags_features.p'
         self.VIDEO_TRANSCRIPT_FEATURES_FILENAME = 'src/dataset/data/video_transcript_features.p'
         self.VIDEO_COMMENTS_FEATURES_FILENAME = 'src/dataset/data/video_comments_features.p'
+        self.TEXT_FEATURES_FILENAMES = {
+            'video_snippet': self.VIDEO_SNIPPET_FEATURES_FILENAME,
+            'video_tags': self.VIDEO_TAGS_FEATURES_FILENAME,
+            'video_transcript': self.VIDEO_TRANSCRIPT_FEATURES_FILENAME,
+            'video_comments': self.VIDEO_COMMENTS_FEATURES_FILENAME,
+        }
 
         # CLASSES
         self.classes = ['science', 'pseudoscience']
 
-        # Get Ground-truth Videos
+        # Get an aligned snapshot of the Ground-truth Videos and their labels (built with a single scan)
+        self.GROUNDTRUTH_SNAPSHOT = GroundtruthDatasetSnapshot(groundtruth_videos_col=self.groundtruth_videos_col, classes=self.classes)
         self.GROUNDTRUTH_VIDEOS = self.get_groundtruth_videos()
-        return
-
-    @staticmethod
-    def key_exists(element, *keys):
-        """
-        Check if *keys (nested) exists in `element` (dict).
-        :param keys:
-        :return: True if key exists, False if not
-        """
-        if type(element) is not dict:
-            raise AttributeError('keys_exists() expects dict as first argument.')
-        if len(keys) == 0:
-            raise AttributeError('keys_exists() expects at least two arguments, one given.')
 
-        _element = element
-        for key in keys:
-            try:
-                _element = _element[key]
-            except KeyError:
-                return False
-        return True
+        # Fingerprints of the MongoDB collections (computed once per instance)
+        self.collection_fingerprints = {self.groundtruth_videos_col.name: self.GROUNDTRUTH_SNAPSHOT.FINGERPRINT}
+        return
 
     @staticmethod
     def create_pickle_file_and_write_data(filename, data, protocol):
@@ -94,40 +98,15 @@ class DatasetUtils(object):
         Method that returns the ids of the Ground-truth videos
         :return:
         """
-        groundtruth_videos = self.groundtruth_videos_col.find({}, {'id': 1})
-        return [video['id'] for video in groundtruth_videos]
+        return self.GROUNDTRUTH_SNAPSHOT.VIDEO_IDS.tolist()
 
     def get_groundtruth_labels(self):
         """
         Method that returns the labels of our Ground Truth Videos
         :return:
         """
-        groundtruth_videos = self.groundtruth_videos_col.find({}, {'id': 1, 'annotation': 1})
-
-        video_labels = list()
-        science_videos = 0
-        pseudoscience_videos = 0
-        irrelevant_videos = 0
-        for video in groundtruth_videos:
-            # Find the correct label
-            if video['annotation']['label'] == 'science':
-                science_videos += 1
-            elif video['annotation']['label'] == 'pseudoscience':
-                pseudoscience_videos += 1
-            elif video['annotation']['label'] == 'irrelevant':
-                irrelevant_videos += 1
-            elif video['annotation']['label'] == 'unknown':
-                irrelevant_videos += 1
-            elif video['annotation']['label'] == 'not_available':
-                irrelevant_videos += 1
-
-            # Add Video details
-            if video['annotation']['label'] == 'irrelevant':
-                video_labels.append('science')
-            else:
-                video_labels.append(video['annotation']['label'])
-        print('\n\n--- [GROUND TRUTH VIDEOS] SCIENCE: {} | PSEUDOSCIENCE: {}'.format(science_videos+irrelevant_videos, pseudoscience_videos))
-        return video_labels
+        self.GROUNDTRUTH_SNAPSHOT.print_labels_summary()
+        return self.GROUNDTRUTH_SNAPSHOT.LABELS.tolist()
 
     def get_groundtruth_labels_one_hot_encoded(self, perform_one_hot=True):
         """
@@ -135,28 +114,9 @@ class DatasetUtils(object):
         :param perform_one_hot:
         :return:
         """
-        groundtruth_videos = self.groundtruth_videos_col.find({}, {'id': 1, 'annotation': 1})
-        ground_truth_labels = [video['annotation']['label'] for video in groundtruth_videos]
-
-        final_groundtruth_labels = list()
-        for label in ground_truth_labels:
-            if label == 'irrelevant':
-                label = 'science'
-            if label == 'not_available':
-                label = 'science'
-            if label == 'unknown':
-                label = 'science'
-            final_groundtruth_labels.append(label)
-
-        # Init variables
-        groundtruth_videos_labels_encoded = list()
-        # Perform one-hot categorical encoding on each label and append it to the result
-        for label in final_groundtruth_labels:
-            if perform_one_hot:
-                groundtruth_videos_labels_encoded.append(self.get_class_one_hot(label))
-            else:
-                groundtruth_videos_labels_encoded.append(self.get_class_to_categorical(label))
-        return np.array(groundtruth_videos_labels_encoded)
+        if perform_one_hot:
+            return self.GROUNDTRUTH_SNAPSHOT.LABELS_ONE_HOT
+        return self.GROUNDTRUTH_SNAPSHOT.LABELS_CATEGORICAL
 
     def get_class_one_hot(self, class_str):
         """
@@ -179,98 +139,225 @@ class DatasetUtils(object):
         label_to_categorical = self.classes.index(class_str)
         return label_to_categorical
 
-    @staticmethod
-    def strip_html_tags(text):
-        """ Remove HTML tags from text """
-        soup = BeautifulSoup(text, "html.parser")
-        stripped_text = soup.get_text()
-        return stripped_text
+    def preprocess_videos_texts(self, videos_texts, total_videos=None):
+        """
+        Method that preprocesses and merges the texts of each Ground-truth video. If more than one preprocessing
+        process is configured, the videos are sharded in chunks across a pool of worker processes. In any case,
+        the results are returned in the same order as the given videos
+        :param videos_texts: an iterable with a list of texts for each video in self.GROUNDTRUTH_VIDEOS
+        :param total_videos: the number of videos (only for the progress bar), if not all the Ground-truth videos
+        :return: a list with the preprocessed text of each video
+        """
+        videos_features = list()
+        progress = tqdm(total=len(self.GROUNDTRUTH_VIDEOS) if total_videos is None else total_videos)
+        if Config.PREPROCESSING_PROCESSES > 1:
+            with multiprocessing.Pool(processes=Config.PREPROCESSING_PROCESSES, initializer=init_preprocessing_worker) as pool:
+                # imap() preserves the order of the videos
+                for video_features in pool.imap(preprocess_texts_worker, videos_texts, chunksize=Config.PREPROCESSING_CHUNK_SIZE):
+                    videos_features.append(video_features)
+                    progress.update(1)
+        else:
+            for texts in videos_texts:
+                videos_features.append(self.TEXT_PREPROCESSOR.preprocess_texts(texts=texts))
+                progress.update(1)
+            self.print_preprocessing_cache_stats()
+        progress.close()
+        return videos_features
+
+    def iterate_groundtruth_videos_data(self, fields=('snippet', 'tags', 'transcript', 'label'), video_ids=None):
+        """
+        Method that streams the requested data of all the Ground-truth videos in the same order as self.GROUNDTRUTH_VIDEOS.
+        Instead of querying each video separately, it reads batches of videos with a few projected cursors
+        (one for each required collection) and joins them by video id
+        :param fields: the data to read: 'snippet' (title + description), 'tags', 'transcript' (captions), and/or 'label'
+        :param video_ids: the videos to read (in this order) or None to read all the Ground-truth videos
+        :return: a generator of dicts with the 'id' and the requested fields of each video
+        """
+        if video_ids is None:
+            video_ids = self.GROUNDTRUTH_VIDEOS
+
+        # Project only the fields that we need
+        videos_projection = {'_id': 0, 'id': 1}
+        if 'snippet' in fields:
+            videos_projection.update({'snippet.title': 1, 'snippet.description': 1})
+        if 'tags' in fields:
+            videos_projection['snippet.tags'] = 1
+        if 'label' in fields:
+            videos_projection['annotation.label'] = 1
+        read_videos = len(videos_projection) > 2
+        read_transcripts = 'transcript' in fields
+
+        for i in range(0, len(video_ids), Config.MONGO_BATCH_SIZE):
+            batch_video_ids = video_ids[i:i + Config.MONGO_BATCH_SIZE]
+
+            # Read the details and the transcripts of the current batch of videos
+            videos_details, videos_transcripts = dict(), dict()
+            if read_videos:
+                videos_details = {video['id']: video for video in self.groundtruth_videos_col.find({'id': {'$in': batch_video_ids}}, videos_projection, batch_size=Config.MONGO_BATCH_SIZE)}
+            if read_transcripts:
+                videos_transcripts = {video['id']: video.get('captions', list()) for video in self.groundtruth_videos_transcripts_col.find({'id': {'$in': batch_video_ids}}, {'_id': 0, 'id': 1, 'captions': 1}, batch_size=Config.MONGO_BATCH_SIZE)}
+
+            # Join them by video id
+            for video_id in batch_video_ids:
+                video_data = {'id': video_id}
+                video_details = videos_details.get(video_id, dict())
+                if 'snippet' in fields:
+                    video_data['snippet'] = self.get_snippet_text(video_details=video_details)
+                if 'tags' in fields:
+                    video_data['tags'] = self.get_tags_text(video_details=video_details)
+                if 'label' in fields:
+                    video_data['label'] = video_details['annotation']['label'] if self.key_exists(video_details, 'annotation', 'label') else None
+                if read_transcripts:
+                    video_data['transcript'] = videos_transcripts.get(video_id, list())
+                yield video_data
 
     @staticmethod
-    def remove_URL_linking(text):
-        """ Remove URLs from a text """
-        text = re.sub('https?://[A-Za-z0-9./]+', '', text)
-        text = re.sub(r"http\S+", "", text)
-        return text
+    def get_snippet_text(video_details):
+        """
+        Method that concatenates the Title + Description of the given Video details
+        :param video_details: the details of the Video as stored in MongoDB
+        :return:
+        """
+        return '{} {}'.format(video_details['snippet']['title'], video_details['snippet']['description'])
 
     @staticmethod
-    def remove_accented_characters(text):
-        """ Remove accented and non-ascii characters. For example convert é to e. """
-        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8', 'ignore')
-        return text
+    def get_tags_text(video_details):
+        """
+        Method that concatenates the Video Tags of the given Video details if they exist
+        :param video_details: the details of the Video as stored in MongoDB
+        :return:
+        """
+        video_tags = ''
+        if DatasetUtils.key_exists(video_details, 'snippet', 'tags'):
+            video_tags = ' '.join(video_details['snippet']['tags'])
+        return video_tags
 
-    @staticmethod
-    def replace_contractions(text):
-        """Replace contractions in string of text"""
-        return contractions.fix(text)
+    def get_collection_fingerprint(self, collection):
+        """
+        Method that returns the fingerprint of the given MongoDB collection (computed only once). The fingerprint
+        does not scan the collection (e.g., the large transcripts and comments collections), unless the exact
+        fingerprints are enabled in the configuration
+        :param collection: a pymongo collection
+        :return: the fingerprint of the collection as a string
+        """
+        if collection.name not in self.collection_fingerprints:
+            self.collection_fingerprints[collection.name] = ArtifactManifest.get_collection_fingerprint(collection=collection, exact=Config.EXACT_COLLECTION_FINGERPRINTS)
+        return self.collection_fingerprints[collection.name]
 
-    @staticmethod
-    def remove_special_characters(text, remove_digits=False):
-        """Remove special characters from text"""
-        pattern = r'[^a-zA-z0-9\s]' if not remove_digits else r'[^a-zA-z\s]'
-        text = re.sub(pattern, '', text)
-        return text
+    def get_text_features_inputs(self, modality):
+        """
+        Method that returns the current fingerprints of the inputs of the preprocessed text features of the given type
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: a dict of input name => fingerprint
+        """
+        inputs = {
+            'groundtruth_videos': self.get_collection_fingerprint(collection=self.groundtruth_videos_col),
+            'preprocessing_version': TextPreprocessor.VERSION,
+        }
+        if modality == 'video_transcript':
+            inputs['groundtruth_videos_transcripts'] = self.get_collection_fingerprint(collection=self.groundtruth_videos_transcripts_col)
+        elif modality == 'video_comments':
+            inputs['groundtruth_videos_comments'] = self.get_collection_fingerprint(collection=self.groundtruth_videos_comments_col)
+        return inputs
 
-    @staticmethod
-    def remove_stopwords(tokens):
-        """Remove stopwords from text (such as 'a', 'an', etc.)"""
-        filtered_tokens = [token for token in tokens if token not in stop_words]
-        return filtered_tokens
+    def get_text_features_manifest(self, modality):
+        """
+        Method that returns the manifest of the preprocessed text features of the given type
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: an ArtifactManifest
+        """
+        return ArtifactManifest(artifact_filename=self.TEXT_FEATURES_FILENAMES[modality])
 
     @staticmethod
-    def remove_multiple_spaces_newlines(text):
-        # Substituting multiple spaces with single space
-        text = re.sub(r'\s+', ' ', text, flags=re.I)
-        # remove extra newlines
-        text = re.sub(r'[\r|\n|\r\n]+', ' ', text)
-        return text
+    def read_text_features(features_filename):
+        """
+        Method that reads saved preprocessed text features
+        :param features_filename: the pickle file of the features
+        :return: the video id of each feature (None for files saved without ids), the features, and the hash of
+                 the source texts of each feature (None for files saved without hashes)
+        """
+        saved_features = pickle.load(open(features_filename, mode='rb'))
+        if isinstance(saved_features, dict):
+            return saved_features['video_ids'], saved_features['features'], saved_features.get('source_hashes')
+        return None, saved_features, None
 
     @staticmethod
-    def lematize_tokens(tokens):
-        """Lematize all words in the given list of words"""
-        tokens = [lematizer.lemmatize(word) for word in tokens]
-        return tokens
-
-    def preprocess_text(self, text):
-        """Method that preprocess text for the FastText classifier"""
-
-        # Substituting multiple spaces with single space
-        text = self.remove_multiple_spaces_newlines(text=text)
-
-        # Strip HTML Tags
-        text = self.strip_html_tags(text=text)
-
-        # Remove URLs
-        text = self.remove_URL_linking(text=text)
-
-        # Remove all special characters and digits
-        text = self.remove_special_characters(text=text, remove_digits=True)
-
-        # Remove accented characters (non-ascii)
-        text = self.remove_accented_characters(text=text)
-
-        # Replace Contractions (don't => do not)
-        text = self.replace_contractions(text=text)
-
-        # Remove Panctuations
-        text = text.translate(str.maketrans('', '', string.punctuation))
-
-        # Lowercase
-        text = text.strip().lower()
-
-        # Lemmatize
-        tokens = word_tokenize(text=text)
-        tokens = self.lematize_tokens(tokens=tokens)
+    def get_source_hash(texts):
+        """
+        Method that returns the hash of the source (not preprocessed) texts of a single video
+        :param texts: a list of texts of a single video
+        :return: the hex digest of the texts
+        """
+        return hashlib.sha1(json.dumps(texts, ensure_ascii=False).encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get_text_features(self, modality, read_texts):
+        """
+        Method that returns the preprocessed text features of the given type. The saved features are reused only
+        if their manifest matches the current inputs (Ground-truth collections and preprocessing version).
+        If only the Ground-truth collections have changed, it performs a delta build: the source texts of all the
+        videos are read and hashed, and only the videos that have been added or whose texts have changed (e.g.,
+        comments or captions downloaded later, or an edited description) are preprocessed and spliced in by video
+        id. Otherwise, all the features are rebuilt. In any case, they are saved along with their video ids, the
+        hash of the source texts of each video, and a new manifest
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param read_texts: a function that returns a generator with the list of source texts of each of the given video ids
+        :return: a list with the preprocessed text of each Ground-truth video
+        """
+        features_filename = self.TEXT_FEATURES_FILENAMES[modality]
+        features_manifest = self.get_text_features_manifest(modality=modality)
+        features_inputs = self.get_text_features_inputs(modality=modality)
+
+        state, changed_inputs = features_manifest.get_status(inputs=features_inputs)
+        saved_video_ids, saved_features, saved_source_hashes = (None, None, None) if state == ArtifactManifest.MISSING else self.read_text_features(features_filename=features_filename)
+        if state == ArtifactManifest.FRESH:
+            # Read saved features from file (features saved without ids are aligned with the Ground-truth videos)
+            if saved_video_ids is None or saved_video_ids == self.GROUNDTRUTH_VIDEOS:
+                return saved_features
+            saved_features = dict(zip(saved_video_ids, saved_features))
+            return [saved_features[video_id] for video_id in self.GROUNDTRUTH_VIDEOS]
+
+        source_hashes = list()
+        if state == ArtifactManifest.STALE and saved_source_hashes is not None and set(changed_inputs).isdisjoint(['preprocessing_version', 'manifest']):
+            # Delta build: preprocess only the videos that have been added or whose source texts have changed
+            saved_features = {video_id: (features, source_hash) for video_id, features, source_hash in zip(saved_video_ids, saved_features, saved_source_hashes)}
+            changed_videos_texts = dict()
+            for video_id, texts in zip(self.GROUNDTRUTH_VIDEOS, read_texts(video_ids=self.GROUNDTRUTH_VIDEOS)):
+                source_hashes.append(self.get_source_hash(texts=texts))
+                if video_id not in saved_features or saved_features[video_id][1] != source_hashes[-1]:
+                    changed_videos_texts[video_id] = texts
+            total_new_videos = sum(video_id not in saved_features for video_id in changed_videos_texts)
+            total_removed_videos = len(set(saved_video_ids) - set(self.GROUNDTRUTH_VIDEOS))
+            print('--- [{0}] STALE features, delta build (changed: {1}) | NEW VIDEOS: {2} | CHANGED VIDEOS: {3} | REMOVED VIDEOS: {4}'.format(
+                modality.upper(), ', '.join(changed_inputs), total_new_videos, len(changed_videos_texts) - total_new_videos, total_removed_videos))
+            changed_features = dict()
+            if len(changed_videos_texts) > 0:
+                changed_features = dict(zip(changed_videos_texts.keys(), self.preprocess_videos_texts(videos_texts=changed_videos_texts.values(), total_videos=len(changed_videos_texts))))
+            features = [changed_features[video_id] if video_id in changed_features else saved_features[video_id][0] for video_id in self.GROUNDTRUTH_VIDEOS]
+        else:
+            print('--- [{0}] {1} features, rebuilding (changed: {2})'.format(modality.upper(), state.upper(), ', '.join(changed_inputs)))
 
-        # Remove stop words
-        tokens = self.remove_stopwords(tokens=tokens)
+            def hash_texts(videos_texts):
+                # Hash the source texts of each video while they are preprocessed
+                for texts in videos_texts:
+                    source_hashes.append(self.get_source_hash(texts=texts))
+                    yield texts
+            features = self.preprocess_videos_texts(videos_texts=hash_texts(videos_texts=read_texts(video_ids=self.GROUNDTRUTH_VIDEOS)))
 
-        # Discard terms with less than min_chars
-        min_chars = 3
-        tokens = [token for token in tokens if len(token) >= min_chars]
+        # Save them to file along with their video ids and the hashes of their source texts
+        pickle.dump({'video_ids': self.GROUNDTRUTH_VIDEOS, 'features': features, 'source_hashes': source_hashes}, open(features_filename, mode='wb'))
+        features_manifest.write(inputs=features_inputs)
+        return features
 
-        preprocessed_text = ' '.join(tokens)
-        return preprocessed_text
+    def get_video_snippet_text(self, video_id):
+        """
+        Method that concatenates the Title + Description of the Video
+        :param video_id:
+        :return:
+        """
+        # Get Video details
+        video_details = self.groundtruth_videos_col.find_one({'id': video_id}, {'snippet': 1})
+        # Concatenate the different video metadata
+        return self.get_snippet_text(video_details=video_details)
 
     def preprocess_video_snippet(self, video_id):
         """
@@ -279,11 +366,7 @@ class DatasetUtils(object):
         :param video_id:
         :return:
         """
-        # Get Video details
-        video_details = self.groundtruth_videos_col.find_one({'id': video_id}, {'snippet': 1})
-        # Concatenate the different video metadata
-        video_snippet = '{} {}'.format(video_details['snippet']['title'], video_details['snippet']['description'])
-        video_snippet = self.preprocess_text(text=video_snippet)
+        video_snippet = self.preprocess_text(text=self.get_video_snippet_text(video_id=video_id))
         return video_snippet
 
     def get_video_snippet_features(self):
@@ -291,25 +374,12 @@ class DatasetUtils(object):
         Method that gets the Video Snippet features for all all_videos in our Ground Truth
         :return:
         """
-        all_video_snippet_features = list()
-        if not os.path.isfile(self.VIDEO_SNIPPET_FEATURES_FILENAME):
-            progress = tqdm(total=len(self.GROUNDTRUTH_VIDEOS))
-            for video_id in self.GROUNDTRUTH_VIDEOS:
-                all_video_snippet_features.append(self.preprocess_video_snippet(video_id=video_id))
-                progress.update(1)
-            progress.close()
-
-            # Save them to file
-            pickle.dump(all_video_snippet_features, open(self.VIDEO_SNIPPET_FEATURES_FILENAME, mode='wb'))
-        else:
-            # Read saved features from file
-            all_video_snippet_features = pickle.load(open(self.VIDEO_SNIPPET_FEATURES_FILENAME, mode='rb'))
-
-        return all_video_snippet_features
+        return self.get_text_features(modality='video_snippet',
+                                      read_texts=lambda video_ids: ([video_data['snippet']] for video_data in self.iterate_groundtruth_videos_data(fields=('snippet',), video_ids=video_ids)))
 
-    def preprocess_video_tags(self, video_id):
+    def get_video_tags_text(self, video_id):
         """
-        Method that retrieves and preprocesses the Video Tags of a given YouTube Video
+        Method that retrieves the Video Tags of a given YouTube Video
         :param video_id:
         :return:
         """
@@ -317,12 +387,16 @@ class DatasetUtils(object):
         video_details = self.groundtruth_videos_col.find_one({'id': video_id}, {'snippet': 1})
 
         # Read Video Tags if exist
-        video_tags = ''
-        if self.key_exists(video_details, 'snippet', 'tags'):
-            video_tags = ' '.join(video_details['snippet']['tags'])
+        return self.get_tags_text(video_details=video_details)
 
+    def preprocess_video_tags(self, video_id):
+        """
+        Method that retrieves and preprocesses the Video Tags of a given YouTube Video
+        :param video_id:
+        :return:
+        """
         # Preprocess the Video Tags before returning them
-        video_tags_preprocessed = self.preprocess_text(text=video_tags)
+        video_tags_preprocessed = self.preprocess_text(text=self.get_video_tags_text(video_id=video_id))
         return video_tags_preprocessed
 
     def get_video_tags_features(self):
@@ -330,137 +404,17 @@ class DatasetUtils(object):
         Method that return s the Video Tags features of all the Groundtruth videos
         :return:
         """
-        all_video_tags_features = list()
-        if not os.path.isfile(self.VIDEO_TAGS_FEATURES_FILENAME):
-            progress = tqdm(total=len(self.GROUNDTRUTH_VIDEOS))
-            for video_id in self.GROUNDTRUTH_VIDEOS:
-                all_video_tags_features.append(self.preprocess_video_tags(video_id=video_id))
-                progress.update(1)
-            progress.close()
-
-            # Save them to file
-            pickle.dump(all_video_tags_features, open(self.VIDEO_TAGS_FEATURES_FILENAME, mode='wb'))
-        else:
-            # Read saved features from file
-            all_video_tags_features = pickle.load(open(self.VIDEO_TAGS_FEATURES_FILENAME, mode='rb'))
-
-        return all_video_tags_features
-
-    def read_video_transcript(self, video_id):
-        """
-        Method that returns a list with all the captions of a given video read from a file
-        :param video_id: the ID of the video to get its comments
-        :return: a list of all the captions of the given video
-        """
-        video_transcript_parsed = list()
-        video_transcript_filename = '{}{}/{}.en.vtt'.format(self.VIDEO_TRANSCRIPT_BASE_DIR, video_id[:3], video_id)
-        if os.path.isfile(video_transcript_filename):
-            transcript_file = open(video_transcript_filename, mode='r')
-            video_captions_list = transcript_file.read().split('\n\n')
-            # Parse Video Transcript
-            for i in range(1, len(video_captions_list)):
-                caption_details = video_captions_list[i].split('\n')
-                if len(caption_details) > 1 and caption_details[1] != '':
-                    if len(video_transcript_parsed) == 0:
-                        video_transcript_parsed.append(caption_details[1])
-                    elif caption_details[1] != video_transcript_parsed[-1]:
-                        video_transcript_parsed.append(caption_details[1])
-            # Close the Video Transcript file
-            transcript_file.close()
-        return video_transcript_parsed
-
-    def preprocess_video_transcript(self, video_captions):
-        """
-        Method that reads the transcript file of a given video and outputs a list with all the
-        video's captions
-        :param video_captions: a list of the video captions
-        :return:
-        """
-        # Read Video Transcript file
-        video_transcript_processed = list()
-        if len(video_captions) > 0:
-            for caption in video_captions:
-                video_transcript_processed.append(self.preprocess_text(text=caption))
-            return ' '.join(video_transcript_processed).replace('\n', '')
-        return ''
+        return self.get_text_features(modality='video_tags',
+                                      read_texts=lambda video_ids: ([video_data['tags']] for video_data in self.iterate_groundtruth_videos_data(fields=('tags',), video_ids=video_ids)))
 
     def get_video_transcript_features(self):
         """
         Method that gets the Video Transcript features for all all_videos in our Ground Truth
         :return:
         """
-        all_video_transcript_features = list()
-        if not os.path.isfile(self.VIDEO_TRANSCRIPT_FEATURES_FILENAME):
-            progress = tqdm(total=len(self.GROUNDTRUTH_VIDEOS))
-            for video_id in self.GROUNDTRUTH_VIDEOS:
-                # Read Video Captions
-                video_transcript = self.groundtruth_videos_transcripts_col.find_one({'id': video_id})
-                # Preprocess Video Captions
-                all_video_transcript_features.append(self.preprocess_video_transcript(video_captions=video_transcript['captions']))
-                progress.update(1)
-            progress.close()
-
-            # Save them to file
-            pickle.dump(all_video_transcript_features, open(self.VIDEO_TRANSCRIPT_FEATURES_FILENAME, mode='wb'))
-        else:
-            # Read saved features from file
-            all_video_transcript_features = pickle.load(open(self.VIDEO_TRANSCRIPT_FEATURES_FILENAME, mode='rb'))
-        return all_video_transcript_features
-
-    def read_video_comments(self, video_id):
-        """
-        Method that returns a list with all the downloaded comments files of the given YouTube Video
-        :param video_id: the ID of the video to get its comments
-        :return: a list with the comments of the given video
-        """
-        # Initialiaze Variables
-        video_comments = list()
-        video_comments_filename = '{}/{}/{}.json'.format(self.VIDEO_COMMENTS_BASE_DIR, video_id, video_id)
-
-        # Read file if not empty
-        comment_thread_json_string = '{"all_comments":['
-        if os.path.isfile(video_comments_filename) and os.stat(video_comments_filename).st_size > 0:
-            with open(video_comments_filename, mode='r') as file:
-                comments_cntr = 0
-                while True:
-                    # Read next N comments (lines in file)
-                    next_n_comments = list(itertools.islice(file, 50000))
-                    # Check if it is the end of file
-                    if not next_n_comments:
-                        break
-
-                    for comment_line in next_n_comments:
-                        if comments_cntr == 0:
-                            comment_thread_json_string += comment_line
-                        else:
-                            comment_thread_json_string += "," + comment_line
-                        comments_cntr += 1
-
-                # Convert comments string to json
-                comment_thread_json_string += ']}'
-                comments_data = json.loads(comment_thread_json_string)
-
-                # Iterate each top level comment threat
-                for top_level_comment_threat in comments_data['all_comments']:
-                    comment_details = dict(top_level_comment_threat['snippet']['topLevelComment'])
-                    if self.key_exists(comment_details, 'snippet', 'textOriginal'):
-                        video_comments.append(comment_details['snippet']['textOriginal'])
-                    elif self.key_exists(comment_details, 'snippet', 'textDisplay'):
-                        video_comments.append(comment_details['snippet']['textDisplay'])
-        return video_comments
-
-    def preprocess_video_comments(self, video_comments):
-        """
-        Method that pre-process all the comments of a given Video. Basically, it removes
-        punctuation marks and lowercase all words
-        :param video_id:
-        :param video_comments:
-        :return:
-        """
-        preprocessed_video_comments = list()
-        for comment in video_comments:
-            preprocessed_video_comments.append(self.preprocess_text(text=comment))
-        return ' '.join(preprocessed_video_comments).replace('\n', '')
+        # Read and Preprocess Video Captions
+        return self.get_text_features(modality='video_transcript',
+                                      read_texts=lambda video_ids: (video_data['transcript'] for video_data in self.iterate_groundtruth_videos_data(fields=('transcript',), video_ids=video_ids)))
 
     def get_video_comments_features(self):
         """
@@ -473,34 +427,19 @@ class DatasetUtils(object):
         with comments being a list of all top 200 comments (as strings) seperated by commas ['comment', 'comment2', ...]
         with ids being the video_id
         """
-        all_video_comments_features = list()
-
-        # Get all list of comments for all videos we have from mongodb
-        comments = self.groundtruth_videos_comments_col.find({}, {'comments' : 1, 'id': 1})
-        comments = {comment['id']:comment['comments'] for comment in comments}
-
-        # Don't run the model if we have the comments weights already
-        if not os.path.isfile(self.VIDEO_COMMENTS_FEATURES_FILENAME):
-            # Progress bar
-            progress = tqdm(total=len(comments))
-
-            # Get all sets of comments
-            for video_id in self.GROUNDTRUTH_VIDEOS:
-                if video_id in comments:
-                    #Pre Process our Comments
-                    all_video_comments_features.append(self.preprocess_video_comments(video_comments=comments[video_id]))
-                else:
-                    all_video_comments_features.append("")
+        return self.get_text_features(modality='video_comments', read_texts=self.iterate_groundtruth_videos_comments)
 
-                progress.update(1)
-            progress.close()
-
-            # Save them to file
-            pickle.dump(all_video_comments_features, open(self.VIDEO_COMMENTS_FEATURES_FILENAME, mode='wb'))
-        else:
-             # Read saved features from file
-            all_video_comments_features = pickle.load(open(self.VIDEO_COMMENTS_FEATURES_FILENAME, mode='rb'))
-        return all_video_comments_features
+    def iterate_groundtruth_videos_comments(self, video_ids):
+        """
+        Method that streams the Video Comments of the given Ground-truth videos in batches
+        :param video_ids: the ids of the videos
+        :return: a generator with the list of comments of each video (an empty list for videos without comments)
+        """
+        for i in range(0, len(video_ids), Config.MONGO_BATCH_SIZE):
+            batch_video_ids = video_ids[i:i + Config.MONGO_BATCH_SIZE]
+            comments = {comment['id']: comment['comments'] for comment in self.groundtruth_videos_comments_col.find({'id': {'$in': batch_video_ids}}, {'comments' : 1, 'id': 1})}
+            for video_id in batch_video_ids:
+                yield comments.get(video_id, list())
 
     @staticmethod
     def split_train_test_sets_stratified(labels, test_size):
@@ -0,0 +1,119 @@
+#!/usr/bin/python
+
+import os
+import hashlib
+import numpy as np
+from dataset.config.DatasetConfig import Config
+
+
+class GroundtruthDatasetSnapshot(object):
+    """
+    Class that implements an aligned snapshot of the Ground-truth videos and their labels. The snapshot is built
+    with a single pass over the Ground-truth videos collection, sorted by _id so that the order of the videos is
+    guaranteed, and holds the following contiguous numpy arrays (all in the same order):
+        - VIDEO_IDS: the ids of the videos
+        - LABELS: the string labels of the videos ('irrelevant' videos are labeled as 'science')
+        - LABELS_CATEGORICAL: the integer labels of the videos ('irrelevant', 'unknown', and 'not_available' videos are 'science')
+        - LABELS_ONE_HOT: the one-hot encoded integer labels of the videos
+    The snapshot is cached in a .npz file along with a fingerprint of the ids and labels of the videos (a hash of
+    the projected pass), and it is rebuilt only when the fingerprint changes, e.g., when a video is relabelled.
+    """
+    def __init__(self, groundtruth_videos_col, classes, snapshot_filename=Config.GROUNDTRUTH_SNAPSHOT_FILENAME):
+        """
+        Constructor
+        :param groundtruth_videos_col: the MongoDB collection of the Ground-truth videos
+        :param classes: the list of the classes, e.g., ['science', 'pseudoscience']
+        :param snapshot_filename: the .npz file where the snapshot is cached
+        """
+        self.GROUNDTRUTH_VIDEOS_COL = groundtruth_videos_col
+        self.CLASSES = classes
+        self.SNAPSHOT_FILENAME = snapshot_filename
+
+        # Load the cached snapshot or build it if the ids or the labels of the videos have changed
+        groundtruth_videos = self.read_groundtruth_videos()
+        self.FINGERPRINT = self.get_fingerprint(groundtruth_videos=groundtruth_videos)
+        if not self.load():
+            self.build(groundtruth_videos=groundtruth_videos)
+            self.save()
+        return
+
+    def read_groundtruth_videos(self):
+        """
+        Method that reads the _id, the id, and the label of the Ground-truth videos with a single projected pass
+        :return: a list of (_id, video_id, label) tuples sorted by _id
+        """
+        return [(video['_id'], video['id'], video['annotation']['label']) for video in self.GROUNDTRUTH_VIDEOS_COL.find({}, {'_id': 1, 'id': 1, 'annotation.label': 1}).sort('_id', 1)]
+
+    @staticmethod
+    def get_fingerprint(groundtruth_videos):
+        """
+        Method that returns the fingerprint of the given Ground-truth videos, i.e., a hash of their ids and labels
+        :param groundtruth_videos: a list of (_id, video_id, label) tuples
+        :return: the fingerprint as a string
+        """
+        videos_hash = hashlib.sha1()
+        for _id, video_id, label in groundtruth_videos:
+            videos_hash.update('{0}\t{1}\t{2}\n'.format(_id, video_id, label).encode('utf-8'))
+        return 'count:{0}|labels:{1}'.format(len(groundtruth_videos), videos_hash.hexdigest())
+
+    def load(self):
+        """
+        Method that loads the cached snapshot if its fingerprint matches the fingerprint of the collection
+        :return: True if the snapshot has been loaded, False otherwise
+        """
+        if not os.path.isfile(self.SNAPSHOT_FILENAME):
+            return False
+        try:
+            with np.load(self.SNAPSHOT_FILENAME, allow_pickle=False) as snapshot:
+                if str(snapshot['fingerprint']) != self.FINGERPRINT:
+                    return False
+                self.VIDEO_IDS = snapshot['video_ids']
+                self.LABELS = snapshot['labels']
+                self.LABELS_CATEGORICAL = snapshot['labels_categorical']
+                self.LABELS_ONE_HOT = snapshot['labels_one_hot']
+        except (OSError, ValueError, KeyError):
+            return False
+        return True
+
+    def save(self):
+        """
+        Method that caches the snapshot to disk
+        :return:
+        """
+        temp_snapshot_filename = '{0}.tmp{1}'.format(self.SNAPSHOT_FILENAME, os.getpid())
+        with open(temp_snapshot_filename, mode='wb') as file:
+            np.savez(file,
+                     fingerprint=np.array(self.FINGERPRINT),
+                     video_ids=self.VIDEO_IDS,
+                     labels=self.LABELS,
+                     labels_categorical=self.LABELS_CATEGORICAL,
+                     labels_one_hot=self.LABELS_ONE_HOT)
+        os.replace(temp_snapshot_filename, self.SNAPSHOT_FILENAME)
+        return
+
+    def build(self, groundtruth_videos):
+        """
+        Method that builds the snapshot from the projected pass over the Ground-truth videos collection
+        :param groundtruth_videos: a list of (_id, video_id, label) tuples sorted by _id
+        :return:
+        """
+        video_ids, labels, labels_categorical = list(), list(), list()
+        for _, video_id, label in groundtruth_videos:
+            video_ids.append(video_id)
+            labels.append('science' if label == 'irrelevant' else label)
+            labels_categorical.append(self.CLASSES.index('science' if label in ('irrelevant', 'not_available', 'unknown') else label))
+
+        self.VIDEO_IDS = np.array(video_ids, dtype=str)
+        self.LABELS = np.array(labels, dtype=str)
+        self.LABELS_CATEGORICAL = np.array(labels_categorical, dtype=np.int64)
+        self.LABELS_ONE_HOT = np.eye(len(self.CLASSES), dtype=np.float32)[self.LABELS_CATEGORICAL]
+        return
+
+    def print_labels_summary(self):
+        """
+        Method that prints the number of Science and Pseudoscience videos of the snapshot
+        :return:
+        """
+        pseudoscience_videos = int((self.LABELS_CATEGORICAL == self.CLASSES.index('pseudoscience')).sum())
+        print('\n\n--- [GROUND TRUTH VIDEOS] SCIENCE: {} | PSEUDOSCIENCE: {}'.format(len(self.LABELS_CATEGORICAL) - pseudoscience_videos, pseudoscience_videos))
+        return
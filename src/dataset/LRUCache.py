@@ -0,0 +1,86 @@
+#!/usr/bin/python
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    Class that implements a bounded in-memory cache that evicts the Least Recently Used entries
+    and keeps track of its hits and misses
+    """
+    def __init__(self, max_size):
+        """
+        Constructor
+        :param max_size: the maximum number of entries in the cache (0 disables the cache)
+        """
+        self.MAX_SIZE = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        return
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Method that returns the cached value of the given key and marks it as the most recently used
+        :param key: the key to look up
+        :return: the cached value or None if the key is not cached
+        """
+        with self.lock:
+            try:
+                value = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Method that caches the given value and evicts the least recently used entries if the cache is full
+        :param key: the key of the value
+        :param value: the value to cache
+        :return:
+        """
+        if self.MAX_SIZE <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.MAX_SIZE:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return
+
+    def clear(self):
+        """
+        Method that removes all the cached entries and resets the counters
+        :return:
+        """
+        with self.lock:
+            self.entries.clear()
+            self.hits, self.misses, self.evictions = 0, 0, 0
+        return
+
+    def get_stats(self):
+        """
+        Method that returns the size and the hit/miss counters of the cache
+        :return: a dict with the cache statistics
+        """
+        total_requests = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'max_size': self.MAX_SIZE,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / total_requests if total_requests > 0 else 0.0,
+        }
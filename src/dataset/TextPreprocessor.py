@@ -0,0 +1,159 @@
+#!/usr/bin/python
+
+import re
+import string
+import hashlib
+import unicodedata
+
+import contractions
+from bs4 import BeautifulSoup
+from nltk.tokenize import word_tokenize
+import nltk
+stop_words = set(nltk.corpus.stopwords.words('english'))
+stop_words.remove('no')
+stop_words.remove('not')
+from nltk.stem import WordNetLemmatizer
+lematizer = WordNetLemmatizer()
+from dataset.LRUCache import LRUCache
+from dataset.config.DatasetConfig import Config
+
+# Token => Lemma cache shared by all Text Preprocessors of the current process
+lemma_cache = LRUCache(max_size=Config.LEMMA_CACHE_SIZE)
+
+
+def lemmatize(word):
+    """
+    Function that returns the (cached) WordNet lemma of the given word
+    :param word: a token
+    :return: the lemma of the token
+    """
+    lemma = lemma_cache.get(word)
+    if lemma is None:
+        lemma = lematizer.lemmatize(word)
+        lemma_cache.put(word, lemma)
+    return lemma
+
+
+class TextPreprocessor(object):
+    """
+    Class that implements a single-pass version of the text preprocessing that we perform before
+    generating the fastText embeddings. All regular expressions are compiled once, HTML parsing is
+    skipped for text without any markup, and NLTK tokenization is skipped for text that contains only
+    lowercase letters and whitespace. The output is token-for-token identical to the original
+    DatasetUtils.preprocess_text() pipeline.
+
+    Lemmas and preprocessed texts are memoized in bounded LRU caches, since comments and tags
+    are very repetitive across videos.
+    """
+    # Version of the preprocessing output (bump it whenever the output changes, so that cached features are rebuilt)
+    VERSION = '1'
+
+    # Multiple spaces and newlines (the second pattern also matches '|' as in the original pipeline)
+    MULTIPLE_SPACES_PATTERN = re.compile(r'\s+', flags=re.I)
+    NEWLINES_PATTERN = re.compile(r'[\r|\n|\r\n]+')
+
+    # URLs
+    URL_PATTERNS = [re.compile('https?://[A-Za-z0-9./]+'), re.compile(r"http\S+")]
+
+    # Special characters and digits (A-z intentionally includes [\]^_` as in the original pipeline)
+    SPECIAL_CHARACTERS_PATTERN = re.compile(r'[^a-zA-z\s]')
+
+    # Text that has no HTML tags or entities and does not need to be parsed
+    HTML_MARKUP_CHARACTERS = ('<', '&')
+
+    # Text that NLTK's word_tokenize() splits only on whitespace and on the contractions below
+    SIMPLE_TEXT_PATTERN = re.compile(r'[a-z \t\n\r\f\v]*')
+    # Contractions that NLTK's word_tokenize() splits even without apostrophes (e.g., cannot => can not)
+    CONTRACTIONS_PATTERNS = [
+        re.compile(r"(?i)\b(can)(?#X)(not)\b"),
+        re.compile(r"(?i)\b(gim)(?#X)(me)\b"),
+        re.compile(r"(?i)\b(gon)(?#X)(na)\b"),
+        re.compile(r"(?i)\b(got)(?#X)(ta)\b"),
+        re.compile(r"(?i)\b(lem)(?#X)(me)\b"),
+        re.compile(r"(?i)\b(wan)(?#X)(na)\s"),
+    ]
+
+    # Punctuation removal table
+    PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+    # Discard terms with less than min_chars
+    MIN_CHARS = 3
+
+    def __init__(self, text_cache_size=Config.TEXT_CACHE_SIZE):
+        """
+        Constructor
+        :param text_cache_size: the maximum number of preprocessed texts to cache
+        """
+        # Raw text hash => Preprocessed text cache
+        self.TEXT_CACHE = LRUCache(max_size=text_cache_size)
+        return
+
+    def get_cache_stats(self):
+        """
+        Method that returns the hit/miss counters of the lemma and the preprocessed text caches
+        :return: a dict with the statistics of each cache
+        """
+        return {'lemma': lemma_cache.get_stats(), 'text': self.TEXT_CACHE.get_stats()}
+
+    def strip_html_tags(self, text):
+        """ Remove HTML tags from text, only if the text contains any markup """
+        if any(character in text for character in self.HTML_MARKUP_CHARACTERS):
+            text = BeautifulSoup(text, "html.parser").get_text()
+        return text
+
+    def tokenize(self, text):
+        """ Tokenize the given text exactly as NLTK's word_tokenize() """
+        if self.SIMPLE_TEXT_PATTERN.fullmatch(text) is None:
+            return word_tokenize(text=text)
+
+        # Split contractions the same way as NLTK's Treebank tokenizer
+        text = ' {} '.format(text)
+        for pattern in self.CONTRACTIONS_PATTERNS:
+            text = pattern.sub(r' \1 \2 ', text)
+        return text.split()
+
+    def preprocess_text(self, text):
+        """Method that preprocess text for the FastText classifier"""
+        # Return the cached result if we have already preprocessed the same text
+        text_hash = hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+        preprocessed_text = self.TEXT_CACHE.get(text_hash)
+        if preprocessed_text is not None:
+            return preprocessed_text
+
+        # Substituting multiple spaces with single space and remove extra newlines
+        text = self.NEWLINES_PATTERN.sub(' ', self.MULTIPLE_SPACES_PATTERN.sub(' ', text))
+
+        # Strip HTML Tags
+        text = self.strip_html_tags(text=text)
+
+        # Remove URLs
+        for pattern in self.URL_PATTERNS:
+            text = pattern.sub('', text)
+
+        # Remove all special characters and digits
+        text = self.SPECIAL_CHARACTERS_PATTERN.sub('', text)
+
+        # Remove accented characters (non-ascii)
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8', 'ignore')
+
+        # Replace Contractions (don't => do not)
+        text = contractions.fix(text)
+
+        # Remove Panctuations and Lowercase
+        text = text.translate(self.PUNCTUATION_TABLE).strip().lower()
+
+        # Lemmatize, remove stop words, and discard short terms in a single pass
+        tokens = [lemmatize(word) for word in self.tokenize(text=text)]
+        preprocessed_text = ' '.join([token for token in tokens if token not in stop_words and len(token) >= self.MIN_CHARS])
+
+        # Cache the preprocessed text
+        self.TEXT_CACHE.put(text_hash, preprocessed_text)
+        return preprocessed_text
+
+    def preprocess_texts(self, texts):
+        """
+        Method that preprocesses each one of the given texts and merges them into a single text
+        :param texts: a list of texts (e.g., the captions or the comments of a video)
+        :return: the merged preprocessed text
+        """
+        return ' '.join([self.preprocess_text(text=text) for text in texts]).replace('\n', '')
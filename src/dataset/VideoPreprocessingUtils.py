@@ -0,0 +1,222 @@
+#!/usr/bin/python
+
+import json
+import os
+import re
+import unicodedata
+import contextlib
+
+import contractions
+from bs4 import BeautifulSoup
+from dataset.TextPreprocessor import TextPreprocessor, stop_words, lemmatize
+from dataset.WebVTTParser import WebVTTParser
+from youtubehelpers.PackedCorpusStore import PackedCorpusStore
+from youtubehelpers.config.YouTubeAPIConfig import Config as YouTubeAPIConfig
+from dataset.config.DatasetConfig import Config
+
+
+class VideoPreprocessingUtils(object):
+    """
+    Class that contains the methods that read and preprocess the metadata of a single video (text, transcript,
+    and comments). It does not connect to MongoDB and does not depend on the Ground-truth dataset, hence it can
+    be used during inference on nodes that do not run MongoDB
+    """
+    def __init__(self):
+        # Video Metadata Base Directories
+        self.VIDEO_TRANSCRIPT_BASE_DIR = '/videosdata/transcript'
+        self.VIDEO_COMMENTS_BASE_DIR = '/videosdata/comments'
+
+        # Packed Corpus Stores of the downloaded comments and transcripts (videos that are not in the stores are read from the per-video files)
+        self.COMMENTS_STORE, self.TRANSCRIPTS_STORE = None, None
+        if YouTubeAPIConfig.PACKED_STORE_ENABLED:
+            self.COMMENTS_STORE = PackedCorpusStore(corpus_dir=self.VIDEO_COMMENTS_BASE_DIR)
+            self.TRANSCRIPTS_STORE = PackedCorpusStore(corpus_dir=self.VIDEO_TRANSCRIPT_BASE_DIR)
+
+        # Text Preprocessor
+        self.TEXT_PREPROCESSOR = TextPreprocessor()
+
+        # Streaming WebVTT transcripts parser
+        self.TRANSCRIPT_PARSER = WebVTTParser()
+        return
+
+    @staticmethod
+    def key_exists(element, *keys):
+        """
+        Check if *keys (nested) exists in `element` (dict).
+        :param keys:
+        :return: True if key exists, False if not
+        """
+        if type(element) is not dict:
+            raise AttributeError('keys_exists() expects dict as first argument.')
+        if len(keys) == 0:
+            raise AttributeError('keys_exists() expects at least two arguments, one given.')
+
+        _element = element
+        for key in keys:
+            try:
+                _element = _element[key]
+            except KeyError:
+                return False
+        return True
+
+    @staticmethod
+    def strip_html_tags(text):
+        """ Remove HTML tags from text """
+        soup = BeautifulSoup(text, "html.parser")
+        stripped_text = soup.get_text()
+        return stripped_text
+
+    @staticmethod
+    def remove_URL_linking(text):
+        """ Remove URLs from a text """
+        text = re.sub('https?://[A-Za-z0-9./]+', '', text)
+        text = re.sub(r"http\S+", "", text)
+        return text
+
+    @staticmethod
+    def remove_accented_characters(text):
+        """ Remove accented and non-ascii characters. For example convert é to e. """
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8', 'ignore')
+        return text
+
+    @staticmethod
+    def replace_contractions(text):
+        """Replace contractions in string of text"""
+        return contractions.fix(text)
+
+    @staticmethod
+    def remove_special_characters(text, remove_digits=False):
+        """Remove special characters from text"""
+        pattern = r'[^a-zA-z0-9\s]' if not remove_digits else r'[^a-zA-z\s]'
+        text = re.sub(pattern, '', text)
+        return text
+
+    @staticmethod
+    def remove_stopwords(tokens):
+        """Remove stopwords from text (such as 'a', 'an', etc.)"""
+        filtered_tokens = [token for token in tokens if token not in stop_words]
+        return filtered_tokens
+
+    @staticmethod
+    def remove_multiple_spaces_newlines(text):
+        # Substituting multiple spaces with single space
+        text = re.sub(r'\s+', ' ', text, flags=re.I)
+        # remove extra newlines
+        text = re.sub(r'[\r|\n|\r\n]+', ' ', text)
+        return text
+
+    @staticmethod
+    def lematize_tokens(tokens):
+        """Lematize all words in the given list of words"""
+        tokens = [lemmatize(word) for word in tokens]
+        return tokens
+
+    def preprocess_text(self, text):
+        """
+        Method that preprocess text for the FastText classifier. It removes HTML tags, URLs, special characters,
+        accents, contractions, punctuation, stop words, and short terms, and lemmatizes the remaining tokens.
+        See TextPreprocessor for the single-pass implementation of the above steps
+        """
+        return self.TEXT_PREPROCESSOR.preprocess_text(text=text)
+
+    def get_preprocessing_cache_stats(self):
+        """
+        Method that returns the hit/miss counters of the preprocessing caches of the current process
+        :return: a dict with the statistics of the lemma and the preprocessed text caches
+        """
+        return self.TEXT_PREPROCESSOR.get_cache_stats()
+
+    def print_preprocessing_cache_stats(self):
+        """
+        Method that prints the hit/miss counters of the preprocessing caches of the current process
+        :return:
+        """
+        for cache_name, cache_stats in self.get_preprocessing_cache_stats().items():
+            print('--- [{} CACHE] SIZE: {} | HITS: {} | MISSES: {} | HIT RATE: {:.3f}'.format(cache_name.upper(), cache_stats['size'], cache_stats['hits'], cache_stats['misses'], cache_stats['hit_rate']))
+        return
+
+    def read_video_transcript(self, video_id):
+        """
+        Method that returns a list with all the captions of a given video read from a file. The transcript is
+        parsed line by line, and the rolling captions of YouTube auto-generated transcripts are deduplicated
+        :param video_id: the ID of the video to get its comments
+        :return: a list of all the captions of the given video
+        """
+        if self.TRANSCRIPTS_STORE is not None and self.TRANSCRIPTS_STORE.contains(video_id=video_id):
+            return list(self.TRANSCRIPT_PARSER.iterate_captions(lines=self.TRANSCRIPTS_STORE.iterate_lines(video_id=video_id)))
+        video_transcript_filename = '{}{}/{}.en.vtt'.format(self.VIDEO_TRANSCRIPT_BASE_DIR, video_id[:3], video_id)
+        if not os.path.isfile(video_transcript_filename):
+            return list()
+        return list(self.TRANSCRIPT_PARSER.parse_file(filename=video_transcript_filename))
+
+    def preprocess_video_transcript(self, video_captions):
+        """
+        Method that reads the transcript file of a given video and outputs a list with all the
+        video's captions
+        :param video_captions: a list of the video captions
+        :return:
+        """
+        return self.TEXT_PREPROCESSOR.preprocess_texts(texts=video_captions)
+
+    def iterate_video_comments(self, video_id, max_comments=Config.MAX_VIDEO_COMMENTS):
+        """
+        Method that streams the comments of the given YouTube Video from its downloaded comments file (JSONL, one
+        comment thread per line). Each line is parsed separately, hence memory stays flat regardless of the number
+        of downloaded comments, and reading stops as soon as the requested number of comments has been read
+        :param video_id: the ID of the video to get its comments
+        :param max_comments: the maximum number of (top-level) comments to read or None to read all of them
+        :return: a generator of the text of each comment
+        """
+        if max_comments == 0:
+            return
+        if self.COMMENTS_STORE is not None and self.COMMENTS_STORE.contains(video_id=video_id):
+            comment_lines = self.COMMENTS_STORE.iterate_lines(video_id=video_id)
+        else:
+            video_comments_filename = '{}/{}/{}.json'.format(self.VIDEO_COMMENTS_BASE_DIR, video_id, video_id)
+            if not os.path.isfile(video_comments_filename):
+                return
+            comment_lines = open(video_comments_filename, mode='r')
+
+        comments_cntr = 0
+        with contextlib.closing(comment_lines):
+            for comment_line in comment_lines:
+                if not comment_line.strip():
+                    continue
+                try:
+                    top_level_comment_threat = json.loads(comment_line)
+                except ValueError:
+                    # Skip partially written lines (e.g., interrupted download)
+                    continue
+
+                # Get the text of the top level comment of the thread
+                comment_details = top_level_comment_threat['snippet']['topLevelComment']
+                if self.key_exists(comment_details, 'snippet', 'textOriginal'):
+                    yield comment_details['snippet']['textOriginal']
+                elif self.key_exists(comment_details, 'snippet', 'textDisplay'):
+                    yield comment_details['snippet']['textDisplay']
+                else:
+                    continue
+
+                comments_cntr += 1
+                if max_comments is not None and comments_cntr >= max_comments:
+                    break
+        return
+
+    def read_video_comments(self, video_id, max_comments=Config.MAX_VIDEO_COMMENTS):
+        """
+        Method that returns a list with all the downloaded comments files of the given YouTube Video
+        :param video_id: the ID of the video to get its comments
+        :param max_comments: the maximum number of (top-level) comments to read or None to read all of them
+        :return: a list with the comments of the given video
+        """
+        return list(self.iterate_video_comments(video_id=video_id, max_comments=max_comments))
+
+    def preprocess_video_comments(self, video_comments):
+        """
+        Method that pre-process all the comments of a given Video. Basically, it removes
+        punctuation marks and lowercase all words
+        :param video_id:
+        :param video_comments:
+        :return:
+        """
+        return self.TEXT_PREPROCESSOR.preprocess_texts(texts=video_comments)
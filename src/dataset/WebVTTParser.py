@@ -0,0 +1,101 @@
+#!/usr/bin/python
+
+import re
+import html
+from dataset.config.DatasetConfig import Config
+
+
+class WebVTTParser(object):
+    """
+    Class that implements a streaming parser of WebVTT (.vtt) transcripts. It reads one line at a time, skips the
+    header, NOTE/STYLE/REGION blocks, cue identifiers, and timing lines, strips the inline timestamp and styling
+    tags (e.g., <00:00:01.500><c> word</c>), and unescapes HTML entities.
+
+    YouTube auto-generated captions are rolling: each cue repeats the previous line before the new words, and
+    short "hold" cues repeat the whole text again. Hence, each caption line is compared with the last emitted
+    words and only the words that do not overlap with them are returned.
+    """
+    # Tags and inline timestamps of the cue text
+    TAGS_PATTERN = re.compile(r'<[^>]*>')
+    # Blocks that do not contain any captions
+    NON_CUE_BLOCKS = ('NOTE', 'STYLE', 'REGION')
+
+    def __init__(self, dedup_window=Config.TRANSCRIPT_DEDUP_WINDOW):
+        """
+        Constructor
+        :param dedup_window: the number of last emitted words that each new caption line is compared with
+        """
+        self.DEDUP_WINDOW = dedup_window
+        return
+
+    def clean_caption_line(self, line):
+        """
+        Method that strips the tags and the inline timestamps of a caption line and unescapes its HTML entities
+        :param line: a line of the cue text
+        :return: the plain text of the line
+        """
+        if '<' in line:
+            line = self.TAGS_PATTERN.sub('', line)
+        if '&' in line:
+            line = html.unescape(line)
+        return line
+
+    @staticmethod
+    def get_overlap(previous_words, words):
+        """
+        Method that returns the length of the longest suffix of the previous words that is a prefix of the given words.
+        Overlaps of a single word are ignored, unless the line consists of a single word, to preserve real repetitions
+        :param previous_words: the last emitted words
+        :param words: the words of the new caption line
+        :return: the number of leading words of the new line that have already been emitted
+        """
+        for overlap in range(min(len(previous_words), len(words)), 0, -1):
+            if (overlap > 1 or len(words) == 1) and previous_words[-overlap:] == words[:overlap]:
+                return overlap
+        return 0
+
+    def iterate_captions(self, lines):
+        """
+        Method that parses the given WebVTT lines and yields the deduplicated caption text
+        :param lines: an iterable of the lines of a WebVTT file (e.g., an opened file)
+        :return: a generator of caption texts
+        """
+        in_header, skip_block, in_cue_text = True, False, False
+        previous_words = list()
+        for line in lines:
+            # An empty line ends the current block (whitespace-only lines are part of the cue text)
+            if not line.rstrip('\r\n'):
+                in_header, skip_block, in_cue_text = False, False, False
+                continue
+            if in_header or skip_block:
+                continue
+            line = line.strip()
+            if not in_cue_text:
+                if '-->' in line:
+                    # Timing line: the cue text follows
+                    in_cue_text = True
+                elif line.startswith(self.NON_CUE_BLOCKS):
+                    skip_block = True
+                # Otherwise it is a cue identifier
+                continue
+
+            # Cue text: emit only the words that are not repeated from the previous captions
+            words = self.clean_caption_line(line=line).split()
+            if len(words) == 0:
+                continue
+            new_words = words[self.get_overlap(previous_words=previous_words, words=words):]
+            if len(new_words) > 0:
+                previous_words = (previous_words + new_words)[-self.DEDUP_WINDOW:]
+                yield ' '.join(new_words)
+        return
+
+    def parse_file(self, filename):
+        """
+        Method that streams the deduplicated captions of the given WebVTT file
+        :param filename: the .vtt file
+        :return: a generator of caption texts
+        """
+        with open(filename, mode='r', encoding='utf-8') as file:
+            for caption in self.iterate_captions(lines=file):
+                yield caption
+        return
@@ -0,0 +1,29 @@
+#!/usr/bin/python
+import multiprocessing
+
+class Config(object):
+    """
+    Static class that contains the configuration of the processing and preprocessing of our dataset
+    """
+    # MongoDB Config
+    MONGO_BATCH_SIZE = 1000  # number of videos read with a single batched ($in) query
+
+    # Ground-truth Dataset Snapshot (ids and labels) cache
+    GROUNDTRUTH_SNAPSHOT_FILENAME = 'src/dataset/data/groundtruth_snapshot.npz'
+
+    # Collection fingerprints of the cached artifacts (True to hash each collection with dbHash, which scans it and locks the database)
+    EXACT_COLLECTION_FINGERPRINTS = False
+
+    # Video Comments Config
+    MAX_VIDEO_COMMENTS = None  # read only the top N comments (in the order they were downloaded) of each video (None to read all)
+
+    # Video Transcripts Config
+    TRANSCRIPT_DEDUP_WINDOW = 64  # number of last caption words that each new caption line is compared with (rolling captions)
+
+    # Preprocessing Pool Config
+    PREPROCESSING_PROCESSES = max(multiprocessing.cpu_count() - 1, 1)  # set to 1 to preprocess all videos in the current process
+    PREPROCESSING_CHUNK_SIZE = 64  # number of videos sent to a worker process at a time
+
+    # Preprocessing Caches Config
+    LEMMA_CACHE_SIZE = 200000  # token => lemma entries (0 to disable)
+    TEXT_CACHE_SIZE = 100000  # raw text hash => preprocessed text entries (0 to disable)
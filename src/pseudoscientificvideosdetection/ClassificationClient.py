@@ -0,0 +1,76 @@
+#!/usr/bin/python
+
+import json
+import urllib.error
+import urllib.request
+from pseudoscientificvideosdetection.config.PseudoscienceClassifierConfig import Config
+
+
+class ClassificationClient(object):
+    """
+    Class that implements a client of the local ClassificationServer. It exposes the same classify() and
+    classify_batch() methods as PseudoscienceClassifier, hence it can be used in its place by scripts that
+    share a single warm model instead of loading their own
+    """
+    def __init__(self, host=Config.SERVER_HOST, port=Config.SERVER_PORT, timeout=Config.SERVER_CLIENT_TIMEOUT):
+        """
+        Constructor
+        :param host: the host of the Classification Server
+        :param port: the port of the Classification Server
+        :param timeout: the timeout (in seconds) of each request
+        """
+        self.SERVER_URL = 'http://{0}:{1}'.format(host, port)
+        self.TIMEOUT = timeout
+        return
+
+    def send_request(self, path, request_body=None):
+        """
+        Method that sends an HTTP request to the Classification Server
+        :param path: the endpoint of the request
+        :param request_body: the JSON body of a POST request or None for a GET request
+        :return: the JSON response
+        """
+        data = None
+        if request_body is not None:
+            # Video details read from MongoDB include non-JSON values (e.g., ObjectId)
+            data = json.dumps(request_body, default=str).encode('utf-8')
+        request = urllib.request.Request('{0}{1}'.format(self.SERVER_URL, path), data=data, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.TIMEOUT) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError('Classification Server error ({0}): {1}'.format(e.code, e.read().decode('utf-8', 'ignore')))
+
+    def is_available(self):
+        """
+        Method that checks whether the Classification Server is running
+        :return: True if the Classification Server is healthy, False otherwise
+        """
+        try:
+            return self.send_request(path='/health').get('status') == 'ok'
+        except (OSError, ValueError, RuntimeError):
+            return False
+
+    def get_stats(self):
+        """
+        Method that returns the statistics of the Classification Server
+        :return: a dict with the statistics
+        """
+        return self.send_request(path='/stats')
+
+    def classify_batch(self, videos_details):
+        """
+        Method that classifies a batch of YouTube Videos as Science or Pseudoscience
+        :param videos_details: a list with the information of each YouTube Video
+        :return: a list of (predicted_class, confidence_score) tuples in the same order as the given Videos
+        """
+        response = self.send_request(path='/classify', request_body={'videos': videos_details})
+        return [(prediction['prediction'], prediction['confidence_score']) for prediction in response['predictions']]
+
+    def classify(self, video_details):
+        """
+        Method that classifies a given YouTube Video as Science or Pseudoscience
+        :param video_details: the information of the YouTube Video
+        :return: the predicted class and its confidence score
+        """
+        return self.classify_batch(videos_details=[video_details])[0]
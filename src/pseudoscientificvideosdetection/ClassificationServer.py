@@ -0,0 +1,236 @@
+#!/usr/bin/python
+
+import json
+import time
+import queue
+import threading
+import collections
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pseudoscientificvideosdetection.config.PseudoscienceClassifierConfig import Config
+
+
+class ClassificationRequest(object):
+    """
+    Class that holds a pending classification request until its micro-batch has been classified
+    """
+    def __init__(self, videos_details):
+        """
+        Constructor
+        :param videos_details: a list with the information of each YouTube Video of the request
+        """
+        self.VIDEOS_DETAILS = videos_details
+        self.RECEIVED_AT = time.time()
+        self.DONE = threading.Event()
+        self.predictions = None
+        self.error = None
+        return
+
+
+class ClassificationServer(object):
+    """
+    Class that implements a long-running local HTTP service that keeps a warm PseudoscienceClassifier in memory.
+    Concurrent classification requests are coalesced into micro-batches of up to SERVER_MAX_BATCH_SIZE Videos
+    (waiting at most SERVER_MAX_WAIT seconds for a micro-batch to fill up), each classified with a single call
+    to PseudoscienceClassifier.classify_batch(). Endpoints:
+        - GET /health: the status of the service
+        - GET /stats: request, batch, latency, and throughput statistics
+        - POST /classify: {"videos": [<video_details>, ...]} => {"predictions": [{"prediction": ..., "confidence_score": ...}, ...]}
+    """
+    # Number of recent requests used to calculate latency percentiles
+    LATENCY_WINDOW = 1000
+
+    def __init__(self, model, host=Config.SERVER_HOST, port=Config.SERVER_PORT, max_batch_size=Config.SERVER_MAX_BATCH_SIZE, max_wait=Config.SERVER_MAX_WAIT):
+        """
+        Constructor
+        :param model: a PseudoscienceClassifier object
+        :param host: the host that the service listens to
+        :param port: the port that the service listens to
+        :param max_batch_size: the maximum number of Videos classified with a single forward pass
+        :param max_wait: the maximum time (in seconds) to wait for a micro-batch to fill up
+        """
+        self.MODEL = model
+        self.HOST = host
+        self.PORT = port
+        self.MAX_BATCH_SIZE = max_batch_size
+        self.MAX_WAIT = max_wait
+
+        # Pending requests
+        self.REQUESTS_QUEUE = queue.Queue()
+
+        # Statistics
+        self.STATS_LOCK = threading.Lock()
+        self.STARTED_AT = time.time()
+        self.total_requests = 0
+        self.total_failed_requests = 0
+        self.total_videos = 0
+        self.total_batches = 0
+        self.latencies = collections.deque(maxlen=self.LATENCY_WINDOW)
+
+        # HTTP Server
+        self.HTTP_SERVER = ThreadingHTTPServer((self.HOST, self.PORT), self.get_request_handler_class())
+        self.HTTP_SERVER.daemon_threads = True
+        self.BATCHING_THREAD = threading.Thread(target=self.run_batching_loop, daemon=True)
+        return
+
+    def get_request_handler_class(self):
+        """
+        Method that returns the HTTP request handler class of the service
+        :return: a BaseHTTPRequestHandler subclass bound to this server
+        """
+        server = self
+
+        class ClassificationRequestHandler(BaseHTTPRequestHandler):
+            def send_json(self, status, response):
+                response_body = json.dumps(response).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(response_body)))
+                self.end_headers()
+                self.wfile.write(response_body)
+                return
+
+            def do_GET(self):
+                if self.path == '/health':
+                    self.send_json(200, {'status': 'ok'})
+                elif self.path == '/stats':
+                    self.send_json(200, server.get_stats())
+                else:
+                    self.send_json(404, {'error': 'Not found'})
+                return
+
+            def do_POST(self):
+                if self.path != '/classify':
+                    self.send_json(404, {'error': 'Not found'})
+                    return
+                try:
+                    request_body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                    videos_details = request_body['videos']
+                    if not isinstance(videos_details, list):
+                        raise ValueError('videos must be a list')
+                except (ValueError, KeyError, TypeError) as e:
+                    self.send_json(400, {'error': 'Invalid request: {0}'.format(e)})
+                    return
+
+                try:
+                    predictions = server.classify_batch(videos_details=videos_details)
+                except Exception as e:
+                    self.send_json(500, {'error': str(e)})
+                    return
+                self.send_json(200, {'predictions': [{'prediction': prediction, 'confidence_score': confidence_score} for prediction, confidence_score in predictions]})
+                return
+
+            def log_message(self, format, *args):
+                # Do not log each request
+                return
+
+        return ClassificationRequestHandler
+
+    def classify_batch(self, videos_details):
+        """
+        Method that submits a classification request and waits until its micro-batch has been classified
+        :param videos_details: a list with the information of each YouTube Video
+        :return: a list of (predicted_class, confidence_score) tuples in the same order as the given Videos
+        """
+        request = ClassificationRequest(videos_details=videos_details)
+        self.REQUESTS_QUEUE.put(request)
+        request.DONE.wait()
+        if request.error is not None:
+            raise request.error
+        return request.predictions
+
+    def run_batching_loop(self):
+        """
+        Method that coalesces the pending requests into micro-batches and classifies them
+        :return:
+        """
+        while True:
+            # Wait for the first request of the micro-batch
+            batch = [self.REQUESTS_QUEUE.get()]
+            total_batch_videos = len(batch[0].VIDEOS_DETAILS)
+
+            # Fill up the micro-batch
+            deadline = time.time() + self.MAX_WAIT
+            while total_batch_videos < self.MAX_BATCH_SIZE:
+                try:
+                    request = self.REQUESTS_QUEUE.get(timeout=max(deadline - time.time(), 0))
+                except queue.Empty:
+                    break
+                batch.append(request)
+                total_batch_videos += len(request.VIDEOS_DETAILS)
+            self.classify_requests(requests=batch)
+
+    def classify_requests(self, requests):
+        """
+        Method that classifies the Videos of the given requests with a single forward pass and notifies each request
+        :param requests: a list of ClassificationRequest objects
+        :return:
+        """
+        try:
+            predictions = self.MODEL.classify_batch(videos_details=[video_details for request in requests for video_details in request.VIDEOS_DETAILS])
+            predictions = [(prediction, float(confidence_score)) for prediction, confidence_score in predictions]
+            offset = 0
+            for request in requests:
+                request.predictions = predictions[offset:offset + len(request.VIDEOS_DETAILS)]
+                offset += len(request.VIDEOS_DETAILS)
+        except Exception as e:
+            # Classify each request separately so that a single invalid Video does not fail the whole micro-batch
+            if len(requests) > 1:
+                for request in requests:
+                    self.classify_requests(requests=[request])
+                return
+            requests[0].error = e
+
+        # Update statistics and notify the waiting requests
+        finished_at = time.time()
+        with self.STATS_LOCK:
+            self.total_batches += 1
+            for request in requests:
+                self.total_requests += 1
+                self.total_failed_requests += int(request.error is not None)
+                self.total_videos += len(request.VIDEOS_DETAILS) if request.error is None else 0
+                self.latencies.append(finished_at - request.RECEIVED_AT)
+        for request in requests:
+            request.DONE.set()
+        return
+
+    def get_stats(self):
+        """
+        Method that returns the request, batch, latency, and throughput statistics of the service
+        :return: a dict with the statistics
+        """
+        with self.STATS_LOCK:
+            uptime = time.time() - self.STARTED_AT
+            latencies = np.array(self.latencies) if len(self.latencies) > 0 else np.zeros(1)
+            return {
+                'uptime': uptime,
+                'requests': self.total_requests,
+                'failed_requests': self.total_failed_requests,
+                'videos': self.total_videos,
+                'batches': self.total_batches,
+                'pending_requests': self.REQUESTS_QUEUE.qsize(),
+                'avg_batch_size': self.total_videos / self.total_batches if self.total_batches > 0 else 0.0,
+                'throughput': self.total_videos / uptime if uptime > 0 else 0.0,
+                'latency': {
+                    'mean': float(latencies.mean()),
+                    'p50': float(np.percentile(latencies, 50)),
+                    'p95': float(np.percentile(latencies, 95)),
+                    'p99': float(np.percentile(latencies, 99)),
+                },
+                'embedding_cache': self.MODEL.get_embedding_cache_stats(),
+            }
+
+    def serve_forever(self):
+        """
+        Method that starts the batching thread and serves requests until the process is interrupted
+        :return:
+        """
+        self.BATCHING_THREAD.start()
+        print('[INFO] Classification Server listening on http://{0}:{1}'.format(self.HOST, self.PORT))
+        try:
+            self.HTTP_SERVER.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.HTTP_SERVER.server_close()
+        return
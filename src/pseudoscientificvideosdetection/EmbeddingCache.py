@@ -0,0 +1,244 @@
+#!/usr/bin/python
+
+import os
+import glob
+import json
+import fcntl
+import hashlib
+import numpy as np
+from pseudoscientificvideosdetection.config.PseudoscienceClassifierConfig import Config
+
+
+class EmbeddingCache(object):
+    """
+    Class that implements a persistent, content-addressed cache of the fastText sentence embeddings
+    of a single input modality (e.g., video_snippet). Each embedding is keyed by the modality, the
+    checksum of the fastText model that generated it, and the hash of the preprocessed text.
+
+    The embeddings of a (modality, model checksum) pair are stored in two append-only files:
+        - <modality>_<checksum>.vectors: float32 rows of EMBEDDING_DIM values (memory-mapped when read)
+        - <modality>_<checksum>.index: one '<text hash> <row>' line for each cached embedding
+    When the fastText model changes, its checksum changes too, so a new pair of files is created
+    and the files of the previous model are deleted.
+    """
+    # Length of the model checksum used in the cache filenames
+    CHECKSUM_LENGTH = 16
+
+    def __init__(self, modality, model_filename, cache_dir=Config.EMBEDDING_CACHE_DIR, dim=Config.EMBEDDING_DIM):
+        """
+        Constructor
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param model_filename: the fastText model (.bin) that generates the embeddings of this modality
+        :param cache_dir: the directory where the cache files are stored
+        :param dim: the dimension of the embeddings
+        """
+        self.MODALITY = modality
+        self.DIM = dim
+        self.ROW_BYTES = dim * np.dtype(np.float32).itemsize
+        self.MODEL_CHECKSUM = self.get_file_checksum(filename=model_filename)[:self.CHECKSUM_LENGTH]
+
+        # Create Cache Directory if it does not exist
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+        self.CACHE_DIR = cache_dir
+        self.VECTORS_FILENAME = '{0}/{1}_{2}.vectors'.format(cache_dir, modality, self.MODEL_CHECKSUM)
+        self.INDEX_FILENAME = '{0}/{1}_{2}.index'.format(cache_dir, modality, self.MODEL_CHECKSUM)
+
+        # Invalidate the embeddings generated by previous versions of the fastText model
+        self.delete_stale_cache_files()
+
+        # Initialize Variables
+        self.index = dict()  # text hash => row
+        self.index_offset = 0  # bytes of the index file read so far
+        self.vectors = None  # memory-mapped vectors file
+        self.hits = 0
+        self.misses = 0
+
+        # Read the index
+        self.read_index()
+        return
+
+    @staticmethod
+    def get_file_checksum(filename):
+        """
+        Method that returns the SHA-1 checksum of the given file. The checksum is memoized in a
+        '<filename>.checksum' file and recomputed only when the size or the modification time of the file change
+        :param filename: the file to get its checksum
+        :return: the hex checksum of the file
+        """
+        file_stat = os.stat(filename)
+        checksum_filename = '{0}.checksum'.format(filename)
+
+        # Read memoized checksum
+        if os.path.isfile(checksum_filename):
+            with open(checksum_filename, mode='r') as file:
+                try:
+                    checksum_details = json.load(file)
+                except ValueError:
+                    checksum_details = dict()
+            if checksum_details.get('size') == file_stat.st_size and checksum_details.get('mtime_ns') == file_stat.st_mtime_ns:
+                return checksum_details['sha1']
+
+        # Calculate checksum
+        sha1 = hashlib.sha1()
+        with open(filename, mode='rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                sha1.update(chunk)
+
+        # Memoize checksum
+        try:
+            with open(checksum_filename, mode='w') as file:
+                json.dump({'size': file_stat.st_size, 'mtime_ns': file_stat.st_mtime_ns, 'sha1': sha1.hexdigest()}, file)
+        except OSError:
+            pass
+        return sha1.hexdigest()
+
+    @staticmethod
+    def get_text_hash(text):
+        """
+        Method that returns the hash of the given preprocessed text
+        :param text: a preprocessed text
+        :return: the hex hash of the text
+        """
+        return hashlib.sha1(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def delete_stale_cache_files(self):
+        """
+        Method that deletes the cache files of the current modality that were generated by another fastText model
+        :return:
+        """
+        for cache_filename in glob.glob('{0}/{1}_*.vectors'.format(self.CACHE_DIR, self.MODALITY)) + glob.glob('{0}/{1}_*.index'.format(self.CACHE_DIR, self.MODALITY)):
+            if cache_filename not in [self.VECTORS_FILENAME, self.INDEX_FILENAME]:
+                try:
+                    os.remove(cache_filename)
+                except OSError:
+                    pass
+        return
+
+    def read_index(self):
+        """
+        Method that reads all the complete index lines appended since the last time that the index was read
+        (including lines appended by other processes)
+        :return:
+        """
+        if not os.path.isfile(self.INDEX_FILENAME):
+            return
+        with open(self.INDEX_FILENAME, mode='rb') as file:
+            file.seek(self.index_offset)
+            new_index_data = file.read()
+
+        # Ignore a partially written last line
+        complete_data_length = new_index_data.rfind(b'\n') + 1
+        for line in new_index_data[:complete_data_length].decode('ascii', 'ignore').split('\n'):
+            line_parts = line.split(' ')
+            if len(line_parts) == 2 and line_parts[1].isdigit():
+                self.index[line_parts[0]] = int(line_parts[1])
+        self.index_offset += complete_data_length
+        return
+
+    def get_vector(self, row):
+        """
+        Method that returns a copy of the given row of the memory-mapped vectors file
+        :param row: the row of the embedding
+        :return: the embedding as a float32 numpy array
+        """
+        if self.vectors is None or row >= self.vectors.shape[0]:
+            total_rows = os.path.getsize(self.VECTORS_FILENAME) // self.ROW_BYTES
+            self.vectors = np.memmap(self.VECTORS_FILENAME, dtype=np.float32, mode='r', shape=(total_rows, self.DIM))
+        return np.array(self.vectors[row])
+
+    def get(self, text):
+        """
+        Method that returns the cached embedding of the given preprocessed text
+        :param text: a preprocessed text
+        :return: the embedding as a float32 numpy array or None if it is not cached
+        """
+        row = self.index.get(self.get_text_hash(text=text))
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.get_vector(row=row)
+
+    def put_many(self, texts, vectors):
+        """
+        Method that appends the embeddings of the given preprocessed texts to the cache
+        :param texts: a list of preprocessed texts
+        :param vectors: a list with the embedding of each text
+        :return:
+        """
+        with open(self.INDEX_FILENAME, mode='a') as index_file:
+            # Lock the cache so that only one process appends embeddings at a time
+            fcntl.flock(index_file, fcntl.LOCK_EX)
+            try:
+                # Read the embeddings appended by other processes
+                self.read_index()
+
+                # Find the embeddings that are not cached
+                new_text_hashes, new_text_hashes_set, new_vectors = list(), set(), list()
+                for text, vector in zip(texts, vectors):
+                    text_hash = self.get_text_hash(text=text)
+                    if text_hash not in self.index and text_hash not in new_text_hashes_set:
+                        new_text_hashes.append(text_hash)
+                        new_text_hashes_set.add(text_hash)
+                        new_vectors.append(np.asarray(vector, dtype=np.float32).reshape(self.DIM))
+                if len(new_vectors) == 0:
+                    return
+
+                # Append the vectors, overwriting any partially written row
+                with open(self.VECTORS_FILENAME, mode='r+b' if os.path.isfile(self.VECTORS_FILENAME) else 'w+b') as vectors_file:
+                    first_row = os.fstat(vectors_file.fileno()).st_size // self.ROW_BYTES
+                    vectors_file.seek(first_row * self.ROW_BYTES)
+                    vectors_file.write(np.vstack(new_vectors).tobytes())
+                    vectors_file.flush()
+                    os.fsync(vectors_file.fileno())
+
+                # Append the index lines only after the vectors have been written
+                index_file.write(''.join(['{0} {1}\n'.format(text_hash, first_row + i) for i, text_hash in enumerate(new_text_hashes)]))
+                index_file.flush()
+            finally:
+                fcntl.flock(index_file, fcntl.LOCK_UN)
+
+        # Read the appended index lines
+        self.read_index()
+        return
+
+    def get_sentence_vectors(self, fasttext_model, texts):
+        """
+        Method that returns the embeddings of the given preprocessed texts, generating with the given
+        fastText model and caching only the embeddings that are not already cached
+        :param fasttext_model: the fastText model of the current modality
+        :param texts: a list of preprocessed texts
+        :return: a (len(texts), EMBEDDING_DIM) float32 numpy array
+        """
+        embeddings = np.zeros(shape=(len(texts), self.DIM), dtype=np.float32)
+        missing_vectors = dict()  # preprocessed text => generated embedding
+        for i, text in enumerate(texts):
+            vector = missing_vectors.get(text)
+            if vector is None:
+                vector = self.get(text=text)
+            if vector is None:
+                vector = fasttext_model.get_sentence_vector(text=text)
+                missing_vectors[text] = vector
+            embeddings[i] = vector
+
+        # Cache the new embeddings
+        if len(missing_vectors) > 0:
+            self.put_many(texts=list(missing_vectors.keys()), vectors=list(missing_vectors.values()))
+        return embeddings
+
+    def get_sentence_vector(self, fasttext_model, text):
+        """
+        Method that returns the (cached) embedding of the given preprocessed text
+        :param fasttext_model: the fastText model of the current modality
+        :param text: a preprocessed text
+        :return: the embedding as a float32 numpy array
+        """
+        return self.get_sentence_vectors(fasttext_model=fasttext_model, texts=[text])[0]
+
+    def get_stats(self):
+        """
+        Method that returns the size and the hit/miss counters of the cache
+        :return: a dict with the cache statistics
+        """
+        return {'size': len(self.index), 'hits': self.hits, 'misses': self.misses}
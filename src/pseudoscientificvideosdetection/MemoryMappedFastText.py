@@ -0,0 +1,208 @@
+#!/usr/bin/python
+
+import os
+import re
+import json
+import shutil
+import numpy as np
+from dataset.LRUCache import LRUCache
+
+
+class MemoryMappedFastText(object):
+    """
+    Class that implements a read-only fastText model that generates sentence embeddings from an exported
+    copy of a fastText model. The exported input matrix (word vectors followed by the subword buckets) is
+    memory-mapped, hence it is loaded instantly and its pages are shared among all the processes that use
+    the same model. The generated embeddings are identical to the ones of fastText's get_sentence_vector().
+
+    An exported model is a directory with the following files:
+        - input_matrix.npy: the (nwords + bucket, dim) float32 input matrix of the model
+        - words.txt: the vocabulary of the model, one word per line in the order of their ids
+        - args.json: the dim, minn, maxn, bucket, and nwords of the model and the checksum of the source model
+    """
+    # Begin/End of word and End of sentence tokens
+    BOW = '<'
+    EOW = '>'
+    EOS = '</s>'
+
+    # Whitespace characters that fastText uses to split a line into words
+    WHITESPACE_PATTERN = re.compile(r'[ \t\n\v\f\r]+')
+
+    # FNV-1a hash constants
+    FNV_OFFSET_BASIS = 2166136261
+    FNV_PRIME = 16777619
+
+    def __init__(self, export_dir, word_vectors_cache_size=100000):
+        """
+        Constructor
+        :param export_dir: the directory of the exported fastText model
+        :param word_vectors_cache_size: the maximum number of normalized word vectors to cache
+        """
+        with open('{0}/args.json'.format(export_dir), mode='r') as file:
+            self.ARGS = json.load(file)
+        self.DIM = self.ARGS['dim']
+        self.MINN = self.ARGS['minn']
+        self.MAXN = self.ARGS['maxn']
+        self.BUCKET = self.ARGS['bucket']
+        self.NWORDS = self.ARGS['nwords']
+
+        # Memory-map the input matrix
+        self.INPUT_MATRIX = np.load('{0}/input_matrix.npy'.format(export_dir), mmap_mode='r')
+
+        # Read the vocabulary
+        with open('{0}/words.txt'.format(export_dir), mode='r', encoding='utf-8') as file:
+            self.WORD_IDS = {word: word_id for word_id, word in enumerate(file.read().split('\n')[:self.NWORDS])}
+
+        # Word => Normalized word vector cache
+        self.WORD_VECTORS_CACHE = LRUCache(max_size=word_vectors_cache_size)
+        return
+
+    @staticmethod
+    def export_model(fasttext_model, export_dir, model_checksum):
+        """
+        Method that exports the given fastText model to the memory-mappable format read by this class
+        :param fasttext_model: a loaded (non-quantized) fastText model
+        :param export_dir: the directory where the model will be exported
+        :param model_checksum: the checksum of the source fastText model (.bin) file
+        :return:
+        """
+        model_args = fasttext_model.f.getArgs()
+        words = fasttext_model.get_words()
+
+        # Export to a temporary directory and replace the previous export only when done
+        temp_export_dir = '{0}.tmp{1}'.format(export_dir.rstrip('/'), os.getpid())
+        if os.path.exists(temp_export_dir):
+            shutil.rmtree(temp_export_dir)
+        os.makedirs(temp_export_dir)
+        np.save('{0}/input_matrix.npy'.format(temp_export_dir), np.asarray(fasttext_model.get_input_matrix(), dtype=np.float32))
+        with open('{0}/words.txt'.format(temp_export_dir), mode='w', encoding='utf-8') as file:
+            file.write('\n'.join(words))
+        with open('{0}/args.json'.format(temp_export_dir), mode='w') as file:
+            json.dump({
+                'dim': model_args.dim,
+                'minn': model_args.minn,
+                'maxn': model_args.maxn,
+                'bucket': model_args.bucket,
+                'nwords': len(words),
+                'model_checksum': model_checksum,
+            }, file)
+
+        if os.path.exists(export_dir):
+            shutil.rmtree(export_dir)
+        os.rename(temp_export_dir, export_dir)
+        return
+
+    @staticmethod
+    def get_export_model_checksum(export_dir):
+        """
+        Method that returns the checksum of the source fastText model of an exported model
+        :param export_dir: the directory of the exported fastText model
+        :return: the checksum or None if the model has not been exported
+        """
+        try:
+            with open('{0}/args.json'.format(export_dir), mode='r') as file:
+                return json.load(file).get('model_checksum')
+        except (OSError, ValueError):
+            return None
+
+    def hash(self, ngram):
+        """
+        Method that implements fastText's FNV-1a hash of the bytes of a character n-gram (bytes are sign-extended)
+        :param ngram: the UTF-8 encoded character n-gram
+        :return: the 32-bit hash of the n-gram
+        """
+        h = self.FNV_OFFSET_BASIS
+        for byte in ngram:
+            h = ((h ^ (byte if byte < 128 else byte | 0xFFFFFF00)) * self.FNV_PRIME) & 0xFFFFFFFF
+        return h
+
+    def compute_subwords(self, word):
+        """
+        Method that returns the input matrix ids of the character n-grams of the given word
+        :param word: the word with its BOW and EOW tokens
+        :return: a list of input matrix ids
+        """
+        word = word.encode('utf-8')
+        word_length = len(word)
+        subwords = list()
+        for i in range(word_length):
+            # Skip UTF-8 continuation bytes
+            if (word[i] & 0xC0) == 0x80:
+                continue
+            j, n = i, 1
+            while j < word_length and n <= self.MAXN:
+                j += 1
+                while j < word_length and (word[j] & 0xC0) == 0x80:
+                    j += 1
+                if n >= self.MINN and not (n == 1 and (i == 0 or j == word_length)):
+                    subwords.append(self.NWORDS + self.hash(ngram=word[i:j]) % self.BUCKET)
+                n += 1
+        return subwords
+
+    def get_subwords(self, word):
+        """
+        Method that returns the input matrix ids of the given word (the word itself if it is in the vocabulary
+        and its character n-grams)
+        :param word: a word
+        :return: a list of input matrix ids
+        """
+        word_id = self.WORD_IDS.get(word)
+        subwords = [word_id] if word_id is not None else list()
+        if word != self.EOS and self.BUCKET > 0:
+            subwords += self.compute_subwords(word='{0}{1}{2}'.format(self.BOW, word, self.EOW))
+        return subwords
+
+    def get_word_vector(self, word):
+        """
+        Method that returns the vector representation of the given word
+        :param word: a word
+        :return: a float32 numpy array
+        """
+        subwords = self.get_subwords(word=word)
+        if len(subwords) == 0:
+            return np.zeros(self.DIM, dtype=np.float32)
+        # Accumulate the rows sequentially in float32, exactly as fastText does
+        vector = np.cumsum(self.INPUT_MATRIX[subwords], axis=0, dtype=np.float32)[-1]
+        vector *= np.float32(1.0 / len(subwords))
+        return vector
+
+    def get_normalized_word_vector(self, word):
+        """
+        Method that returns the (cached) L2-normalized vector representation of the given word
+        :param word: a word
+        :return: a float32 numpy array or False if the norm of the word vector is zero
+        """
+        vector = self.WORD_VECTORS_CACHE.get(word)
+        if vector is None:
+            vector = self.get_word_vector(word=word)
+            # Calculate the L2 norm sequentially in float32, exactly as fastText does
+            norm = np.sqrt(np.cumsum(vector * vector, dtype=np.float32)[-1])
+            if norm > 0:
+                vector *= np.float32(1.0 / float(norm))
+            else:
+                vector = False
+            self.WORD_VECTORS_CACHE.put(word, vector)
+        return vector
+
+    def get_sentence_vector(self, text):
+        """
+        Method that returns the vector representation of the given text, i.e., the average of the
+        L2-normalized vectors of its words
+        :param text: a single line of text
+        :return: a float32 numpy array
+        """
+        if text.find('\n') != -1:
+            raise ValueError("predict processes one line at a time (remove \'\\n\')")
+
+        sentence_vector = np.zeros(self.DIM, dtype=np.float32)
+        count = 0
+        for word in self.WHITESPACE_PATTERN.split(text):
+            if word == '':
+                continue
+            vector = self.get_normalized_word_vector(word=word)
+            if vector is not False:
+                sentence_vector += vector
+                count += 1
+        if count > 0:
+            sentence_vector *= np.float32(1.0 / count)
+        return sentence_vector
@@ -0,0 +1,115 @@
+#!/usr/bin/python
+
+import sys
+import json
+import h5py
+import numpy as np
+
+
+class NumPyFusionModel(object):
+    """
+    Class that implements a TensorFlow-free inference backend of the Pseudoscience Classifier. It reads the weights
+    of the trained Keras model (.hdf5) once and evaluates the fusing network (concatenation of the input modalities,
+    Dense layers, and the Softmax classification layer) with batch-first vectorized NumPy matrix multiplications.
+    Dropout layers are ignored, since they are only active during training.
+    """
+    # Supported activation functions of the Dense layers
+    ACTIVATIONS = {
+        'linear': lambda x: x,
+        'relu': lambda x: np.maximum(x, 0),
+        'sigmoid': lambda x: 1.0 / (1.0 + np.exp(-x)),
+        'tanh': np.tanh,
+        'softmax': lambda x: NumPyFusionModel.softmax(x),
+    }
+
+    def __init__(self, model_filename):
+        """
+        Constructor
+        :param model_filename: the trained Keras model (.hdf5) of the Pseudoscience Classifier
+        """
+        self.MODEL_FILENAME = model_filename
+        self.LAYERS = list()  # (name, kernel, bias, activation) of each Dense layer
+
+        with h5py.File(model_filename, mode='r') as model_file:
+            # Read the architecture of the model
+            model_config = model_file.attrs['model_config']
+            model_config = json.loads(model_config.decode('utf-8') if isinstance(model_config, bytes) else model_config)
+
+            # Read the weights of the Dense layers in the order they are applied
+            model_weights = model_file['model_weights'] if 'model_weights' in model_file else model_file
+            for layer in model_config['config']['layers']:
+                if layer['class_name'] == 'Dense':
+                    layer_name = layer['config']['name']
+                    activation = layer['config'].get('activation', 'linear')
+                    if activation not in self.ACTIVATIONS:
+                        raise ValueError('Unsupported activation function "{0}" of layer {1}'.format(activation, layer_name))
+                    kernel, bias = self.read_layer_weights(layer_weights=model_weights[layer_name], use_bias=layer['config'].get('use_bias', True))
+                    self.LAYERS.append((layer_name, kernel, bias, activation))
+                elif layer['class_name'] not in ('InputLayer', 'Concatenate', 'Dropout', 'Flatten', 'Sequential', 'Functional', 'Model'):
+                    raise ValueError('Unsupported layer {0} ({1})'.format(layer['config'].get('name'), layer['class_name']))
+        if len(self.LAYERS) == 0:
+            raise ValueError('Cannot find any Dense layers in {0}'.format(model_filename))
+        self.INPUT_DIM = self.LAYERS[0][1].shape[0]
+        return
+
+    @staticmethod
+    def read_layer_weights(layer_weights, use_bias=True):
+        """
+        Method that reads the kernel and the bias of a Dense layer from the 'model_weights' group of a Keras model
+        :param layer_weights: the h5py group of the layer
+        :param use_bias: whether the layer has a bias vector
+        :return: the (input_dim, units) kernel and the (units,) bias as float32 numpy arrays
+        """
+        weight_names = [weight_name.decode('utf-8') if isinstance(weight_name, bytes) else weight_name for weight_name in layer_weights.attrs['weight_names']]
+        weights = {weight_name.split('/')[-1].split(':')[0]: np.asarray(layer_weights[weight_name], dtype=np.float32) for weight_name in weight_names}
+        kernel = weights['kernel']
+        bias = weights['bias'] if use_bias else np.zeros(kernel.shape[1], dtype=np.float32)
+        return kernel, bias
+
+    @staticmethod
+    def softmax(x):
+        """
+        Method that implements a numerically stable softmax over the last axis
+        :param x: a (batch_size, classes) numpy array
+        :return: the class probabilities
+        """
+        exp_x = np.exp(x - x.max(axis=-1, keepdims=True))
+        return exp_x / exp_x.sum(axis=-1, keepdims=True)
+
+    def predict_on_batch(self, model_input):
+        """
+        Method that evaluates the fusing network on a batch of Videos (same interface as Keras' predict_on_batch)
+        :param model_input: a list with a (N, 300) array for the Snippet, Tags, Transcript, and Comments
+        :return: a (N, classes) numpy array with the predicted probabilities
+        """
+        x = np.concatenate([np.asarray(modality_input, dtype=np.float32) for modality_input in model_input], axis=1)
+        if x.shape[1] != self.INPUT_DIM:
+            raise ValueError('Expected {0} input features but received {1}'.format(self.INPUT_DIM, x.shape[1]))
+        for _, kernel, bias, activation in self.LAYERS:
+            x = self.ACTIVATIONS[activation](np.dot(x, kernel) + bias)
+        return x
+
+    def check_parity(self, keras_model, batch_size=1024, input_dims=(300, 300, 300, 300), atol=1e-5):
+        """
+        Method that compares the outputs of this backend with the outputs of the given Keras model on random inputs
+        :param keras_model: the Keras model loaded from the same .hdf5 file
+        :param batch_size: the number of random Videos
+        :param input_dims: the dimension of each input modality
+        :param atol: the maximum allowed absolute difference of the predicted probabilities
+        :return: the maximum absolute difference of the predicted probabilities
+        """
+        random_state = np.random.RandomState(seed=42)
+        model_input = [random_state.uniform(low=-1, high=1, size=(batch_size, input_dim)).astype(np.float32) for input_dim in input_dims]
+        max_difference = float(np.abs(np.asarray(keras_model.predict_on_batch(model_input)) - self.predict_on_batch(model_input)).max())
+        if max_difference > atol:
+            raise AssertionError('NumPy backend differs from Keras by {0} (> {1})'.format(max_difference, atol))
+        return max_difference
+
+
+if __name__ == '__main__':
+    # Check the parity of the NumPy backend with Keras, e.g.:
+    # python src/pseudoscientificvideosdetection/NumPyFusionModel.py src/pseudoscientificvideosdetection/models/pseudoscience_model_final.hdf5
+    from tensorflow.keras.models import load_model
+    model_filename = sys.argv[1] if len(sys.argv) > 1 else 'src/pseudoscientificvideosdetection/models/pseudoscience_model_final.hdf5'
+    numpy_model = NumPyFusionModel(model_filename=model_filename)
+    print('[INFO] Max absolute difference from Keras: {0}'.format(numpy_model.check_parity(keras_model=load_model(model_filename))))
@@ -1,10 +1,13 @@
 #!/usr/bin/python
 
 import os
+import threading
 import numpy as np
-from decimal import Decimal
-from tensorflow.keras.models import load_model
-from dataset.DatasetUtils import DatasetUtils
+from dataset.VideoPreprocessingUtils import VideoPreprocessingUtils
+from pseudoscientificvideosdetection.EmbeddingCache import EmbeddingCache
+from pseudoscientificvideosdetection.MemoryMappedFastText import MemoryMappedFastText
+from pseudoscientificvideosdetection.NumPyFusionModel import NumPyFusionModel
+from pseudoscientificvideosdetection.config.PseudoscienceClassifierConfig import Config
 import fasttext
 
 
@@ -29,31 +32,31 @@ class PseudoscienceClassifier(object):
         # Initialize Variables
         self.NB_CLASSES = 2
         self.CLASSES = ['science', 'pseudoscience']
+        self.MODALITIES = ['video_snippet', 'video_tags', 'video_transcript', 'video_comments']
 
-        # Create a Dataset Object
-        self.DATASET = DatasetUtils()
+        # Create a Video Preprocessing Object (it does not require MongoDB)
+        self.DATASET = VideoPreprocessingUtils()
 
         # Set the base directory of the FastText Classifiers
-        self.FASTTEXT_MODELS_DIR = 'src/pseudoscientificvideosdetection/models/feature_extraction'
-        # Load FastText Classifiers
-        if not os.path.isfile('{0}/fasttext_model_video_snippet.bin'.format(self.FASTTEXT_MODELS_DIR)):
-            exit('Cannot find fasttext feature extractor for VIDEO SNIPPET')
-        self.FASTTEXT_VIDEO_SNIPPET = fasttext.load_model(path='{0}/fasttext_model_video_snippet.bin'.format(self.FASTTEXT_MODELS_DIR))
-        if not os.path.isfile('{0}/fasttext_model_video_tags.bin'.format(self.FASTTEXT_MODELS_DIR)):
-            exit('Cannot find fasttext feature extractor for VIDEO TAGS')
-        self.FASTTEXT_VIDEO_TAGS = fasttext.load_model(path='{0}/fasttext_model_video_tags.bin'.format(self.FASTTEXT_MODELS_DIR))
-        if not os.path.isfile('{0}/fasttext_model_video_transcript.bin'.format(self.FASTTEXT_MODELS_DIR)):
-            exit('Cannot find fasttext feature extractor for VIDEO TRANSCRIPT')
-        self.FASTTEXT_VIDEO_TRANSCRIPT = fasttext.load_model(path='{0}/fasttext_model_video_transcript.bin'.format(self.FASTTEXT_MODELS_DIR))
-        if not os.path.isfile('{0}/fasttext_model_video_comments.bin'.format(self.FASTTEXT_MODELS_DIR)):
-            exit('Cannot find fasttext feature extractor for VIDEO COMMENTS')
-        self.FASTTEXT_VIDEO_COMMENTS = fasttext.load_model(path='{0}/fasttext_model_video_comments.bin'.format(self.FASTTEXT_MODELS_DIR))
+        self.FASTTEXT_MODELS_DIR = Config.FASTTEXT_MODELS_DIR
+        # Check FastText Classifiers (each one is loaded lazily when its modality is first used)
+        for modality in self.MODALITIES:
+            if not os.path.isfile(self.get_fasttext_model_filename(modality=modality)):
+                exit('Cannot find fasttext feature extractor for {0}'.format(modality.replace('_', ' ').upper()))
+        self.FASTTEXT_MODELS = dict()
+        self.FASTTEXT_MODELS_LOCK = threading.Lock()
+
+        # Create a persistent fastText Sentence Embeddings Cache for each modality
+        self.EMBEDDING_CACHES = dict()
+        if Config.EMBEDDING_CACHE_ENABLED:
+            for modality in self.MODALITIES:
+                self.EMBEDDING_CACHES[modality] = EmbeddingCache(modality=modality, model_filename=self.get_fasttext_model_filename(modality=modality))
 
         # Load the Pseudoscience Classifier
-        self.pseudoscience_model_filename = 'src/pseudoscientificvideosdetection/models/pseudoscience_model_final.hdf5'
+        self.pseudoscience_model_filename = '{0}/pseudoscience_model_final.hdf5'.format(Config.MODELS_DIR)
         if not os.path.isfile(self.pseudoscience_model_filename):
             exit('Cannot find a trained Pseudoscience Classifier')
-        self.PSEUDOSCIENCE_CLASSIFIER = load_model(self.pseudoscience_model_filename)
+        self.PSEUDOSCIENCE_CLASSIFIER = self.load_pseudoscience_classifier(backend=Config.CLASSIFIER_BACKEND)
 
         # Read Classification Threshold (default: 0.7)
         self.CLASSIFICATION_THRESHOLD = classification_threshold
@@ -65,13 +68,24 @@ class PseudoscienceClassifier(object):
         Ensure that you free some memory by deleting all the loaded models
         :return:
         """
-        del self.FASTTEXT_VIDEO_SNIPPET
-        del self.FASTTEXT_VIDEO_TAGS
-        del self.FASTTEXT_VIDEO_TRANSCRIPT
-        del self.FASTTEXT_VIDEO_COMMENTS
+        self.FASTTEXT_MODELS.clear()
         del self.PSEUDOSCIENCE_CLASSIFIER
         return
 
+    def load_pseudoscience_classifier(self, backend):
+        """
+        Method that loads the trained Pseudoscience Classifier with the given inference backend
+        :param backend: 'numpy' to evaluate the model with NumPy (no TensorFlow import) or 'keras'
+        :return: an object that implements predict_on_batch()
+        """
+        if backend == 'numpy':
+            return NumPyFusionModel(model_filename=self.pseudoscience_model_filename)
+        elif backend == 'keras':
+            # Import TensorFlow only when it is needed
+            from tensorflow.keras.models import load_model
+            return load_model(self.pseudoscience_model_filename)
+        exit('Unknown Pseudoscience Classifier backend: {0}'.format(backend))
+
     @staticmethod
     def key_exists(element, *keys):
         """
@@ -92,20 +106,23 @@ class PseudoscienceClassifier(object):
                 return False
         return True
 
-    def classify(self, video_details):
+    def get_preprocessing_cache_stats(self):
         """
-        Method that receives the information of a given YouTube Video and classifies it as Science or Pseudoscience
-        :param video_id:
-        :return:
+        Method that returns the hit/miss counters of the text preprocessing caches
+        :return: a dict with the statistics of the lemma and the preprocessed text caches
         """
+        return self.DATASET.get_preprocessing_cache_stats()
 
-        """ Prepare Classifier Input """
+    def get_video_input_texts(self, video_details):
+        """
+        Method that reads and preprocesses the Snippet, Tags, Transcript, and Comments of the given YouTube Video
+        :param video_details: the information of the YouTube Video
+        :return: a tuple with the preprocessed Snippet, Tags, Transcript, and Comments of the Video
+        """
         # --- VIDEO SNIPPET
         video_snippet = '{} {}'.format(video_details['snippet']['title'], video_details['snippet']['description'])
         # Preprocess Video Snippet
         video_snippet = self.DATASET.preprocess_text(text=video_snippet)
-        # Get Embedding
-        X_video_snippet = self.FASTTEXT_VIDEO_SNIPPET.get_sentence_vector(text=video_snippet)
 
         # --- VIDEO TAGS
         video_tags = ""
@@ -114,50 +131,135 @@ class PseudoscienceClassifier(object):
         # Preprocess Video Tags
         if video_tags != "":
             video_tags = self.DATASET.preprocess_text(text=video_tags)
-        # Get Embedding
-        X_video_tags = self.FASTTEXT_VIDEO_TAGS.get_sentence_vector(text=video_tags)
 
         # --- VIDEO TRANSCRIPT
         video_transcript = self.DATASET.read_video_transcript(video_id=video_details['id'])
         video_transcript_processed = self.DATASET.preprocess_video_transcript(video_captions=video_transcript)
-        # Get Embedding
-        X_video_transcript = self.FASTTEXT_VIDEO_TRANSCRIPT.get_sentence_vector(text=video_transcript_processed)
 
         # --- VIDEO COMMENTS
         video_comments = self.DATASET.read_video_comments(video_id=video_details['id'])
         video_comments_preprocessed = self.DATASET.preprocess_video_comments(video_comments=video_comments)
-        # Get Embedding
-        X_video_comments = self.FASTTEXT_VIDEO_COMMENTS.get_sentence_vector(text=' '.join(video_comments_preprocessed))
+        return video_snippet, video_tags, video_transcript_processed, ' '.join(video_comments_preprocessed)
 
-        """ Classify Video """
-        # Create Classifier Input
-        classifier_input = [[X_video_snippet], [X_video_tags], [X_video_transcript], [X_video_comments]]
-        classifier_input = [np.reshape(data, (1, -1)) for data in classifier_input]
+    def get_fasttext_model_filename(self, modality):
+        """
+        Method that returns the filename of the fastText feature extractor of the given modality
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: the fastText model (.bin) filename
+        """
+        return '{0}/fasttext_model_{1}.bin'.format(self.FASTTEXT_MODELS_DIR, modality)
+
+    def load_fasttext_model(self, modality):
+        """
+        Method that loads the fastText feature extractor of the given modality. If memory-mapping is enabled,
+        the model is exported (only the first time or when the .bin model changes) to a read-only format whose
+        input matrix is memory-mapped and shared among all processes
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: the fastText model
+        """
+        model_filename = self.get_fasttext_model_filename(modality=modality)
+        if not Config.FASTTEXT_MEMORY_MAPPED:
+            return fasttext.load_model(path=model_filename)
+
+        # Export the fastText model if it has not been exported or if it has changed
+        export_dir = '{0}/{1}'.format(Config.FASTTEXT_MMAP_DIR, modality)
+        model_checksum = EmbeddingCache.get_file_checksum(filename=model_filename)
+        if MemoryMappedFastText.get_export_model_checksum(export_dir=export_dir) != model_checksum:
+            print('[INFO] Exporting the fastText feature extractor of {0} to a memory-mapped model...'.format(modality.replace('_', ' ').upper()))
+            MemoryMappedFastText.export_model(fasttext_model=fasttext.load_model(path=model_filename), export_dir=export_dir, model_checksum=model_checksum)
+        return MemoryMappedFastText(export_dir=export_dir)
+
+    def get_fasttext_model(self, modality):
+        """
+        Method that returns the fastText feature extractor of the given modality, loading it on first use
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :return: the fastText model
+        """
+        fasttext_model = self.FASTTEXT_MODELS.get(modality)
+        if fasttext_model is None:
+            with self.FASTTEXT_MODELS_LOCK:
+                fasttext_model = self.FASTTEXT_MODELS.get(modality)
+                if fasttext_model is None:
+                    fasttext_model = self.load_fasttext_model(modality=modality)
+                    self.FASTTEXT_MODELS[modality] = fasttext_model
+        return fasttext_model
+
+    def get_sentence_vectors(self, modality, texts):
+        """
+        Method that generates the fastText embeddings of the given preprocessed texts of a single modality,
+        reusing the embeddings that have been already generated and cached
+        :param modality: 'video_snippet', 'video_tags', 'video_transcript', or 'video_comments'
+        :param texts: a list of preprocessed texts
+        :return: a (len(texts), 300) numpy array
+        """
+        if modality in self.EMBEDDING_CACHES:
+            return self.EMBEDDING_CACHES[modality].get_sentence_vectors(fasttext_model=self.get_fasttext_model(modality=modality), texts=texts)
+        embeddings = [self.get_fasttext_model(modality=modality).get_sentence_vector(text=text) for text in texts]
+        return np.vstack(embeddings) if len(embeddings) > 0 else np.zeros(shape=(0, Config.EMBEDDING_DIM), dtype=np.float32)
 
+    def get_videos_embeddings(self, videos_input_texts):
+        """
+        Method that generates the fastText embeddings of the preprocessed input texts of a batch of YouTube Videos
+        :param videos_input_texts: a list of tuples as returned by get_video_input_texts()
+        :return: the classifier input, i.e., a list with a (N, 300) array for the Snippet, Tags, Transcript, and Comments
+        """
+        return [self.get_sentence_vectors(modality=modality, texts=[video_input_texts[i] for video_input_texts in videos_input_texts]) for i, modality in enumerate(self.MODALITIES)]
+
+    def get_embedding_cache_stats(self):
+        """
+        Method that returns the hit/miss counters of the fastText sentence embeddings cache of each modality
+        :return: a dict with the statistics of each cache
+        """
+        return {modality: embedding_cache.get_stats() for modality, embedding_cache in self.EMBEDDING_CACHES.items()}
+
+    def classify_embeddings(self, classifier_input):
+        """
+        Method that classifies a batch of YouTube Videos given their embeddings using a single forward pass
+        of the Pseudoscience Classifier
+        :param classifier_input: a list with a (N, 300) array for the Snippet, Tags, Transcript, and Comments
+        :return: a list of (predicted_class, confidence_score) tuples, one for each Video
+        """
+        if classifier_input[0].shape[0] == 0:
+            return list()
+
+        """ Classify Videos """
         # Perform Classification
-        predicted_proba = self.PSEUDOSCIENCE_CLASSIFIER.predict(classifier_input, batch_size=1)
+        predicted_proba = np.asarray(self.PSEUDOSCIENCE_CLASSIFIER.predict_on_batch(classifier_input), dtype=np.float64)
 
-        # Decode Predicted probability and convert it to a Label
-        if self.CLASSIFICATION_THRESHOLD is not None:
+        # Convert probabilities to float
+        science_proba = np.round(predicted_proba[:, 0], decimals=3)
+        pseudoscience_proba = np.round(predicted_proba[:, 1], decimals=3)
 
-            pseudoscience_probability = np.round(predicted_proba.item(1), decimals=3)
+        # Decode Predicted probabilities and convert them to Labels
+        if self.CLASSIFICATION_THRESHOLD is not None:
             # Check the Pseudoscience Probability against the Classification Threshold
-            if Decimal(pseudoscience_probability) >= Decimal(self.CLASSIFICATION_THRESHOLD):
-                # PSEUDOSCIENCE is the correct class
-                predicted_class = self.CLASSES[1]
-            else:
-                predicted_class = self.CLASSES[0]
+            predicted_offsets = (pseudoscience_proba >= self.CLASSIFICATION_THRESHOLD).astype(int)
         else:
-            # Convert probability to class offset
-            prediction = predicted_proba.argmax(axis=-1)
-            # Get predicted class from offset
-            predicted_class = self.CLASSES[prediction[0]]
+            # Convert probabilities to class offsets
+            predicted_offsets = predicted_proba.argmax(axis=-1)
 
-        # Convert probabilities to float
-        science_proba = np.round(predicted_proba.item(0), decimals=3)
-        pseudoscience_proba = np.round(predicted_proba.item(1), decimals=3)
-        # print('--- [VIDEO_ID: {}] PREDICTED CLASS: {}, PROBAS: [{}, {}]\n'.format(video_details['id'], predicted_class.upper(), science_proba, pseudoscience_proba))
+        # Find the appropriate Confidence Score of each Video
+        predictions = list()
+        for i, prediction in enumerate(predicted_offsets):
+            predicted_class = self.CLASSES[prediction]
+            conf_score = science_proba[i] if predicted_class == 'science' else pseudoscience_proba[i]
+            predictions.append((predicted_class, conf_score))
+        return predictions
+
+    def classify_batch(self, videos_details):
+        """
+        Method that receives the information of a batch of YouTube Videos and classifies all of them
+        as Science or Pseudoscience with a single forward pass of the Pseudoscience Classifier
+        :param videos_details: a list with the information of each YouTube Video
+        :return: a list of (predicted_class, confidence_score) tuples in the same order as the given Videos
+        """
+        videos_input_texts = [self.get_video_input_texts(video_details=video_details) for video_details in videos_details]
+        return self.classify_embeddings(classifier_input=self.get_videos_embeddings(videos_input_texts=videos_input_texts))
 
-        # Find the appropriate Confidence Score
-        conf_score = science_proba if predicted_class == 'science' else pseudoscience_proba
-        return predicted_class, conf_score
+    def classify(self, video_details):
+        """
+        Method that receives the information of a given YouTube Video and classifies it as Science or Pseudoscience
+        :param video_details: the information of the YouTube Video
+        :return: the predicted class and its confidence score
+        """
+        return self.classify_batch(videos_details=[video_details])[0]
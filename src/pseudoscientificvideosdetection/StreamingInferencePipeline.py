@@ -0,0 +1,339 @@
+#!/usr/bin/python
+
+import time
+import queue
+import threading
+import functools
+import itertools
+import numpy as np
+from youtubehelpers.config.YouTubeAPIConfig import Config as YouTubeAPIConfig
+from youtubehelpers.DownloadJournal import DownloadJournal
+from youtubehelpers.RetryPolicy import QuotaExceededError
+
+
+class StreamingInferencePipeline(object):
+    """
+    Class that implements a streaming inference pipeline that downloads, preprocesses, embeds, and classifies
+    YouTube Videos in concurrent stages. The stages are connected with bounded queues, hence each Video is
+    classified as soon as it goes through the previous stages, and the memory used is bounded by the size of the
+    queues instead of the number of Videos. Each stage has its own pool of worker threads:
+        - download: downloads the metadata (in batches), transcript, and comments of each Video with the
+          ConcurrentVideoDownloader, i.e., within the rate limits of each endpoint and the quota of the API Key
+        - preprocess: reads and preprocesses the Snippet, Tags, Transcript, and Comments of each Video
+        - embed: generates the fastText embeddings of each Video
+        - classify: classifies micro-batches of Videos with a single forward pass of the Pseudoscience Classifier
+    The results are yielded to the caller (writer) in the same order as the given Videos, along with the download
+    status of each Video (DownloadJournal.DOWNLOADED, UNAVAILABLE, or FAILED).
+    """
+    # Sentinel that signals the end of the stream
+    END_OF_STREAM = object()
+
+    def __init__(self, model, video_downloader=None, download_workers=8, preprocess_workers=2, embed_workers=1,
+                 classify_workers=1, queue_size=64, batch_size=256, batch_timeout=0.5):
+        """
+        Constructor
+        :param model: a PseudoscienceClassifier object
+        :param video_downloader: a ConcurrentVideoDownloader shared by the download workers (only to download Videos)
+        :param download_workers: the number of download worker threads
+        :param preprocess_workers: the number of preprocessing worker threads
+        :param embed_workers: the number of embedding worker threads
+        :param classify_workers: the number of classification worker threads
+        :param queue_size: the maximum number of Videos buffered between two consecutive stages
+        :param batch_size: the maximum number of Videos classified with a single forward pass
+        :param batch_timeout: the maximum time (in seconds) to wait for a micro-batch to fill up
+        """
+        self.MODEL = model
+        self.VIDEO_DOWNLOADER = video_downloader
+        self.DOWNLOAD_WORKERS = download_workers
+        self.PREPROCESS_WORKERS = preprocess_workers
+        self.EMBED_WORKERS = embed_workers
+        self.CLASSIFY_WORKERS = classify_workers
+        self.QUEUE_SIZE = queue_size
+        self.BATCH_SIZE = batch_size
+        self.BATCH_TIMEOUT = batch_timeout
+        self.MAX_IN_FLIGHT = max(queue_size, batch_size) * 4
+
+        # Stage statistics
+        self.STATS_LOCK = threading.Lock()
+        self.stats = dict()
+        return
+
+    def update_stats(self, stage, processed=0, failed=0, elapsed=0.0):
+        """
+        Method that updates the counters of the given stage
+        :param stage: the name of the stage
+        :param processed: the number of Videos processed successfully
+        :param failed: the number of Videos that failed
+        :param elapsed: the time spent processing the Videos
+        :return:
+        """
+        with self.STATS_LOCK:
+            stage_stats = self.stats.setdefault(stage, {'processed': 0, 'failed': 0, 'elapsed': 0.0})
+            stage_stats['processed'] += processed
+            stage_stats['failed'] += failed
+            stage_stats['elapsed'] += elapsed
+        return
+
+    def get_stats(self):
+        """
+        Method that returns the number of Videos processed and failed and the time spent by each stage, summed over
+        all the runs of the pipeline since it was created (or since the last reset_stats())
+        :return: a dict with the statistics of each stage
+        """
+        with self.STATS_LOCK:
+            return {stage: dict(stage_stats) for stage, stage_stats in self.stats.items()}
+
+    def reset_stats(self):
+        """
+        Method that resets the statistics of all the stages
+        :return:
+        """
+        with self.STATS_LOCK:
+            self.stats = dict()
+        return
+
+    def start_workers(self, target, workers, input_queue, output_queue, errors):
+        """
+        Method that starts the worker threads of a stage. The last worker that finishes forwards the
+        end of the stream to the next stage. If a worker fails, its error is recorded and it still
+        forwards the end of the stream, so that the rest of the stages (and the caller) do not wait forever
+        :param target: the function that each worker runs, i.e., target(input_queue, output_queue)
+        :param workers: the number of worker threads
+        :param input_queue: the input queue of the stage
+        :param output_queue: the output queue of the stage
+        :param errors: the list where the errors of the workers are recorded
+        :return: the list of the started threads
+        """
+        remaining_workers = [max(workers, 1)]
+        remaining_workers_lock = threading.Lock()
+
+        def run_worker():
+            try:
+                target(input_queue, output_queue)
+            except Exception as e:
+                print('[ERROR] A pipeline worker failed. [ERROR]: {0}'.format(e))
+                errors.append(e)
+            finally:
+                with remaining_workers_lock:
+                    remaining_workers[0] -= 1
+                    is_last_worker = remaining_workers[0] == 0
+                if is_last_worker:
+                    output_queue.put(self.END_OF_STREAM)
+                else:
+                    # Let the rest workers of this stage see the end of the stream too
+                    input_queue.put(self.END_OF_STREAM)
+            return
+
+        threads = [threading.Thread(target=run_worker, daemon=True) for _ in range(remaining_workers[0])]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def run_stage(self, stage, function, input_queue, output_queue):
+        """
+        Method that runs a worker of a stage that applies the given function to each Video. Videos that failed
+        in a previous stage (payload is None) are forwarded as they are, so that the order of the results is preserved.
+        Each item is an (index, video_id, download_status, video_details, payload) tuple
+        :param stage: the name of the stage
+        :param function: a function that receives the payload of a Video and returns the payload of the next stage
+        :param input_queue: the input queue of the stage
+        :param output_queue: the output queue of the stage
+        :return:
+        """
+        while True:
+            item = input_queue.get()
+            if item is self.END_OF_STREAM:
+                return
+            index, video_id, download_status, video_details, payload = item
+            if payload is not None:
+                start = time.time()
+                try:
+                    payload = function(payload)
+                except Exception as e:
+                    print('[ERROR] {0} failed for Video: {1}. [ERROR]: {2}'.format(stage.upper(), video_id, e))
+                    payload = None
+                self.update_stats(stage=stage, processed=int(payload is not None), failed=int(payload is None), elapsed=time.time() - start)
+            output_queue.put((index, video_id, download_status, video_details, payload))
+
+    def preprocess_video(self, video_details):
+        """
+        Method that reads and preprocesses the Snippet, Tags, Transcript, and Comments of a Video
+        :param video_details: the information of the YouTube Video
+        :return: a tuple with the preprocessed texts of the Video
+        """
+        return self.MODEL.get_video_input_texts(video_details=video_details)
+
+    def embed_video(self, video_input_texts):
+        """
+        Method that generates the fastText embeddings of the preprocessed texts of a Video
+        :param video_input_texts: a tuple with the preprocessed texts of the Video
+        :return: a list with a (1, 300) array for the Snippet, Tags, Transcript, and Comments
+        """
+        return self.MODEL.get_videos_embeddings(videos_input_texts=[video_input_texts])
+
+    def prefetch_videos_metadata(self, video_ids):
+        """
+        Method that fetches the metadata of the given Videos in batches (up to 50 IDs per request), so that the
+        download workers only have to download the transcript and the comments of each Video. If the metadata of a
+        batch cannot be fetched, the download workers fetch the metadata of each Video of the batch separately.
+        If the quota of the API Key has been exhausted, no more batches are requested
+        :param video_ids: an iterable of YouTube Video IDs
+        :return: a generator of (index, video_id, metadata_prefetched, video_metadata) items of the download stage
+        """
+        indexed_video_ids = enumerate(video_ids)
+        while True:
+            chunk = list(itertools.islice(indexed_video_ids, YouTubeAPIConfig.VIDEOS_LIST_MAX_IDS))
+            if len(chunk) == 0:
+                return
+            videos_metadata, metadata_prefetched = [None] * len(chunk), False
+            if not self.VIDEO_DOWNLOADER.is_quota_exceeded():
+                try:
+                    videos_metadata = [video_metadata for _, video_metadata in self.VIDEO_DOWNLOADER.download_videos_metadata(video_ids=[video_id for _, video_id in chunk])]
+                    metadata_prefetched = True
+                except QuotaExceededError:
+                    pass
+                except Exception as e:
+                    print('[ERROR] METADATA download failed for {0} Videos. [ERROR]: {1}'.format(len(chunk), e))
+            for (index, video_id), video_metadata in zip(chunk, videos_metadata):
+                yield index, video_id, metadata_prefetched, video_metadata
+
+    def run_download_worker(self, input_queue, output_queue):
+        """
+        Method that runs a worker of the download stage. Videos that are not downloaded because the quota of the
+        API Key has been exhausted fail (without sending any requests), so that they are retried by the next run
+        :param input_queue: a queue with (index, video_id, metadata_prefetched, video_metadata) items
+        :param output_queue: the queue of the preprocess stage
+        :return:
+        """
+        while True:
+            item = input_queue.get()
+            if item is self.END_OF_STREAM:
+                return
+            index, video_id, metadata_prefetched, video_metadata = item
+            start = time.time()
+            if metadata_prefetched and video_metadata is None:
+                # The Video is not available (e.g., deleted or private)
+                video_details, download_status = None, DownloadJournal.UNAVAILABLE
+            else:
+                try:
+                    video_details = self.VIDEO_DOWNLOADER.download_video(video_id=video_id, video_metadata=video_metadata)
+                    download_status = DownloadJournal.DOWNLOADED if video_details is not None else DownloadJournal.UNAVAILABLE
+                except QuotaExceededError:
+                    video_details, download_status = None, DownloadJournal.FAILED
+                except Exception as e:
+                    print('[ERROR] DOWNLOAD failed for Video: {0}. [ERROR]: {1}'.format(video_id, e))
+                    video_details, download_status = None, DownloadJournal.FAILED
+            self.update_stats(stage='download', processed=int(video_details is not None), failed=int(video_details is None), elapsed=time.time() - start)
+            output_queue.put((index, video_id, download_status, video_details, video_details))
+
+    def run_classify_worker(self, input_queue, output_queue):
+        """
+        Method that runs a worker of the classify stage. It collects micro-batches of up to BATCH_SIZE Videos,
+        waiting at most BATCH_TIMEOUT seconds for each micro-batch to fill up, and classifies them with a single
+        forward pass of the Pseudoscience Classifier
+        :param input_queue: the queue of the classify stage
+        :param output_queue: the output queue of the pipeline
+        :return:
+        """
+        end_of_stream = False
+        while not end_of_stream:
+            # Wait for the first Video of the micro-batch
+            item = input_queue.get()
+            if item is self.END_OF_STREAM:
+                return
+            batch = [item]
+
+            # Fill up the micro-batch
+            deadline = time.time() + self.BATCH_TIMEOUT
+            while len(batch) < self.BATCH_SIZE:
+                try:
+                    item = input_queue.get(timeout=max(deadline - time.time(), 0))
+                except queue.Empty:
+                    break
+                if item is self.END_OF_STREAM:
+                    end_of_stream = True
+                    break
+                batch.append(item)
+
+            # Classify the Videos that went through the previous stages successfully
+            valid_items = [item for item in batch if item[4] is not None]
+            predictions = dict()
+            if len(valid_items) > 0:
+                start = time.time()
+                try:
+                    classifier_input = [np.vstack([item[4][i] for item in valid_items]) for i in range(len(self.MODEL.MODALITIES))]
+                    for item, prediction in zip(valid_items, self.MODEL.classify_embeddings(classifier_input=classifier_input)):
+                        predictions[item[0]] = prediction
+                except Exception as e:
+                    print('[ERROR] CLASSIFY failed for a batch of {0} Videos. [ERROR]: {1}'.format(len(valid_items), e))
+                self.update_stats(stage='classify', processed=len(predictions), failed=len(valid_items) - len(predictions), elapsed=time.time() - start)
+            for index, video_id, download_status, video_details, _ in batch:
+                output_queue.put((index, video_id, download_status, video_details, predictions.get(index)))
+        return
+
+    def run(self, video_ids=None, videos=None):
+        """
+        Method that streams the given Videos through the pipeline. Either the IDs of the Videos to be downloaded
+        or the details of already downloaded Videos must be given
+        :param video_ids: a list of YouTube Video IDs to download and classify
+        :param videos: an iterable of already downloaded YouTube Videos to classify
+        :return: a generator of (video_id, video_details, prediction, download_status) tuples in the same order as
+                 the given Videos, where prediction is None if the Video failed in any stage, video_details is None if
+                 it could not be downloaded, and download_status is DownloadJournal.DOWNLOADED, UNAVAILABLE (e.g., a
+                 deleted or private Video), or FAILED (e.g., a network error, hence it should be retried). If the input or a worker of any stage fails, its error is raised
+                 after the results of the Videos that went through the pipeline
+        """
+        errors = list()
+        preprocess_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        embed_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        classify_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        output_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+
+        # Feed the Videos to the first stage
+        if video_ids is not None:
+            download_queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+            self.start_workers(target=self.run_download_worker, workers=self.DOWNLOAD_WORKERS, input_queue=download_queue, output_queue=preprocess_queue, errors=errors)
+            input_queue, input_items = download_queue, self.prefetch_videos_metadata(video_ids=video_ids)
+        else:
+            input_queue = preprocess_queue
+            input_items = ((index, video_details['id'], DownloadJournal.DOWNLOADED, video_details, video_details) for index, video_details in enumerate(videos))
+
+        # Bound the number of Videos in the pipeline, including the results waiting to be yielded in order
+        in_flight_videos = threading.Semaphore(self.MAX_IN_FLIGHT)
+
+        def feed_videos():
+            try:
+                for input_item in input_items:
+                    in_flight_videos.acquire()
+                    input_queue.put(input_item)
+            except Exception as e:
+                print('[ERROR] Feeding the Videos to the pipeline failed. [ERROR]: {0}'.format(e))
+                errors.append(e)
+            finally:
+                input_queue.put(self.END_OF_STREAM)
+            return
+        threading.Thread(target=feed_videos, daemon=True).start()
+
+        # Start the rest of the stages
+        self.start_workers(target=functools.partial(self.run_stage, 'preprocess', self.preprocess_video), workers=self.PREPROCESS_WORKERS, input_queue=preprocess_queue, output_queue=embed_queue, errors=errors)
+        self.start_workers(target=functools.partial(self.run_stage, 'embed', self.embed_video), workers=self.EMBED_WORKERS, input_queue=embed_queue, output_queue=classify_queue, errors=errors)
+        self.start_workers(target=self.run_classify_worker, workers=self.CLASSIFY_WORKERS, input_queue=classify_queue, output_queue=output_queue, errors=errors)
+
+        # Yield the results in the same order as the given Videos
+        pending_results = dict()
+        next_index = 0
+        while True:
+            item = output_queue.get()
+            if item is self.END_OF_STREAM:
+                break
+            index, video_id, download_status, video_details, prediction = item
+            pending_results[index] = (video_id, video_details, prediction, download_status)
+            while next_index in pending_results:
+                yield pending_results.pop(next_index)
+                in_flight_videos.release()
+                next_index += 1
+
+        # Raise the first error of the input or of the workers to the caller
+        if len(errors) > 0:
+            raise errors[0]
+        return
@@ -0,0 +1,28 @@
+#!/usr/bin/python
+
+class Config(object):
+    """
+    Static class that contains the configuration of the Pseudoscience Classifier used during inference
+    """
+    # Models Directories
+    MODELS_DIR = 'src/pseudoscientificvideosdetection/models'
+    FASTTEXT_MODELS_DIR = 'src/pseudoscientificvideosdetection/models/feature_extraction'
+
+    # Inference backend of the Pseudoscience Classifier: 'numpy' (no TensorFlow import) or 'keras'
+    CLASSIFIER_BACKEND = 'numpy'
+
+    # Memory-mapped fastText Feature Extractors Config
+    FASTTEXT_MEMORY_MAPPED = True
+    FASTTEXT_MMAP_DIR = 'src/pseudoscientificvideosdetection/models/feature_extraction/mmap'
+
+    # fastText Sentence Embeddings Cache Config
+    EMBEDDING_CACHE_ENABLED = True
+    EMBEDDING_CACHE_DIR = 'src/pseudoscientificvideosdetection/models/embeddings_cache'
+    EMBEDDING_DIM = 300
+
+    # Classification Server Config
+    SERVER_HOST = '127.0.0.1'
+    SERVER_PORT = 8642
+    SERVER_MAX_BATCH_SIZE = 256  # maximum number of Videos classified with a single forward pass
+    SERVER_MAX_WAIT = 0.02  # maximum time (in seconds) to wait for a micro-batch to fill up
+    SERVER_CLIENT_TIMEOUT = 300
@@ -9,6 +9,7 @@ import time
 
 from youtubeauditframework.utils.YouTubeAuditFrameworkConfig import Config
 from pseudoscientificvideosdetection.PseudoscienceClassifier import PseudoscienceClassifier
+from pseudoscientificvideosdetection.ClassificationClient import ClassificationClient
 from youtubehelpers.YouTubeVideoDownloader import YouTubeVideoDownloader
 
 
@@ -31,8 +32,13 @@ class DownloadAnnotateExperimentsVideos(object):
         # Create a YouTube Video Downloader Object
         self.VIDEO_DOWNLOADER = YouTubeVideoDownloader()
 
-        # Create Video Classifier Object
-        self.VIDEO_ANNOTATOR = PseudoscienceClassifier()
+        # Create Video Classifier Object (share the warm model of the Classification Server if it is running)
+        classification_client = ClassificationClient()
+        if Config.USE_CLASSIFICATION_SERVER and classification_client.is_available():
+            print('[INFO] Using the Classification Server at {0}'.format(classification_client.SERVER_URL))
+            self.VIDEO_ANNOTATOR = classification_client
+        else:
+            self.VIDEO_ANNOTATOR = PseudoscienceClassifier()
         return
 
     def get_all_notannotated_videos(self):
@@ -159,14 +159,23 @@ class YouTubeHomepageAudit(object):
         :param video_id: YouTube Video Id
         :return:
         """
-        # Get Video Metadata
-        video_metadata = self.YOUTUBE_VIDEO_DOWNLOADER.download_video_metadata(video_id=video_id, retrieve_recommended_videos=False)
+        return self.get_videos_metadata(video_ids=[video_id])[video_id]
 
-        # Add additional information
-        video_metadata['retrievedAt'] = str(dt.now())
-        video_metadata['statistics'] = dict()
-        # video_metadata['relatedVideos'] = dict()
-        return video_metadata
+    def get_videos_metadata(self, video_ids):
+        """
+        Method that downloads the metadata of the given YouTube Videos using YouTube Data API (up to 50 Videos per request)
+        :param video_ids: a list of YouTube Video Ids
+        :return: a dict of video_id => video metadata (None if the Video is not available)
+        """
+        videos_metadata = dict()
+        for video_id, video_metadata in self.YOUTUBE_VIDEO_DOWNLOADER.download_videos_metadata(video_ids=video_ids, retrieve_recommended_videos=False):
+            if video_metadata is not None:
+                # Add additional information
+                video_metadata['retrievedAt'] = str(dt.now())
+                video_metadata['statistics'] = dict()
+                # video_metadata['relatedVideos'] = dict()
+            videos_metadata[video_id] = video_metadata
+        return videos_metadata
 
     def crawl_youtube_video(self, video_id):
         """
@@ -251,14 +260,14 @@ class YouTubeHomepageAudit(object):
             curr_repetition_details['CRAWLED_VIDEOS'] = list()
             curr_repetition_details['CRAWLED_VIDEOS_DETAILS'] = list()
 
-            # Download the metadata of all the videos in the Homepage of the User Profile
+            # Download the metadata of all the videos in the Homepage of the User Profile (up to 50 Videos per request)
+            self.get_videos_metadata(video_ids=list(dict.fromkeys(user_homepage_top_videos)))
             crawled_videos_counter = 1
             for video_id in user_homepage_top_videos:
                 print('--- [{}]-[EXP_ID: {}] Crawling Video {}/{} with ID: {}'.format(self.USER_PROFILE, repetitions_cntr+1, crawled_videos_counter, len(user_homepage_top_videos), video_id))
 
                 # Download Video Metadata
                 if video_id not in curr_repetition_details['CRAWLED_VIDEOS']:
-                    self.get_video_metadata(video_id=video_id)
                     curr_repetition_details['CRAWLED_VIDEOS'].append(video_id)
                     curr_repetition_details['CRAWLED_VIDEOS_DETAILS'].append({
                         'video_id': video_id,
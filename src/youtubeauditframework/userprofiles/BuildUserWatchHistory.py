@@ -109,11 +109,23 @@ class BuildUserWatchHistory(object):
         :param video_id: YouTube Video Id
         :return:
         """
-        # Get Video Metadata
-        video_metadata = self.YOUTUBE_DOWNLOADER.download_video_metadata(video_id=video_id, retrieve_recommended_videos=False)
-        # Convert Video duration to seconds
-        video_duration_seconds = Utils.convert_youtube_video_duration_to_seconds(video_duration=video_metadata['contentDetails']['duration'])
-        return video_duration_seconds
+        return self.get_videos_duration(video_ids=[video_id])[video_id]
+
+    def get_videos_duration(self, video_ids):
+        """
+        Method that returns the duration of the given YouTube Videos (up to 50 Videos per request)
+        :param video_ids: a list of YouTube Video Ids
+        :return: a dict of video_id => video duration in seconds (0 if the Video is not available)
+        """
+        videos_duration_seconds = dict()
+        for video_id, video_metadata in self.YOUTUBE_DOWNLOADER.download_videos_metadata(video_ids=video_ids, retrieve_recommended_videos=False):
+            if video_metadata is None:
+                print('[VIDEO: {0}] ERROR: Video Metadata not available'.format(video_id))
+                videos_duration_seconds[video_id] = 0
+                continue
+            # Convert Video duration to seconds
+            videos_duration_seconds[video_id] = Utils.convert_youtube_video_duration_to_seconds(video_duration=video_metadata['contentDetails']['duration'])
+        return videos_duration_seconds
 
     def is_user_authenticated(self):
         """
@@ -160,10 +172,11 @@ class BuildUserWatchHistory(object):
             pass
         return
 
-    def watch_youtube_video(self, video_id):
+    def watch_youtube_video(self, video_id, video_duration_seconds=None):
         """
         Method that receives a specific YouTube Video ID and watch the full video like a normal YouTube user
         :param video_id:
+        :param video_duration_seconds: the already retrieved duration of the Video (in seconds)
         :return:
         """
         # Load YouTube Video Page
@@ -188,7 +201,8 @@ class BuildUserWatchHistory(object):
             pass
 
         # Get Video duration in seconds and then sleep for that time so that we watch the whole video
-        video_duration_seconds = self.get_video_duration(video_id=video_id)
+        if video_duration_seconds is None:
+            video_duration_seconds = self.get_video_duration(video_id=video_id)
         print('--- [VIDEO: {0}] Sleeping for {1} secs to watch the whole video...'.format(video_id, video_duration_seconds))
         time.sleep(video_duration_seconds)
         return
@@ -217,12 +231,15 @@ class BuildUserWatchHistory(object):
         if clear_watch_history:
             self.clear_user_watch_history()
 
+        # Get the duration of all the videos to be watched (up to 50 Videos per request)
+        videos_duration_seconds = self.get_videos_duration(video_ids=list(dict.fromkeys(watch_videos_list)))
+
         # Build User Profile Watch History
         print('[{0}] Started building Watch History. TOTAL VIDEOS TO WATCH: {1}'.format(self.USER_PROFILE, len(watch_videos_list)))
         watched_videos_cntr = 1
         for video_id in watch_videos_list:
             print('--- {0}/{1}. Watching Video: {2}'.format(watched_videos_cntr, len(watch_videos_list), video_id))
-            self.watch_youtube_video(video_id=video_id)
+            self.watch_youtube_video(video_id=video_id, video_duration_seconds=videos_duration_seconds[video_id])
             time.sleep(self.TIME_TO_SLEEP_BETWEEN_EACH_VIDEO)
             watched_videos_cntr += 1
         print('[{0}] Building Watch History has finished!'.format(self.USER_PROFILE))
@@ -37,6 +37,10 @@ class Config(object):
     # Set the Number of Comments
     LIMIT_PAGES_COMMENTS = 1  # 200 Comments per page
 
+    """ Video Annotation Config """
+    # Use the local Classification Server (run.py serve) if it is running, instead of loading a new classifier
+    USE_CLASSIFICATION_SERVER = True
+
     """ MongoDB Database & Collections """
     DB_NAME = 'youtube_recommendation_audit'
     AUDIT_FRAMEWORK_VIDEOS_COL = 'audit_framework_videos'
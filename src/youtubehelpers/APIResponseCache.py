@@ -0,0 +1,210 @@
+#!/usr/bin/python
+
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from youtubehelpers.config.YouTubeAPIConfig import Config
+
+
+class APIResponseCache(object):
+    """
+    Class that implements a persistent (SQLite) cache of the successful responses of the YouTube Data API, so that
+    repeated requests (e.g., the metadata of the same Videos across audit repetitions) do not cost any quota.
+    Each response is keyed by its endpoint (e.g., 'videos.list') and its canonical parameters, i.e., sorted and
+    without the API Key. Each endpoint has its own time-to-live and endpoints without a TTL are not cached. When the
+    cache grows larger than MAX_SIZE, the expired and then the least recently used responses are evicted.
+    A cache can be shared by multiple threads (each thread uses its own SQLite connection) and processes.
+    """
+    # Parameters that do not affect the response
+    IGNORED_PARAMETERS = ('key', 'quotaUser')
+    # Number of puts between two checks of the size of the cache
+    EVICTION_CHECK_INTERVAL = 100
+
+    def __init__(self, cache_filename=Config.RESPONSE_CACHE_FILENAME, ttls=Config.RESPONSE_CACHE_TTLS, max_size=Config.RESPONSE_CACHE_MAX_SIZE):
+        """
+        Constructor
+        :param cache_filename: the SQLite database of the cache
+        :param ttls: a dict of endpoint => time-to-live (in seconds) of its responses
+        :param max_size: the maximum total size (in bytes) of the cached responses
+        """
+        self.CACHE_FILENAME = cache_filename
+        self.TTLS = ttls
+        self.MAX_SIZE = max_size
+
+        # Create Cache Directory if it does not exist
+        cache_dir = os.path.dirname(cache_filename)
+        if cache_dir and not os.path.exists(cache_dir):
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # SQLite connection of each thread
+        self.local = threading.local()
+        with self.get_connection() as connection:
+            connection.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, endpoint TEXT, content BLOB, size INTEGER, stored_at REAL, accessed_at REAL)')
+            connection.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+        # Statistics of each endpoint
+        self.stats = dict()
+        self.puts = 0
+        self.lock = threading.Lock()
+        return
+
+    def get_connection(self):
+        """
+        Method that returns the SQLite connection of the current thread
+        :return:
+        """
+        if getattr(self.local, 'connection', None) is None:
+            self.local.connection = sqlite3.connect(self.CACHE_FILENAME, timeout=60)
+            self.local.connection.execute('PRAGMA journal_mode=WAL')
+        return self.local.connection
+
+    @staticmethod
+    def get_endpoint(uri, method='GET'):
+        """
+        Method that returns the endpoint of a request of the YouTube Data API
+        :param uri: the URI of the request (e.g., https://youtube.googleapis.com/youtube/v3/videos?id=...)
+        :param method: the HTTP method of the request
+        :return: the endpoint (e.g., 'videos.list') or None if it is not a list request
+        """
+        if method != 'GET':
+            return None
+        return '{0}.list'.format(urlsplit(uri).path.rstrip('/').rsplit('/', 1)[-1])
+
+    def get_key(self, endpoint, parameters):
+        """
+        Method that returns the cache key of a request given its endpoint and its parameters
+        :param endpoint: the endpoint of the request
+        :param parameters: a dict or a list of (name, value) tuples with the parameters of the request
+        :return: the key of the request
+        """
+        parameters = parameters.items() if isinstance(parameters, dict) else parameters
+        canonical_parameters = sorted((str(name), str(value)) for name, value in parameters if name not in self.IGNORED_PARAMETERS)
+        return hashlib.sha1('{0}?{1}'.format(endpoint, canonical_parameters).encode('utf-8')).hexdigest()
+
+    def get_uri_key(self, uri):
+        """
+        Method that returns the cache key of the given URI
+        :param uri: the URI of a request
+        :return: the key of the request
+        """
+        return self.get_key(endpoint=self.get_endpoint(uri=uri), parameters=parse_qsl(urlsplit(uri).query, keep_blank_values=True))
+
+    def is_cacheable(self, endpoint):
+        """
+        Method that checks whether the responses of the given endpoint are cached
+        :param endpoint: the endpoint of a request
+        :return:
+        """
+        return endpoint is not None and self.TTLS.get(endpoint, 0) > 0
+
+    def update_stats(self, endpoint, stat):
+        """
+        Method that increases the given counter of the given endpoint
+        :param endpoint: the endpoint of a request
+        :param stat: 'hits', 'misses', 'puts', or 'evictions'
+        :return:
+        """
+        with self.lock:
+            endpoint_stats = self.stats.setdefault(endpoint, {'hits': 0, 'misses': 0, 'puts': 0, 'evictions': 0})
+            endpoint_stats[stat] += 1
+        return
+
+    def get_stats(self):
+        """
+        Method that returns the hits, misses, puts, and evictions of each endpoint
+        :return: a dict of endpoint => statistics
+        """
+        with self.lock:
+            return {endpoint: dict(endpoint_stats) for endpoint, endpoint_stats in self.stats.items()}
+
+    def contains(self, endpoint, key):
+        """
+        Method that checks whether a fresh response of the given request exists in the cache (without counting a hit)
+        :param endpoint: the endpoint of the request
+        :param key: the key of the request
+        :return:
+        """
+        if not self.is_cacheable(endpoint=endpoint):
+            return False
+        row = self.get_connection().execute('SELECT stored_at FROM responses WHERE key = ?', (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.TTLS[endpoint]
+
+    def get(self, endpoint, key):
+        """
+        Method that returns the cached response of the given request
+        :param endpoint: the endpoint of the request
+        :param key: the key of the request
+        :return: the content of the response (bytes) or None if it is not cached or it has expired
+        """
+        if not self.is_cacheable(endpoint=endpoint):
+            return None
+        connection = self.get_connection()
+        row = connection.execute('SELECT content, stored_at FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.TTLS[endpoint]:
+            self.update_stats(endpoint=endpoint, stat='misses')
+            return None
+        with connection:
+            connection.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        self.update_stats(endpoint=endpoint, stat='hits')
+        return bytes(row[0])
+
+    def put(self, endpoint, key, content):
+        """
+        Method that stores the given response of the given request
+        :param endpoint: the endpoint of the request
+        :param key: the key of the request
+        :param content: the content of the response (bytes or str)
+        :return:
+        """
+        if not self.is_cacheable(endpoint=endpoint):
+            return
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        now = time.time()
+        with self.get_connection() as connection:
+            connection.execute('INSERT OR REPLACE INTO responses (key, endpoint, content, size, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)',
+                               (key, endpoint, sqlite3.Binary(content), len(content), now, now))
+        self.update_stats(endpoint=endpoint, stat='puts')
+
+        # Check the size of the cache every EVICTION_CHECK_INTERVAL puts
+        with self.lock:
+            self.puts += 1
+            check_size = self.puts % self.EVICTION_CHECK_INTERVAL == 0
+        if check_size:
+            self.evict()
+        return
+
+    def evict(self):
+        """
+        Method that evicts the expired responses and then the least recently used ones until the total size of the
+        cache is less than 90% of MAX_SIZE (if it is larger than MAX_SIZE)
+        :return: the number of evicted responses
+        """
+        connection = self.get_connection()
+        total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total_size <= self.MAX_SIZE:
+            return 0
+        now = time.time()
+        evicted_responses = list()
+        with connection:
+            # Expired responses (of any endpoint, including endpoints that are no longer cached)
+            for key, endpoint, size, stored_at in connection.execute('SELECT key, endpoint, size, stored_at FROM responses').fetchall():
+                if now - stored_at > self.TTLS.get(endpoint, 0):
+                    evicted_responses.append((key, endpoint))
+                    total_size -= size
+            # Least recently used responses
+            if total_size > self.MAX_SIZE * 0.9:
+                expired_keys = set(key for key, _ in evicted_responses)
+                for key, endpoint, size in connection.execute('SELECT key, endpoint, size FROM responses ORDER BY accessed_at').fetchall():
+                    if total_size <= self.MAX_SIZE * 0.9:
+                        break
+                    if key not in expired_keys:
+                        evicted_responses.append((key, endpoint))
+                        total_size -= size
+            connection.executemany('DELETE FROM responses WHERE key = ?', [(key,) for key, _ in evicted_responses])
+        for _, endpoint in evicted_responses:
+            self.update_stats(endpoint=endpoint, stat='evictions')
+        return len(evicted_responses)
@@ -0,0 +1,57 @@
+#!/usr/bin/python
+
+import httplib2
+
+
+class CachingHttp(object):
+    """
+    Class that wraps an httplib2.Http object and serves the requests of the YouTube Data API client (i.e., it is
+    passed to googleapiclient's build()) from an APIResponseCache. Cache misses are sent through the wrapped
+    object and their successful responses are stored in the cache. Requests of endpoints that are not cached
+    are sent as they are.
+    """
+    def __init__(self, response_cache, http=None):
+        """
+        Constructor
+        :param response_cache: an APIResponseCache
+        :param http: the wrapped httplib2.Http object (by default, a new one)
+        """
+        self.RESPONSE_CACHE = response_cache
+        self.http = http if http is not None else httplib2.Http()
+        return
+
+    def __getattr__(self, name):
+        # Expose the rest attributes of the wrapped object (e.g., timeout or redirect_codes)
+        return getattr(self.http, name)
+
+    def is_cached(self, uri, method='GET'):
+        """
+        Method that checks whether a fresh response of the given request exists in the cache
+        :param uri: the URI of the request
+        :param method: the HTTP method of the request
+        :return:
+        """
+        endpoint = self.RESPONSE_CACHE.get_endpoint(uri=uri, method=method)
+        return self.RESPONSE_CACHE.is_cacheable(endpoint=endpoint) and self.RESPONSE_CACHE.contains(endpoint=endpoint, key=self.RESPONSE_CACHE.get_uri_key(uri=uri))
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        """
+        Method that sends the given request (same interface as httplib2.Http.request) or returns its cached response
+        :return: a (httplib2.Response, content) tuple
+        """
+        endpoint = self.RESPONSE_CACHE.get_endpoint(uri=uri, method=method)
+        if not self.RESPONSE_CACHE.is_cacheable(endpoint=endpoint):
+            return self.http.request(uri, method=method, body=body, headers=headers, **kwargs)
+
+        # Return the cached response
+        key = self.RESPONSE_CACHE.get_uri_key(uri=uri)
+        content = self.RESPONSE_CACHE.get(endpoint=endpoint, key=key)
+        if content is not None:
+            response = httplib2.Response({'status': '200', 'content-type': 'application/json; charset=UTF-8', 'x-cache': 'HIT'})
+            return response, content
+
+        # Send the request and cache its successful response
+        response, content = self.http.request(uri, method=method, body=body, headers=headers, **kwargs)
+        if response.status == 200:
+            self.RESPONSE_CACHE.put(endpoint=endpoint, key=key, content=content)
+        return response, content
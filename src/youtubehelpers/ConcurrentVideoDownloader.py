@@ -0,0 +1,226 @@
+#!/usr/bin/python
+
+import time
+import threading
+import concurrent.futures
+from youtubehelpers.config.YouTubeAPIConfig import Config
+from youtubehelpers.YouTubeVideoDownloader import YouTubeVideoDownloader
+from youtubehelpers.RateLimiter import RateLimiter
+from youtubehelpers.RetryPolicy import RetryPolicy, QuotaExceededError
+from youtubehelpers.APIResponseCache import APIResponseCache
+
+
+class ConcurrentVideoDownloader(object):
+    """
+    Class that implements the download engine of the download stage of the StreamingInferencePipeline. The
+    metadata of the Videos is requested in batches (up to VIDEOS_LIST_MAX_IDS Videos per request), and then the
+    transcript and the comments of each available Video are downloaded in parallel by a pool of download threads.
+    Each thread has its own YouTubeVideoDownloader (the YouTube Data API client is not thread-safe), while all of
+    them share a RateLimiter with a token bucket for each endpoint and API Key, a RetryPolicy, and an
+    APIResponseCache. The number of concurrent requests is bounded by the number of download threads.
+    If the quota of the API Key is exhausted, no more requests are sent and the rest Videos fail with a
+    QuotaExceededError (so that they are retried when the quota is reset).
+    """
+    def __init__(self, downloader_factory=YouTubeVideoDownloader, max_in_flight_requests=Config.DOWNLOAD_MAX_IN_FLIGHT_REQUESTS,
+                 rate_limiter=None, retry_policy=None, response_cache=None, report_interval=Config.DOWNLOAD_REPORT_INTERVAL):
+        """
+        Constructor
+        :param downloader_factory: a function that creates a YouTubeVideoDownloader given a rate_limiter, a retry_policy, and a response_cache
+        :param max_in_flight_requests: the number of download threads, i.e., the maximum number of concurrent requests
+        :param rate_limiter: a RateLimiter (by default, one with the rate limits of the configuration)
+        :param retry_policy: a RetryPolicy (by default, one with the retry configuration)
+        :param response_cache: an APIResponseCache (by default, one with the cache configuration if the cache is enabled)
+        :param report_interval: the time (in seconds) between two throughput reports
+        """
+        self.DOWNLOADER_FACTORY = downloader_factory
+        self.MAX_IN_FLIGHT_REQUESTS = max_in_flight_requests
+        self.RATE_LIMITER = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.RETRY_POLICY = retry_policy if retry_policy is not None else RetryPolicy()
+        self.RESPONSE_CACHE = response_cache
+        if self.RESPONSE_CACHE is None and Config.RESPONSE_CACHE_ENABLED:
+            self.RESPONSE_CACHE = APIResponseCache()
+        self.REPORT_INTERVAL = report_interval
+
+        # Downloader of each thread and the pool of download threads (created on the first download)
+        self.local = threading.local()
+        self.executor = None
+        self.quota_exceeded = threading.Event()
+
+        # Throughput statistics
+        self.lock = threading.Lock()
+        self.stats = {'downloaded': 0, 'unavailable': 0, 'failed': 0}
+        self.started_at = self.last_report_at = time.time()
+        return
+
+    def get_downloader(self):
+        """
+        Method that returns the YouTubeVideoDownloader of the current thread
+        :return:
+        """
+        if getattr(self.local, 'downloader', None) is None:
+            self.local.downloader = self.DOWNLOADER_FACTORY(rate_limiter=self.RATE_LIMITER, retry_policy=self.RETRY_POLICY, response_cache=self.RESPONSE_CACHE)
+        return self.local.downloader
+
+    def get_executor(self):
+        """
+        Method that returns the pool of download threads
+        :return:
+        """
+        with self.lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.MAX_IN_FLIGHT_REQUESTS)
+            return self.executor
+
+    def close(self):
+        """
+        Method that stops the download threads (the queued downloads are cancelled)
+        :return:
+        """
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return
+
+    def is_quota_exceeded(self):
+        """
+        Method that checks whether the quota of the YouTube Data API Key has been exhausted
+        :return:
+        """
+        return self.quota_exceeded.is_set()
+
+    def check_quota(self, error=None):
+        """
+        Method that stops all the downloads if the given error is a QuotaExceededError, and raises a
+        QuotaExceededError if the quota has been exhausted
+        :param error: an error of a request (optional)
+        :return:
+        """
+        if isinstance(error, QuotaExceededError) and not self.quota_exceeded.is_set():
+            self.quota_exceeded.set()
+            print('[ERROR] The quota of the YouTube Data API Key has been exhausted, no more Videos will be downloaded')
+        if self.quota_exceeded.is_set():
+            raise QuotaExceededError('The quota of the YouTube Data API Key has been exhausted') from error
+        return
+
+    def update_stats(self, stat, videos=1):
+        """
+        Method that increases the given counter of Videos and prints the throughput every REPORT_INTERVAL seconds
+        :param stat: 'downloaded', 'unavailable', or 'failed'
+        :param videos: the number of Videos
+        :return:
+        """
+        with self.lock:
+            self.stats[stat] += videos
+            report_throughput = time.time() - self.last_report_at >= self.REPORT_INTERVAL
+            if report_throughput:
+                self.last_report_at = time.time()
+        if report_throughput:
+            print('--- [DOWNLOAD] {0}'.format(self.get_stats_message()))
+        return
+
+    def download_videos_metadata(self, video_ids):
+        """
+        Method that downloads the metadata of a batch of Videos
+        :param video_ids: a list of up to VIDEOS_LIST_MAX_IDS YouTube Video IDs
+        :return: a list of (video_id, video_metadata) tuples, where video_metadata is None if the Video is not available
+        """
+        self.check_quota()
+        try:
+            videos_metadata = list(self.get_downloader().download_videos_metadata(video_ids=video_ids))
+        except Exception as e:
+            self.check_quota(error=e)
+            raise
+        self.update_stats(stat='unavailable', videos=sum(video_metadata is None for _, video_metadata in videos_metadata))
+        return videos_metadata
+
+    def download_video_transcript(self, video_id):
+        """
+        Method that downloads the transcript of a Video (if it has not been already downloaded)
+        :param video_id: a YouTube Video ID
+        :return:
+        """
+        downloader = self.get_downloader()
+        if not downloader.video_transcript_downloaded(video_id=video_id):
+            downloader.download_video_transcript(video_id=video_id)
+        return
+
+    def download_video_comments(self, video_id):
+        """
+        Method that downloads the comments of a Video (if they have not been already downloaded)
+        :param video_id: a YouTube Video ID
+        :return:
+        """
+        downloader = self.get_downloader()
+        if not downloader.video_comments_downloaded(video_id=video_id):
+            downloader.download_video_comments(video_id=video_id)
+        return
+
+    def get_stats(self):
+        """
+        Method that returns the number of Videos downloaded, not available, and failed, the throughput, the number
+        of requests and the time waited for the rate limits of each endpoint, the retries of each endpoint, and
+        the hits and misses of the Response Cache of each endpoint
+        :return: a dict with the statistics of the download
+        """
+        with self.lock:
+            stats = dict(self.stats)
+        elapsed = time.time() - self.started_at
+        total_videos = sum(stats.values())
+        return dict(stats,
+                    elapsed=elapsed,
+                    videos_per_second=total_videos / elapsed if elapsed > 0 else 0.0,
+                    endpoints=self.RATE_LIMITER.get_stats(),
+                    retries=self.RETRY_POLICY.get_stats(),
+                    cache=self.RESPONSE_CACHE.get_stats() if self.RESPONSE_CACHE is not None else dict())
+
+    def get_stats_message(self):
+        """
+        Method that returns a printable summary of the throughput of the download
+        :return:
+        """
+        stats = self.get_stats()
+        endpoints = list()
+        for endpoint in sorted(set(stats['endpoints'].keys()) | set(stats['retries'].keys()) | set(stats['cache'].keys())):
+            rate_limit_stats = stats['endpoints'].get(endpoint, {'requests': 0, 'waited': 0.0})
+            retry_stats = stats['retries'].get(endpoint, {'retries': 0, 'failures': 0, 'average_latency': 0.0})
+            cache_stats = stats['cache'].get(endpoint, {'hits': 0, 'misses': 0})
+            endpoints.append('{0}: {1} requests, {2} retries, {3} failures, {4} cache hits, {5} cache misses (waited {6:.1f}s, latency {7:.2f}s)'.format(
+                endpoint, rate_limit_stats['requests'], retry_stats['retries'], retry_stats['failures'], cache_stats['hits'], cache_stats['misses'],
+                rate_limit_stats['waited'], retry_stats['average_latency']))
+        endpoints = ' | '.join(endpoints)
+        return '{0} videos in {1:.1f}s ({2:.2f} videos/sec) | DOWNLOADED: {3} | UNAVAILABLE: {4} | FAILED: {5} | {6}'.format(
+            stats['downloaded'] + stats['unavailable'] + stats['failed'], stats['elapsed'], stats['videos_per_second'],
+            stats['downloaded'], stats['unavailable'], stats['failed'], endpoints)
+
+    def download_video(self, video_id, video_metadata=None):
+        """
+        Method that downloads all the information of a Video: its metadata (unless it is given), and then its
+        transcript and its comments in parallel by the download threads
+        :param video_id: a YouTube Video ID
+        :param video_metadata: the already downloaded metadata of the Video (e.g., by download_videos_metadata)
+        :return: the details of the Video or None if it is not available
+        """
+        try:
+            self.check_quota()
+            if video_metadata is None:
+                video_metadata = self.get_downloader().download_video_metadata(video_id=video_id)
+                if video_metadata is None:
+                    self.update_stats(stat='unavailable')
+                    return None
+
+            # Download the transcript and the comments of the Video in parallel
+            futures = list()
+            if Config.DOWNLOAD_VIDEO_TRANSCRIPT:
+                futures.append(self.get_executor().submit(self.download_video_transcript, video_id))
+            if Config.DOWNLOAD_VIDEO_COMMENTS:
+                futures.append(self.get_executor().submit(self.download_video_comments, video_id))
+            concurrent.futures.wait(futures)
+            for future in futures:
+                future.result()
+        except Exception as e:
+            self.update_stats(stat='failed')
+            self.check_quota(error=e)
+            raise
+        self.update_stats(stat='downloaded')
+        return video_metadata
@@ -0,0 +1,155 @@
+#!/usr/bin/python
+
+import os
+import json
+import time
+
+
+class DownloadJournal(object):
+    """
+    Class that implements a durable, append-only journal (JSONL) of the progress of a download of YouTube videos.
+    Each processed video is recorded as soon as it is processed, along with its status and (if it has been
+    downloaded) its details, and every record is flushed and fsync'ed to disk. Hence, after a crash or an interrupt,
+    a rerun skips all the videos that have been already downloaded (or that are not available) and retries only the
+    failed and the missing ones. The last record of each video determines its status.
+    """
+    # Statuses of a video
+    DOWNLOADED = 'downloaded'
+    UNAVAILABLE = 'unavailable'  # e.g., deleted or private videos
+    FAILED = 'failed'
+
+    # Statuses of the videos that do not have to be downloaded again
+    COMPLETED_STATUSES = (DOWNLOADED, UNAVAILABLE)
+
+    def __init__(self, journal_filename):
+        """
+        Constructor
+        :param journal_filename: the file of the journal
+        """
+        self.JOURNAL_FILENAME = journal_filename
+        self.statuses = dict()  # video id => status
+        self.session_counts = {self.DOWNLOADED: 0, self.UNAVAILABLE: 0, self.FAILED: 0, 'skipped': 0}
+        self.file = None
+        self.load()
+        return
+
+    def load(self):
+        """
+        Method that loads the status of each video from an existing journal. A partially written last record
+        (e.g., the process was killed while writing it) is discarded
+        :return:
+        """
+        if not os.path.isfile(self.JOURNAL_FILENAME):
+            return
+        valid_size = 0
+        with open(self.JOURNAL_FILENAME, mode='rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.statuses[record['video_id']] = record['status']
+                valid_size += len(line)
+        if valid_size < os.path.getsize(self.JOURNAL_FILENAME):
+            with open(self.JOURNAL_FILENAME, mode='r+b') as file:
+                file.truncate(valid_size)
+        return
+
+    def exists(self):
+        """
+        Method that checks whether there are any videos in the journal, i.e., whether this is a resumed download
+        :return:
+        """
+        return len(self.statuses) > 0
+
+    def is_completed(self, video_id):
+        """
+        Method that checks whether the given video does not have to be downloaded again
+        :param video_id: a YouTube Video ID
+        :return:
+        """
+        return self.statuses.get(video_id) in self.COMPLETED_STATUSES
+
+    def get_pending_video_ids(self, video_ids):
+        """
+        Method that filters out the videos that have been already downloaded (or are not available)
+        :param video_ids: an iterable of YouTube Video IDs
+        :return: a generator of the IDs of the failed and the missing videos
+        """
+        for video_id in video_ids:
+            if self.is_completed(video_id=video_id):
+                self.session_counts['skipped'] += 1
+                continue
+            yield video_id
+        return
+
+    def record(self, video_id, status, video_details=None, error=None):
+        """
+        Method that durably appends the status of the given video to the journal
+        :param video_id: a YouTube Video ID
+        :param status: DOWNLOADED, UNAVAILABLE, or FAILED
+        :param video_details: the details of the video (only if it has been downloaded)
+        :param error: the error that occurred (only if it failed)
+        :return:
+        """
+        if self.file is None:
+            self.file = open(self.JOURNAL_FILENAME, mode='a')
+        record = {'video_id': video_id, 'status': status, 'time': time.strftime('%Y-%m-%d %H:%M:%S')}
+        if video_details is not None:
+            record['video'] = video_details
+        if error is not None:
+            record['error'] = str(error)
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.statuses[video_id] = status
+        self.session_counts[status] += 1
+        return
+
+    def iterate_downloaded_videos(self):
+        """
+        Method that streams the details of the downloaded videos in the order they were downloaded
+        :return: a generator of the details of each downloaded video
+        """
+        if not os.path.isfile(self.JOURNAL_FILENAME):
+            return
+        if self.file is not None:
+            self.file.flush()
+        with open(self.JOURNAL_FILENAME, mode='r') as file:
+            for line in file:
+                record = json.loads(line)
+                if record['status'] == self.DOWNLOADED and 'video' in record:
+                    yield record['video']
+        return
+
+    def get_summary(self):
+        """
+        Method that returns the number of videos of each status, in total and in the current session
+        :return: a dict with the 'total' and the 'session' counts
+        """
+        total_counts = {self.DOWNLOADED: 0, self.UNAVAILABLE: 0, self.FAILED: 0}
+        for status in self.statuses.values():
+            total_counts[status] += 1
+        return {'total': total_counts, 'session': dict(self.session_counts)}
+
+    def get_summary_message(self):
+        """
+        Method that returns a printable summary of the journal
+        :return:
+        """
+        summary = self.get_summary()
+        return 'DOWNLOADED: {0} | UNAVAILABLE: {1} | FAILED: {2} (this run: downloaded {3}, unavailable {4}, failed {5}, skipped {6})'.format(
+            summary['total'][self.DOWNLOADED], summary['total'][self.UNAVAILABLE], summary['total'][self.FAILED],
+            summary['session'][self.DOWNLOADED], summary['session'][self.UNAVAILABLE], summary['session'][self.FAILED], summary['session']['skipped'])
+
+    def close(self):
+        """
+        Method that closes the journal file
+        :return:
+        """
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        return
@@ -0,0 +1,246 @@
+#!/usr/bin/python
+
+import os
+import sys
+import json
+import zlib
+import fcntl
+import threading
+from youtubehelpers.config.YouTubeAPIConfig import Config
+
+
+class PackedCorpusStore(object):
+    """
+    Class that implements a sharded, append-only store of the downloaded files of each video (e.g., comments or
+    transcripts) instead of one directory per video. Each video id is assigned to a shard (CRC32 of the id), and
+    each shard consists of:
+        - a few segment files (shard-SSS-YYYY.seg) where the content of each video is appended
+        - an index file (shard-SSS.idx) with a line 'video_id<TAB>segment<TAB>offset<TAB>length' for each put
+    The index of a shard is loaded into memory once and followed incrementally: each lookup only checks whether
+    the index file has grown (a stat call) before an O(1) in-memory lookup. A new put of an existing video
+    appends its new content and the last index entry wins.
+    Data is appended before its index entry, so an interrupted put never exposes a partially written record.
+    Puts are serialized with an exclusive lock on the index file of the shard, so multiple threads and processes
+    can write to the same store.
+    """
+    def __init__(self, corpus_dir, total_shards=Config.PACKED_STORE_SHARDS, max_segment_size=Config.PACKED_STORE_MAX_SEGMENT_SIZE):
+        """
+        Constructor
+        :param corpus_dir: the directory of the store
+        :param total_shards: the number of shards of a new store (existing stores keep their number of shards)
+        :param max_segment_size: the size (in bytes) after which a new segment file is created for a shard
+        """
+        self.CORPUS_DIR = corpus_dir
+        self.MAX_SEGMENT_SIZE = max_segment_size
+        self.STORE_FILENAME = '{0}/store.json'.format(corpus_dir)
+
+        # Read the number of shards of an existing store
+        self.TOTAL_SHARDS = total_shards
+        if os.path.isfile(self.STORE_FILENAME):
+            with open(self.STORE_FILENAME, mode='r') as file:
+                self.TOTAL_SHARDS = json.load(file)['shards']
+
+        # In-memory index of each shard: video id => (segment, offset, length)
+        self.shard_indices = dict()
+        self.shard_index_offsets = dict()  # shard => number of bytes of the index file already loaded
+        self.shard_segments = dict()  # shard => (last segment, its size)
+        self.lock = threading.Lock()
+        return
+
+    def get_shard(self, video_id):
+        """
+        Method that returns the shard of the given video id
+        :param video_id: a YouTube Video ID
+        :return: the shard number
+        """
+        return zlib.crc32(video_id.encode('utf-8')) % self.TOTAL_SHARDS
+
+    def get_index_filename(self, shard):
+        """
+        Method that returns the filename of the index of the given shard
+        :param shard: the shard number
+        :return:
+        """
+        return '{0}/shard-{1:03d}.idx'.format(self.CORPUS_DIR, shard)
+
+    def get_segment_filename(self, shard, segment):
+        """
+        Method that returns the filename of the given segment of the given shard
+        :param shard: the shard number
+        :param segment: the segment number
+        :return:
+        """
+        return '{0}/shard-{1:03d}-{2:04d}.seg'.format(self.CORPUS_DIR, shard, segment)
+
+    def refresh_shard_index(self, shard):
+        """
+        Method that loads the index entries of the given shard that have been appended (by any writer) since the last call
+        :param shard: the shard number
+        :return: the in-memory index of the shard
+        """
+        with self.lock:
+            shard_index = self.shard_indices.setdefault(shard, dict())
+            index_offset = self.shard_index_offsets.get(shard, 0)
+            try:
+                with open(self.get_index_filename(shard=shard), mode='rb') as file:
+                    file.seek(index_offset)
+                    for line in file:
+                        # Ignore a partially written last line (it will be read by the next refresh)
+                        if not line.endswith(b'\n'):
+                            break
+                        index_offset += len(line)
+                        video_id, segment, offset, length = line.decode('utf-8').rstrip('\n').split('\t')
+                        shard_index[video_id] = (int(segment), int(offset), int(length))
+                        if shard not in self.shard_segments or int(segment) >= self.shard_segments[shard][0]:
+                            self.shard_segments[shard] = (int(segment), int(offset) + int(length))
+            except FileNotFoundError:
+                pass
+            self.shard_index_offsets[shard] = index_offset
+        return shard_index
+
+    def get_entry(self, video_id):
+        """
+        Method that returns the index entry of the given video id
+        :param video_id: a YouTube Video ID
+        :return: (segment, offset, length) or None if the video does not exist in the store
+        """
+        shard = self.get_shard(video_id=video_id)
+        try:
+            index_size = os.path.getsize(self.get_index_filename(shard=shard))
+        except OSError:
+            index_size = 0
+        if shard not in self.shard_indices or index_size > self.shard_index_offsets.get(shard, 0):
+            # Follow the entries that other writers have appended (e.g., a new put of the same video)
+            return self.refresh_shard_index(shard=shard).get(video_id)
+        return self.shard_indices[shard].get(video_id)
+
+    def contains(self, video_id):
+        """
+        Method that checks whether the given video exists in the store
+        :param video_id: a YouTube Video ID
+        :return: True if it exists, False otherwise
+        """
+        return self.get_entry(video_id=video_id) is not None
+
+    def put(self, video_id, data):
+        """
+        Method that appends the content of the given video to the store
+        :param video_id: a YouTube Video ID
+        :param data: the content as bytes or str (UTF-8 encoded)
+        :return:
+        """
+        if '\t' in video_id or '\n' in video_id:
+            raise ValueError('Invalid video id: {0!r}'.format(video_id))
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if not os.path.isdir(self.CORPUS_DIR):
+            os.makedirs(self.CORPUS_DIR, exist_ok=True)
+        if not os.path.isfile(self.STORE_FILENAME):
+            with open(self.STORE_FILENAME, mode='w') as file:
+                json.dump({'shards': self.TOTAL_SHARDS}, file)
+
+        shard = self.get_shard(video_id=video_id)
+        with open(self.get_index_filename(shard=shard), mode='ab') as index_file:
+            fcntl.flock(index_file, fcntl.LOCK_EX)
+            try:
+                # Get the current last segment of the shard (other writers may have appended to it)
+                self.refresh_shard_index(shard=shard)
+                segment, segment_size = self.shard_segments.get(shard, (0, 0))
+                segment_filename = self.get_segment_filename(shard=shard, segment=segment)
+                if os.path.isfile(segment_filename):
+                    segment_size = os.path.getsize(segment_filename)
+                if segment_size > 0 and segment_size + len(data) > self.MAX_SEGMENT_SIZE:
+                    segment, segment_size = segment + 1, 0
+                    segment_filename = self.get_segment_filename(shard=shard, segment=segment)
+
+                # Append the data and then its index entry
+                with open(segment_filename, mode='ab') as segment_file:
+                    offset = segment_file.seek(0, os.SEEK_END)
+                    segment_file.write(data)
+                index_file.write('{0}\t{1}\t{2}\t{3}\n'.format(video_id, segment, offset, len(data)).encode('utf-8'))
+                index_file.flush()
+            finally:
+                fcntl.flock(index_file, fcntl.LOCK_UN)
+        self.refresh_shard_index(shard=shard)
+        return
+
+    def get(self, video_id):
+        """
+        Method that returns the content of the given video
+        :param video_id: a YouTube Video ID
+        :return: the content as bytes or None if the video does not exist in the store
+        """
+        entry = self.get_entry(video_id=video_id)
+        if entry is None:
+            return None
+        segment, offset, length = entry
+        with open(self.get_segment_filename(shard=self.get_shard(video_id=video_id), segment=segment), mode='rb') as file:
+            file.seek(offset)
+            return file.read(length)
+
+    def iterate_lines(self, video_id):
+        """
+        Method that streams the lines of the content of the given video without reading it all in memory
+        :param video_id: a YouTube Video ID
+        :return: a generator of the (UTF-8 decoded) lines of the content, or an empty generator if the video does not exist
+        """
+        entry = self.get_entry(video_id=video_id)
+        if entry is None:
+            return
+        segment, offset, length = entry
+        with open(self.get_segment_filename(shard=self.get_shard(video_id=video_id), segment=segment), mode='rb') as file:
+            file.seek(offset)
+            while length > 0:
+                line = file.readline(length)
+                if not line:
+                    break
+                length -= len(line)
+                yield line.decode('utf-8')
+        return
+
+    def get_total_videos(self):
+        """
+        Method that returns the number of videos in the store
+        :return:
+        """
+        return sum(len(self.refresh_shard_index(shard=shard)) for shard in range(self.TOTAL_SHARDS))
+
+    def migrate(self, source_dir, filename_suffix, delete_source=False):
+        """
+        Method that migrates the files of the one-directory-per-video layout (source_dir/<video_id>/<video_id><suffix>)
+        to the store. Videos that already exist in the store are skipped, hence the migration can be resumed
+        :param source_dir: the base directory of the existing layout (e.g., videosdata/comments)
+        :param filename_suffix: the suffix of the file of each video (e.g., '.json' or '.en.vtt')
+        :param delete_source: whether to delete the migrated files and the emptied video directories
+        :return: the number of migrated videos
+        """
+        total_migrated = 0
+        for video_dir in os.scandir(source_dir):
+            if not video_dir.is_dir():
+                continue
+            video_id = video_dir.name
+            video_filename = '{0}/{1}{2}'.format(video_dir.path, video_id, filename_suffix)
+            if not os.path.isfile(video_filename):
+                continue
+            if not self.contains(video_id=video_id):
+                with open(video_filename, mode='rb') as file:
+                    self.put(video_id=video_id, data=file.read())
+                total_migrated += 1
+                if total_migrated % 10000 == 0:
+                    print('--- [{0}] MIGRATED: {1} videos'.format(self.CORPUS_DIR, total_migrated))
+            if delete_source:
+                os.remove(video_filename)
+                if len(os.listdir(video_dir.path)) == 0:
+                    os.rmdir(video_dir.path)
+        return total_migrated
+
+
+if __name__ == '__main__':
+    # Migrate the downloaded files of the one-directory-per-video layout to the packed store, e.g.:
+    # PYTHONPATH=src python -m youtubehelpers.PackedCorpusStore videosdata/comments .json [--delete]
+    # PYTHONPATH=src python -m youtubehelpers.PackedCorpusStore videosdata/transcript .en.vtt [--delete]
+    if len(sys.argv) < 3:
+        exit('Usage: PYTHONPATH=src python -m youtubehelpers.PackedCorpusStore <source_dir> <filename_suffix> [--delete]')
+    packed_store = PackedCorpusStore(corpus_dir=sys.argv[1].rstrip('/'))
+    total_migrated_videos = packed_store.migrate(source_dir=sys.argv[1], filename_suffix=sys.argv[2], delete_source='--delete' in sys.argv[3:])
+    print('[INFO] Migrated {0} videos | Total videos in the store: {1}'.format(total_migrated_videos, packed_store.get_total_videos()))
@@ -0,0 +1,62 @@
+#!/usr/bin/python
+
+import threading
+from youtubehelpers.config.YouTubeAPIConfig import Config
+from youtubehelpers.TokenBucket import TokenBucket
+
+
+class RateLimiter(object):
+    """
+    Class that rate limits the requests of the YouTube Video Downloaders with a token bucket for each endpoint
+    (e.g., videos.list, commentThreads.list, or transcript) and each API Key, so that the quota of each API Key
+    is shared by all the download threads. Requests to endpoints without a rate limit are only counted.
+    """
+    def __init__(self, rate_limits=Config.RATE_LIMITS):
+        """
+        Constructor
+        :param rate_limits: a dict of endpoint => (requests per second, maximum burst)
+        """
+        self.RATE_LIMITS = rate_limits
+        self.buckets = dict()  # (api key, endpoint) => TokenBucket
+        self.stats = dict()  # endpoint => {'requests', 'waited'}
+        self.lock = threading.Lock()
+        return
+
+    def get_bucket(self, endpoint, api_key):
+        """
+        Method that returns the token bucket of the given endpoint and API Key
+        :param endpoint: the name of the endpoint
+        :param api_key: the YouTube Data API Key
+        :return: a TokenBucket or None if the endpoint is not rate limited
+        """
+        if endpoint not in self.RATE_LIMITS:
+            return None
+        with self.lock:
+            if (api_key, endpoint) not in self.buckets:
+                rate, capacity = self.RATE_LIMITS[endpoint]
+                self.buckets[(api_key, endpoint)] = TokenBucket(rate=rate, capacity=capacity)
+            return self.buckets[(api_key, endpoint)]
+
+    def acquire(self, endpoint, api_key=None, requests=1):
+        """
+        Method that blocks until the given number of requests to the given endpoint are allowed
+        :param endpoint: the name of the endpoint
+        :param api_key: the YouTube Data API Key used for the requests
+        :param requests: the number of requests
+        :return: the time (in seconds) waited
+        """
+        bucket = self.get_bucket(endpoint=endpoint, api_key=api_key)
+        waited = bucket.acquire(tokens=requests) if bucket is not None else 0.0
+        with self.lock:
+            endpoint_stats = self.stats.setdefault(endpoint, {'requests': 0, 'waited': 0.0})
+            endpoint_stats['requests'] += requests
+            endpoint_stats['waited'] += waited
+        return waited
+
+    def get_stats(self):
+        """
+        Method that returns the number of requests and the time waited for each endpoint
+        :return: a dict of endpoint => {'requests', 'waited'}
+        """
+        with self.lock:
+            return {endpoint: dict(endpoint_stats) for endpoint, endpoint_stats in self.stats.items()}
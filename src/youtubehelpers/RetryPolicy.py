@@ -0,0 +1,175 @@
+#!/usr/bin/python
+
+import json
+import time
+import random
+import threading
+import requests
+from googleapiclient.errors import HttpError
+from youtubehelpers.config.YouTubeAPIConfig import Config
+
+
+class QuotaExceededError(Exception):
+    """
+    Exception raised when the quota of the YouTube Data API Key has been exhausted
+    """
+    pass
+
+
+class RetryPolicy(object):
+    """
+    Class that retries the requests to the YouTube Data API (and the other endpoints used by the downloaders)
+    according to the class of each error:
+        - transient (e.g., connection errors, timeouts, 5xx, 429, or rateLimitExceeded): retried with exponential
+          backoff and full jitter, up to MAX_ATTEMPTS attempts or until the DEADLINE of the request has passed
+        - quota (e.g., quotaExceeded or dailyLimitExceeded): not retried, a QuotaExceededError is raised since
+          the quota will not be reset for hours
+        - permanent (e.g., 400, 403, or 404): not retried, the error is raised
+    It also keeps the number of requests, retries, and failures and the latency of each endpoint. A RetryPolicy
+    can be shared by the downloaders of multiple threads.
+    """
+    # Error classes
+    TRANSIENT = 'transient'
+    QUOTA = 'quota'
+    PERMANENT = 'permanent'
+
+    # Reasons of the YouTube Data API errors
+    QUOTA_REASONS = ('quotaExceeded', 'dailyLimitExceeded', 'dailyLimitExceededUnreg')
+    RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+    # HTTP status codes of transient errors (besides 5xx)
+    TRANSIENT_STATUSES = (408, 429)
+
+    def __init__(self, max_attempts=Config.RETRY_MAX_ATTEMPTS, deadline=Config.RETRY_DEADLINE,
+                 base_delay=Config.RETRY_BASE_DELAY, max_delay=Config.RETRY_MAX_DELAY):
+        """
+        Constructor
+        :param max_attempts: the maximum number of attempts of a request
+        :param deadline: the maximum time (in seconds) spent on a request, including the retries
+        :param base_delay: the maximum delay (in seconds) before the first retry
+        :param max_delay: the maximum delay (in seconds) before any retry
+        """
+        self.MAX_ATTEMPTS = max_attempts
+        self.DEADLINE = deadline
+        self.BASE_DELAY = base_delay
+        self.MAX_DELAY = max_delay
+
+        # Statistics of each endpoint
+        self.stats = dict()
+        self.lock = threading.Lock()
+        return
+
+    @staticmethod
+    def get_error_reasons(content):
+        """
+        Method that returns the reasons of an error response of the YouTube Data API
+        :param content: the body of the error response (bytes, str, or an already decoded dict)
+        :return: a list with the reasons of the error
+        """
+        try:
+            error_response = json.loads(content) if isinstance(content, (bytes, str)) else content
+            return [error.get('reason') for error in error_response['error'].get('errors', list())]
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return list()
+
+    def classify_status(self, status, reasons):
+        """
+        Method that classifies an HTTP error given its status code and its reasons
+        :param status: the HTTP status code
+        :param reasons: a list with the reasons of the error
+        :return: TRANSIENT, QUOTA, or PERMANENT
+        """
+        if any(reason in self.QUOTA_REASONS for reason in reasons):
+            return self.QUOTA
+        if any(reason in self.RATE_LIMIT_REASONS for reason in reasons) or status in self.TRANSIENT_STATUSES or status >= 500:
+            return self.TRANSIENT
+        return self.PERMANENT
+
+    def classify(self, error):
+        """
+        Method that classifies the given error of a request
+        :param error: an exception
+        :return: TRANSIENT, QUOTA, or PERMANENT
+        """
+        if isinstance(error, QuotaExceededError):
+            return self.QUOTA
+        if isinstance(error, HttpError):
+            return self.classify_status(status=int(error.resp.status), reasons=self.get_error_reasons(content=error.content))
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return self.classify_status(status=error.response.status_code, reasons=self.get_error_reasons(content=error.response.content))
+        # Connection errors and timeouts (socket errors and the requests' connection errors are OSErrors)
+        if isinstance(error, OSError):
+            return self.TRANSIENT
+        return self.PERMANENT
+
+    def get_delay(self, attempt):
+        """
+        Method that returns the delay before the given retry (exponential backoff with full jitter)
+        :param attempt: the number of the failed attempt (starting from 1)
+        :return: the delay in seconds
+        """
+        return random.uniform(0, min(self.MAX_DELAY, self.BASE_DELAY * 2 ** (attempt - 1)))
+
+    def update_stats(self, endpoint, requests=0, retries=0, failures=0, latency=0.0, error_class=None):
+        """
+        Method that updates the counters of the given endpoint
+        :param endpoint: the name of the endpoint
+        :param requests: the number of requests sent (including the retries)
+        :param retries: the number of retries
+        :param failures: the number of requests that failed after all their attempts
+        :param latency: the time spent waiting for the responses
+        :param error_class: the class of an error that occurred
+        :return:
+        """
+        with self.lock:
+            endpoint_stats = self.stats.setdefault(endpoint, {'requests': 0, 'retries': 0, 'failures': 0, 'latency': 0.0,
+                                                              self.TRANSIENT: 0, self.QUOTA: 0, self.PERMANENT: 0})
+            endpoint_stats['requests'] += requests
+            endpoint_stats['retries'] += retries
+            endpoint_stats['failures'] += failures
+            endpoint_stats['latency'] += latency
+            if error_class is not None:
+                endpoint_stats[error_class] += 1
+        return
+
+    def get_stats(self):
+        """
+        Method that returns the statistics of each endpoint, i.e., the number of requests, retries, failures, errors
+        of each class, and the total and average latency of the requests
+        :return: a dict of endpoint => statistics
+        """
+        with self.lock:
+            return {endpoint: dict(endpoint_stats, average_latency=endpoint_stats['latency'] / endpoint_stats['requests'] if endpoint_stats['requests'] > 0 else 0.0)
+                    for endpoint, endpoint_stats in self.stats.items()}
+
+    def call(self, endpoint, function):
+        """
+        Method that calls the given function (that sends a request) and retries it according to the class of its errors
+        :param endpoint: the name of the endpoint (e.g., 'videos.list')
+        :param function: a function without arguments that sends the request and returns its response
+        :return: the response
+        """
+        started_at = time.time()
+        attempt = 0
+        while True:
+            attempt += 1
+            request_started_at = time.time()
+            try:
+                response = function()
+                self.update_stats(endpoint=endpoint, requests=1, latency=time.time() - request_started_at)
+                return response
+            except Exception as error:
+                error_class = self.classify(error=error)
+                self.update_stats(endpoint=endpoint, requests=1, latency=time.time() - request_started_at, error_class=error_class)
+
+                # Give up on quota and permanent errors and when the attempts or the deadline have been exhausted
+                delay = self.get_delay(attempt=attempt)
+                if error_class != self.TRANSIENT or attempt >= self.MAX_ATTEMPTS or time.time() + delay - started_at > self.DEADLINE:
+                    self.update_stats(endpoint=endpoint, failures=1)
+                    print('--- [{0}] {1} error, giving up after {2} attempt(s). [ERROR]: {3}'.format(endpoint, error_class.upper(), attempt, error))
+                    if error_class == self.QUOTA and not isinstance(error, QuotaExceededError):
+                        raise QuotaExceededError('Quota exceeded for {0}: {1}'.format(endpoint, error)) from error
+                    raise
+
+                print('--- [{0}] {1} error (attempt {2}/{3}), retrying in {4:.1f}s. [ERROR]: {5}'.format(endpoint, error_class.upper(), attempt, self.MAX_ATTEMPTS, delay, error))
+                self.update_stats(endpoint=endpoint, retries=1)
+                time.sleep(delay)
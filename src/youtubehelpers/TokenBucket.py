@@ -0,0 +1,44 @@
+#!/usr/bin/python
+
+import time
+import threading
+
+
+class TokenBucket(object):
+    """
+    Class that implements a thread-safe token bucket rate limiter. The bucket is refilled with RATE tokens
+    per second up to CAPACITY tokens (the maximum burst) and each request takes one token, blocking until
+    enough tokens are available. A request of more tokens than the capacity is served once the bucket is full
+    and leaves the bucket in debt, so that the following requests wait until it is repaid.
+    """
+    def __init__(self, rate, capacity):
+        """
+        Constructor
+        :param rate: the number of tokens added per second
+        :param capacity: the maximum number of tokens of the bucket
+        """
+        self.RATE = float(rate)
+        self.CAPACITY = float(capacity)
+        self.tokens = self.CAPACITY
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+        return
+
+    def acquire(self, tokens=1):
+        """
+        Method that takes the given number of tokens from the bucket, blocking until they are available
+        :param tokens: the number of tokens (requests)
+        :return: the time (in seconds) waited for the tokens
+        """
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.CAPACITY, self.tokens + (now - self.updated_at) * self.RATE)
+                self.updated_at = now
+                if self.tokens >= min(tokens, self.CAPACITY):
+                    self.tokens -= tokens
+                    return waited
+                wait_time = (min(tokens, self.CAPACITY) - self.tokens) / self.RATE
+            time.sleep(wait_time)
+            waited += wait_time
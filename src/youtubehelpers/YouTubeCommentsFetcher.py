@@ -0,0 +1,127 @@
+#!/usr/bin/python
+
+import json
+import requests
+from youtubehelpers.config.YouTubeAPIConfig import Config
+from youtubehelpers.RetryPolicy import RetryPolicy
+
+
+class YouTubeCommentsFetcher(object):
+    """
+    Class that downloads the comment threads of YouTube Videos using the commentThreads endpoint of the YouTube
+    Data API. All the requests are sent through a single keep-alive requests.Session, hence the connection
+    (and TLS session) to the API is reused across pages and Videos. A fetcher is not thread-safe, so each
+    thread should use its own fetcher.
+    """
+    COMMENT_THREADS_URL = 'https://www.googleapis.com/youtube/v3/commentThreads'
+
+    def __init__(self, api_key, max_pages=Config.LIMIT_PAGES_COMMENTS + 1, rate_limiter=None, retry_policy=None, response_cache=None, timeout=Config.COMMENTS_REQUEST_TIMEOUT):
+        """
+        Constructor
+        :param api_key: the YouTube Data API Key
+        :param max_pages: the default maximum number of pages (up to 100 comment threads each) downloaded for each Video
+        :param rate_limiter: a RateLimiter of the requests (optional)
+        :param retry_policy: a RetryPolicy of the failed requests (by default, one with the retry configuration)
+        :param response_cache: an APIResponseCache of the responses (optional)
+        :param timeout: the timeout (in seconds) of each request
+        """
+        self.API_KEY = api_key
+        self.MAX_PAGES = max_pages
+        self.RATE_LIMITER = rate_limiter
+        self.RETRY_POLICY = retry_policy if retry_policy is not None else RetryPolicy()
+        self.RESPONSE_CACHE = response_cache
+        self.TIMEOUT = timeout
+        self.session = requests.Session()
+        return
+
+    def close(self):
+        """
+        Method that closes the connections of the session
+        :return:
+        """
+        self.session.close()
+        return
+
+    def send_comments_request(self, video_id, page_token):
+        """
+        Method that sends a single request for the given page of comment threads of the given YouTube Video,
+        unless its response is cached
+        :param video_id: a YouTube Video ID
+        :param page_token: the token of the page ('' for the first page)
+        :return: the response of the API as a dict
+        """
+        parameters = {
+            'pageToken': page_token,
+            'part': 'snippet,replies',
+            'maxResults': 100,
+            'videoId': video_id,
+            'key': self.API_KEY,
+            'order': 'relevance',
+        }
+        cache_key = None
+        if self.RESPONSE_CACHE is not None:
+            cache_key = self.RESPONSE_CACHE.get_key(endpoint='commentThreads.list', parameters=parameters)
+            content = self.RESPONSE_CACHE.get(endpoint='commentThreads.list', key=cache_key)
+            if content is not None:
+                return json.loads(content)
+
+        if self.RATE_LIMITER is not None:
+            self.RATE_LIMITER.acquire(endpoint='commentThreads.list', api_key=self.API_KEY)
+        response = self.session.get(self.COMMENT_THREADS_URL, params=parameters, timeout=self.TIMEOUT)
+        response.raise_for_status()
+        comments_page = response.json()
+        if cache_key is not None:
+            self.RESPONSE_CACHE.put(endpoint='commentThreads.list', key=cache_key, content=response.content)
+        return comments_page
+
+    def get_comments_page(self, video_id, page_token=''):
+        """
+        Method that requests the given page of comment threads of the given YouTube Video, retrying it according
+        to the Retry Policy. Permanent errors (e.g., the comments are disabled or the Video does not exist) return
+        the error response, which does not have any items
+        QUOTA COST: 1 per page
+        :param video_id: a YouTube Video ID
+        :param page_token: the token of the page ('' for the first page)
+        :return: the response of the API as a dict
+        """
+        try:
+            return self.RETRY_POLICY.call(endpoint='commentThreads.list', function=lambda: self.send_comments_request(video_id=video_id, page_token=page_token))
+        except requests.HTTPError as error:
+            if self.RETRY_POLICY.classify(error=error) != RetryPolicy.PERMANENT:
+                raise
+            return error.response.json()
+
+    def iterate_comment_threads(self, video_id, max_pages=None):
+        """
+        Method that streams the comment threads of the given YouTube Video, page by page
+        :param video_id: a YouTube Video ID
+        :param max_pages: the maximum number of pages (by default, MAX_PAGES)
+        :return: a generator of the comment threads (dicts) in the order returned by the API
+        """
+        max_pages = max_pages if max_pages is not None else self.MAX_PAGES
+        page_token = ''
+        for _ in range(max_pages):
+            comments_page = self.get_comments_page(video_id=video_id, page_token=page_token)
+            # Error responses (e.g., comments are disabled) do not have any items
+            for comment_thread in comments_page.get('items', list()):
+                yield comment_thread
+            page_token = comments_page.get('nextPageToken', '')
+            if page_token == '':
+                break
+        return
+
+    def download_video_comments(self, video_id, filename, max_pages=None):
+        """
+        Method that appends the comment threads of the given YouTube Video to the given file (one JSON per line).
+        The file is created even if the Video has no comments
+        :param video_id: a YouTube Video ID
+        :param filename: the file to append the comment threads
+        :param max_pages: the maximum number of pages (by default, MAX_PAGES)
+        :return: the number of comment threads written
+        """
+        total_comment_threads = 0
+        with open(filename, mode='a', encoding='utf-8') as file:
+            for comment_thread in self.iterate_comment_threads(video_id=video_id, max_pages=max_pages):
+                file.write(json.dumps(comment_thread) + '\n')
+                total_comment_threads += 1
+        return total_comment_threads
@@ -1,12 +1,21 @@
 #!/usr/bin/python
 
 from youtubehelpers.config.YouTubeAPIConfig import Config
+from youtubehelpers.PackedCorpusStore import PackedCorpusStore
+from youtubehelpers.YouTubeCommentsFetcher import YouTubeCommentsFetcher
+from youtubehelpers.RetryPolicy import RetryPolicy
+from youtubehelpers.APIResponseCache import APIResponseCache
+from youtubehelpers.CachingHttp import CachingHttp
 from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from socket import error as SocketError
-import time
+from googleapiclient.http import build_http
 import os
+import json
+import requests
+import copy
+import itertools
 import glob
+import shutil
+import tempfile
 import subprocess
 
 
@@ -15,7 +24,14 @@ class YouTubeVideoDownloader(object):
     Class that downloads among other information, the following required for classification metadata
     of YouTube videos: 1) Video Snippet; 2) Video Tags; 3) Video Transcript; and 4) Video Comments.
     """
-    def __init__(self):
+    def __init__(self, rate_limiter=None, retry_policy=None, response_cache=None):
+        """
+        Constructor
+        :param rate_limiter: a RateLimiter shared by all the downloaders (e.g., of concurrent download threads)
+        :param retry_policy: a RetryPolicy of the failed requests (by default, one with the retry configuration)
+        :param response_cache: an APIResponseCache of the YouTube Data API responses (by default, one with the
+                               cache configuration if the cache is enabled)
+        """
         """ YouTube API Configuration """
         # Ensure that the YouTube Data API Key is correctly set
         if Config.YOUTUBE_DATA_API_KEY == 'YOUR_YOUTUBE_DATA_API_KEY':
@@ -25,7 +41,17 @@ class YouTubeVideoDownloader(object):
         self.YOUTUBE_API_SERVICE_NAME = Config.YOUTUBE_API_SERVICE_NAME
         self.YOUTUBE_API_VERSION = Config.YOUTUBE_API_VERSION
         self.YOUTUBE_API_KEY = Config.YOUTUBE_DATA_API_KEY
-        self.YOUTUBE_API = build(self.YOUTUBE_API_SERVICE_NAME, self.YOUTUBE_API_VERSION, developerKey=self.YOUTUBE_API_KEY)
+        self.RESPONSE_CACHE = response_cache
+        if self.RESPONSE_CACHE is None and Config.RESPONSE_CACHE_ENABLED:
+            self.RESPONSE_CACHE = APIResponseCache()
+        # Serve the requests of the client from the Response Cache (if it is enabled)
+        self.YOUTUBE_API_HTTP = CachingHttp(response_cache=self.RESPONSE_CACHE, http=build_http()) if self.RESPONSE_CACHE is not None else None
+        self.YOUTUBE_API = build(self.YOUTUBE_API_SERVICE_NAME, self.YOUTUBE_API_VERSION, developerKey=self.YOUTUBE_API_KEY, http=self.YOUTUBE_API_HTTP)
+        self.RATE_LIMITER = rate_limiter
+        self.RETRY_POLICY = retry_policy if retry_policy is not None else RetryPolicy()
+
+        # Video Comments fetcher (keeps its connection to the YouTube Data API alive across Videos)
+        self.COMMENTS_FETCHER = YouTubeCommentsFetcher(api_key=self.YOUTUBE_API_KEY, rate_limiter=rate_limiter, retry_policy=self.RETRY_POLICY, response_cache=self.RESPONSE_CACHE)
 
         """ HTTPS PROXIES """
         self.HTTPS_PROXY_COUNTER = 0
@@ -38,6 +64,12 @@ class YouTubeVideoDownloader(object):
         """ Data Directories """
         self.VIDEO_TRANSCRIPT_BASE_DIR = 'videosdata/transcript'
         self.VIDEO_COMMENTS_BASE_DIR = 'videosdata/comments'
+
+        # Packed Corpus Stores of the downloaded comments and transcripts
+        self.COMMENTS_STORE, self.TRANSCRIPTS_STORE = None, None
+        if Config.PACKED_STORE_ENABLED:
+            self.COMMENTS_STORE = PackedCorpusStore(corpus_dir=self.VIDEO_COMMENTS_BASE_DIR)
+            self.TRANSCRIPTS_STORE = PackedCorpusStore(corpus_dir=self.VIDEO_TRANSCRIPT_BASE_DIR)
         return
 
     @staticmethod
@@ -60,6 +92,17 @@ class YouTubeVideoDownloader(object):
                 return False
         return True
 
+    def wait_for_rate_limit(self, endpoint, requests=1):
+        """
+        Method that blocks until the given number of requests to the given endpoint are allowed by the Rate Limiter
+        :param endpoint: 'videos.list', 'search.list', 'commentThreads.list', or 'transcript'
+        :param requests: the number of requests
+        :return:
+        """
+        if self.RATE_LIMITER is not None:
+            self.RATE_LIMITER.acquire(endpoint=endpoint, api_key=self.YOUTUBE_API_KEY, requests=requests)
+        return
+
     def change_https_proxy(self, force_change=False):
         """
         Method that changes the HTTPS Proxy used
@@ -75,33 +118,39 @@ class YouTubeVideoDownloader(object):
             self.HTTPS_PROXY = Config.HTTPS_PROXIES_LIST[self.HTTPS_PROXY_USED]
         return
 
+    def execute_api_request(self, endpoint, request):
+        """
+        Method that executes a request of the YouTube Data API within the rate limits of the given endpoint,
+        retrying it according to the Retry Policy. Requests served by the Response Cache are not rate limited
+        :param endpoint: the name of the endpoint (e.g., 'videos.list')
+        :param request: a request of the YouTube Data API client
+        :return: the response of the request
+        """
+        def execute_request():
+            if self.YOUTUBE_API_HTTP is None or not self.YOUTUBE_API_HTTP.is_cached(uri=request.uri, method=request.method):
+                self.wait_for_rate_limit(endpoint=endpoint)
+            return request.execute()
+        return self.RETRY_POLICY.call(endpoint=endpoint, function=execute_request)
+
     def get_recommended_videos(self, video_id):
         """
         Method to retrieve the recommended videos (IDs) of a given a video
         :param video_id: the YouTube Video ID to get its related videos
         :return: a list of YouTube Video IDs
         """
-        # Declare global and other variables
+        response = self.execute_api_request(endpoint='search.list', request=self.YOUTUBE_API.search().list(
+            relatedToVideoId=video_id,
+            type="video",
+            part="id",
+            relevanceLanguage="en",
+            maxResults=Config.RECOMMENDED_VIDEOS_THRESHOLD
+        ))
+
+        # Get related video ides in an array
         related_video_ids = list()
-        while True:
-            # Try to Send the HTTP Request
-            try:
-                response = self.YOUTUBE_API.search().list(
-                    relatedToVideoId=video_id,
-                    type="video",
-                    part="id",
-                    relevanceLanguage="en",
-                    maxResults=Config.RECOMMENDED_VIDEOS_THRESHOLD
-                ).execute()
-
-                # Get related video ides in an array
-                for i in response['items']:
-                    related_video_ids.append(i['id']['videoId'])
-                return related_video_ids
-            except (HttpError, SocketError) as error:
-                print('--- HTTP Error occurred while retrieving related all_videos for VideoID: {}. [ERROR]: {}'.format(video_id, error))
-                # Sleep for 30 seconds Change API KEY
-                time.sleep(30)
+        for i in response['items']:
+            related_video_ids.append(i['id']['videoId'])
+        return related_video_ids
 
     def search_youtube(self, search_term, max_search_results):
         """
@@ -109,27 +158,67 @@ class YouTubeVideoDownloader(object):
         returns the Video IDs of the top X videos
         :return:
         """
-        # Search YouTube
+        # Call the search.list method to retrieve results matching the specified search term.
+        search_response = self.execute_api_request(endpoint='search.list', request=self.YOUTUBE_API.search().list(
+            q=search_term,
+            type="video",
+            part="id",
+            maxResults=max_search_results,
+            relevanceLanguage='en'
+        ))
+
+        # Merge video ids
         search_result_videos = list()
+        for search_result in search_response.get("items", []):
+            search_result_videos.append(search_result["id"]["videoId"])
+        return search_result_videos
+
+    def add_recommended_videos(self, video_metadata, retrieve_recommended_videos=None):
+        """
+        Method that adds the recommended videos (IDs) to the metadata of a given video
+        :param video_metadata: the metadata of a YouTube Video
+        :param retrieve_recommended_videos: whether to force the retrieval of the recommended videos of the given YouTube video
+        :return:
+        """
+        if retrieve_recommended_videos is not None and retrieve_recommended_videos:
+            video_metadata['relatedVideos'] = self.get_recommended_videos(video_id=video_metadata['id'])
+        elif Config.RETRIEVE_RECOMMENDED_VIDEOS and retrieve_recommended_videos is None:
+            video_metadata['relatedVideos'] = self.get_recommended_videos(video_id=video_metadata['id'])
+        else:
+            video_metadata['relatedVideos'] = list()
+        return video_metadata
+
+    def download_videos_metadata(self, video_ids, retrieve_recommended_videos=None):
+        """
+        Method that queries the YouTube Data API and retrieves the details of the given videos. The videos are
+        requested in chunks of up to VIDEOS_LIST_MAX_IDS IDs per videos.list request (same quota cost as a single ID)
+        and the returned items are mapped back to the requested IDs
+        :param video_ids: an iterable of YouTube Video IDs
+        :param retrieve_recommended_videos: whether to force the retrieval of the recommended videos of the given YouTube videos
+        :return: a generator of (video_id, video_metadata) tuples in the same order as the given IDs, where
+                 video_metadata is None if the video is not available (e.g., deleted or private)
+        """
+        video_ids = iter(video_ids)
         while True:
-            try:
-                # Call the search.list method to retrieve results matching the specified search term.
-                search_response = self.YOUTUBE_API.search().list(
-                    q=search_term,
-                    type="video",
-                    part="id",
-                    maxResults=max_search_results,
-                    relevanceLanguage='en'
-                ).execute()
-
-                # Merge video ids
-                for search_result in search_response.get("items", []):
-                    search_result_videos.append(search_result["id"]["videoId"])
-                return search_result_videos
-            except (HttpError, SocketError) as error:
-                print('[ERROR] HTTP Error occurred while searching YouTube for: {}'.format(search_term))
-                # Sleep for 30 seconds and change API KEY
-                time.sleep(30)
+            chunk_video_ids = list(itertools.islice(video_ids, Config.VIDEOS_LIST_MAX_IDS))
+            if len(chunk_video_ids) == 0:
+                return
+
+            # Send HTTP Request to get the Videos Info
+            response = self.execute_api_request(endpoint='videos.list', request=self.YOUTUBE_API.videos().list(
+                # part='id,snippet,contentDetails,statistics',
+                part='id,snippet,contentDetails',
+                id=','.join(dict.fromkeys(chunk_video_ids))
+            ))
+
+            # Map the returned Videos to the requested IDs (missing Videos are not available)
+            videos_information = {video_information['id']: video_information for video_information in response.get('items', list())}
+            for video_id in chunk_video_ids:
+                video_metadata = videos_information.get(video_id)
+                if video_metadata is not None:
+                    # Each duplicate ID gets its own copy of the Video Details
+                    video_metadata = self.add_recommended_videos(video_metadata=copy.deepcopy(video_metadata), retrieve_recommended_videos=retrieve_recommended_videos)
+                yield video_id, video_metadata
 
     def download_video_metadata(self, video_id, retrieve_recommended_videos=None):
         """
@@ -138,37 +227,8 @@ class YouTubeVideoDownloader(object):
         :param retrieve_recommended_videos: whether to force the retrieval of the recommended videos of the given YouTube video
         :return:
         """
-        # Send HTTP Request to get Video Info
-        while True:
-            # Send request to get video's information
-            try:
-                response = self.YOUTUBE_API.videos().list(
-                    # part='id,snippet,contentDetails,statistics',
-                    part='id,snippet,contentDetails',
-                    id=video_id
-                ).execute()
-
-                # Get Video Details
-                try:
-                    mainVideoInformation = response['items'][0]
-                except:
-                    return None
-
-                # Retrieve Recommended Videos
-                if retrieve_recommended_videos is not None and retrieve_recommended_videos:
-                    recommended_video_ids = self.get_recommended_videos(video_id=video_id)
-                    mainVideoInformation['relatedVideos'] = recommended_video_ids
-                elif Config.RETRIEVE_RECOMMENDED_VIDEOS and retrieve_recommended_videos is None:
-                    recommended_video_ids = self.get_recommended_videos(video_id=video_id)
-                    mainVideoInformation['relatedVideos'] = recommended_video_ids
-                else:
-                    mainVideoInformation['relatedVideos'] = list()
-                return mainVideoInformation
-            except (HttpError, SocketError) as error:
-                print('--- HTTP Error occurred while retrieving information for VideoID: {0}. [ERROR]: {1}'.format(video_id, error))
-
-                # Sleep for 30 seconds Change API KEY
-                time.sleep(30)
+        for _, video_metadata in self.download_videos_metadata(video_ids=[video_id], retrieve_recommended_videos=retrieve_recommended_videos):
+            return video_metadata
 
     def video_comments_downloaded(self, video_id):
         """
@@ -176,28 +236,45 @@ class YouTubeVideoDownloader(object):
         :param video_id:
         :return:
         """
+        if self.COMMENTS_STORE is not None:
+            return self.COMMENTS_STORE.contains(video_id=video_id)
         if os.path.isfile('{}/{}/{}.json'.format(self.VIDEO_COMMENTS_BASE_DIR, video_id, video_id)):
             return True
         return False
 
-    def download_video_comments(self, video_id):
+    @staticmethod
+    def create_directory(directory):
         """
-        Method that downloads the comments of a given YouTube Video ID
-        :param video_id:
+        Method that creates the given directory (if it does not exist) with 0o777 permissions
+        :param directory:
         :return:
         """
-        comments_dir = '{}/{}'.format(self.VIDEO_COMMENTS_BASE_DIR, video_id)
-
-        # If Comments Base Directory does not exist download it
         original_umask = os.umask(0)
         try:
-            if not os.path.exists(comments_dir):
-                os.makedirs(comments_dir, 0o777)
+            if not os.path.exists(directory):
+                os.makedirs(directory, 0o777)
         finally:
             os.umask(original_umask)
+        return
 
-        # Call the download_video_comments.py script to get the given video_id's comments
-        os.system("python3 src/youtubehelpers/youtubescripts/download_youtube_video_comments.py {0} {1} {2} {3}".format(video_id, comments_dir, Config.LIMIT_PAGES_COMMENTS, self.YOUTUBE_API_KEY))
+    def download_video_comments(self, video_id):
+        """
+        Method that downloads the comments of a given YouTube Video ID (up to LIMIT_PAGES_COMMENTS + 1 pages).
+        If the Packed Corpus Store is enabled, the comments are appended to the store once all of them have been downloaded
+        :param video_id:
+        :return:
+        """
+        try:
+            if self.COMMENTS_STORE is not None:
+                video_comments = ''.join(json.dumps(comment_thread) + '\n' for comment_thread in self.COMMENTS_FETCHER.iterate_comment_threads(video_id=video_id))
+                self.COMMENTS_STORE.put(video_id=video_id, data=video_comments)
+            else:
+                comments_dir = '{}/{}'.format(self.VIDEO_COMMENTS_BASE_DIR, video_id)
+                # If Comments Base Directory does not exist download it
+                self.create_directory(directory=comments_dir)
+                self.COMMENTS_FETCHER.download_video_comments(video_id=video_id, filename='{}/{}.json'.format(comments_dir, video_id))
+        except (requests.RequestException, ValueError) as error:
+            print('--- HTTP Error occurred while downloading the comments of VideoID: {0}. [ERROR]: {1}'.format(video_id, error))
         return
 
     def video_transcript_downloaded(self, video_id):
@@ -206,6 +283,8 @@ class YouTubeVideoDownloader(object):
         :param video_id:
         :return:
         """
+        if self.TRANSCRIPTS_STORE is not None:
+            return self.TRANSCRIPTS_STORE.contains(video_id=video_id)
         video_transcript = glob.glob('{}/{}/{}.*'.format(self.VIDEO_TRANSCRIPT_BASE_DIR, video_id, video_id))
         if len(video_transcript) > 0:
             return True
@@ -213,40 +292,52 @@ class YouTubeVideoDownloader(object):
 
     def download_video_transcript(self, video_id):
         """
-        Method that downloads the transcript of a given YouTube Video
+        Method that downloads the transcript of a given YouTube Video. If the Packed Corpus Store is enabled,
+        the transcript is downloaded in a temporary directory and then its English subtitles are appended to the store
         :param video_id:
         :return:
         """
         video_url = "https://www.youtube.com/watch?v={}".format(video_id)
-        path = "'{0}/{1}/%(id)s.%(ext)s'".format(self.VIDEO_TRANSCRIPT_BASE_DIR, video_id)
-
-        # Create directory where we will store the video's transcript before proceeding
-        original_umask = os.umask(0)
-        try:
-            if not os.path.exists('{}/{}'.format(self.VIDEO_TRANSCRIPT_BASE_DIR, video_id)):
-                os.makedirs('{}/{}'.format(self.VIDEO_TRANSCRIPT_BASE_DIR, video_id), 0o777)
-        finally:
-            os.umask(original_umask)
+        if self.TRANSCRIPTS_STORE is not None:
+            self.create_directory(directory=self.VIDEO_TRANSCRIPT_BASE_DIR)
+            transcript_dir = tempfile.mkdtemp(prefix='.{}-'.format(video_id), dir=self.VIDEO_TRANSCRIPT_BASE_DIR)
+        else:
+            transcript_dir = '{}/{}'.format(self.VIDEO_TRANSCRIPT_BASE_DIR, video_id)
+            # Create directory where we will store the video's transcript before proceeding
+            self.create_directory(directory=transcript_dir)
+        path = "'{0}/%(id)s.%(ext)s'".format(transcript_dir)
 
         # Download Video Transcript
         try:
+            self.wait_for_rate_limit(endpoint='transcript')
             output = subprocess.check_output("bash src/youtubehelpers/youtubescripts/download_video_transcript.sh {0} {1} {2}".format(video_url, path, self.HTTPS_PROXY), shell=True)
             if "HTTP_ERROR" in str(output):
                 return
             # Increase current HTTP Proxy usage
             self.change_https_proxy(force_change=True)
+
+            if self.TRANSCRIPTS_STORE is not None:
+                transcript_filenames = sorted(glob.glob('{}/{}.*'.format(transcript_dir, video_id)), key=lambda filename: not filename.endswith('.en.vtt'))
+                if len(transcript_filenames) > 0:
+                    with open(transcript_filenames[0], mode='rb') as file:
+                        self.TRANSCRIPTS_STORE.put(video_id=video_id, data=file.read())
         except subprocess.CalledProcessError as e:
             pass
+        finally:
+            if self.TRANSCRIPTS_STORE is not None:
+                shutil.rmtree(transcript_dir, ignore_errors=True)
         return
 
-    def download_video(self, video_id):
+    def download_video(self, video_id, video_metadata=None):
         """
         Method that downloads all the information of a given YouTube Video
         :param video_id: a YouTube Video to download its information
+        :param video_metadata: the already downloaded metadata of the Video (e.g., by download_videos_metadata)
         :return:
         """
         """ VIDEO METADATA """
-        video_metadata = self.download_video_metadata(video_id=video_id)
+        if video_metadata is None:
+            video_metadata = self.download_video_metadata(video_id=video_id)
         if video_metadata is None:
             print('ERROR: Video Metadata not available for Video: {0}'.format(video_id))
             return None
@@ -260,3 +351,18 @@ class YouTubeVideoDownloader(object):
             self.download_video_comments(video_id=video_id)
 
         return video_metadata
+
+    def download_videos(self, video_ids):
+        """
+        Method that downloads all the information of the given YouTube Videos, fetching their metadata in batches
+        :param video_ids: an iterable of YouTube Video IDs
+        :return: a generator of (video_id, video_details) tuples in the same order as the given IDs, where
+                 video_details is None if the video is not available
+        """
+        for video_id, video_metadata in self.download_videos_metadata(video_ids=video_ids):
+            if video_metadata is None:
+                print('ERROR: Video Metadata not available for Video: {0}'.format(video_id))
+                yield video_id, None
+                continue
+            yield video_id, self.download_video(video_id=video_id, video_metadata=video_metadata)
+        return
@@ -15,9 +15,46 @@ class Config(object):
     YOUTUBE_API_SERVICE_NAME = "youtube"
     YOUTUBE_API_VERSION = "v3"
     YOUTUBE_DATA_API_KEY = os.environ.get('YOUTUBE_DATA_API_KEY')  # Used by default when an API Key is not provided to the YouTubeVideoDownloader class
+    VIDEOS_LIST_MAX_IDS = 50  # maximum number of Video IDs per videos.list request (same quota cost as a single ID)
 
     # Set the Number of Comments
     LIMIT_PAGES_COMMENTS = 1  # 200 Comments per page
+    COMMENTS_REQUEST_TIMEOUT = 30  # seconds
+
+    # Packed Corpus Store of the downloaded comments and transcripts (instead of one directory per video)
+    PACKED_STORE_ENABLED = True
+    PACKED_STORE_SHARDS = 16  # number of shards of a new store
+    PACKED_STORE_MAX_SEGMENT_SIZE = 512 * 1024 * 1024  # bytes after which a new segment file of a shard is created
+
+    # Concurrent downloads (ConcurrentVideoDownloader)
+    DOWNLOAD_MAX_IN_FLIGHT_REQUESTS = 16  # download threads, i.e., maximum number of concurrent requests
+    DOWNLOAD_REPORT_INTERVAL = 30  # seconds between throughput reports
+
+    # Token-bucket rate limits of each endpoint (requests per second, maximum burst), applied to each API Key separately
+    RATE_LIMITS = {
+        'videos.list': (5.0, 10),
+        'search.list': (1.0, 5),
+        'commentThreads.list': (5.0, 10),
+        'transcript': (1.0, 2),  # youtube-dl requests through the HTTPS Proxies
+    }
+
+    # Retries of the failed requests with exponential backoff and jitter (RetryPolicy)
+    RETRY_MAX_ATTEMPTS = 8  # maximum number of attempts of a request
+    RETRY_DEADLINE = 300  # maximum seconds spent on a request, including the retries
+    RETRY_BASE_DELAY = 1.0  # maximum seconds before the first retry (doubled after each attempt)
+    RETRY_MAX_DELAY = 60.0  # maximum seconds before any retry
+
+    # Persistent cache of the YouTube Data API responses (APIResponseCache), a cache hit costs no quota
+    RESPONSE_CACHE_ENABLED = True
+    RESPONSE_CACHE_FILENAME = 'videosdata/api_response_cache.sqlite'
+    RESPONSE_CACHE_MAX_SIZE = 1024 * 1024 * 1024  # bytes
+    # Time-to-live (in seconds) of the responses of each endpoint (0: not cached). Search results (including the
+    # related videos) are not cached by default, since the audit experiments measure how they change over time
+    RESPONSE_CACHE_TTLS = {
+        'videos.list': 7 * 24 * 3600,
+        'commentThreads.list': 7 * 24 * 3600,
+        'search.list': 0,
+    }
 
     # Recommended Videos
     RETRIEVE_RECOMMENDED_VIDEOS = False
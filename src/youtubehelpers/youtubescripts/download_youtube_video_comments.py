@@ -1,59 +1,12 @@
 #!/usr/bin/env python
 
+import os
 import sys
-import json
-import requests
 
+# Allow us to import youtubehelpers when this script is executed directly
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
 
-def key_exists(element, *keys):
-    """
-    Check if *keys (nested) exists in `element` (dict).
-    :param keys:
-    :return: True if key exists, False if not
-    """
-    if type(element) is not dict:
-        raise AttributeError('keys_exists() expects dict as first argument.')
-    if len(keys) == 0:
-        raise AttributeError('keys_exists() expects at least two arguments, one given.')
-
-    _element = element
-    for key in keys:
-        try:
-            _element = _element[key]
-        except KeyError:
-            return False
-    return True
-
-
-def write_comments_to_file(filename, jsons):
-    """
-    Method that writes the provided comments in the given filename
-    :param filename: The file to append the given comments
-    :param jsons: the comments in JSON format to be written in the file
-    :return: None
-    """
-    with open(filename, mode="a", encoding='utf-8') as f:
-        # Check if there are any comments
-        try:
-            for js in jsons['items']:
-                f.write(json.dumps(js) + '\n')
-        except KeyError:
-            return
-
-
-def get_video_comments(video_id, API_KEY, nextPageToken):
-    """
-    A function that takes as parameters the videoid of the YouTube video and your API_KEY
-    and request for the specific comments page of the given video
-    QUOTA COST: 4 * 2 = 8 maximum per video
-    :param video_id:
-    :param API_KEY: the YouTube Data API Key
-    :param nextPageToken: the
-    :return: Video comments page
-    """
-    HTTP_REQUEST = "https://www.googleapis.com/youtube/v3/commentThreads?pageToken={}&part=snippet%2Creplies&maxResults=100&videoId={}&key={}&order=relevance".format(nextPageToken, video_id, API_KEY)
-    r = requests.get(HTTP_REQUEST, stream=True)
-    return r
+from youtubehelpers.YouTubeCommentsFetcher import YouTubeCommentsFetcher
 
 
 if __name__ == "__main__":
@@ -63,25 +16,7 @@ if __name__ == "__main__":
     COMMENTS_PAGES_THRESHOLD = sys.argv[3]
     API_KEY = sys.argv[4]
 
-    comment_pages_cntr = 0
-    # When results
-    nextPageToken = ''
-    while True:
-        # Download comments with the specific pageToken
-        comments_raw = get_video_comments(video_id=videoId, API_KEY=API_KEY, nextPageToken=nextPageToken)
-        comments_json = comments_raw.json()
-
-        if 'nextPageToken' not in comments_json:
-            nextPageToken = ''
-        else:
-            nextPageToken = comments_json["nextPageToken"]
-
-        # Create files while you still get http responses
-        filename = "%s/%s.json" % (output_dir, videoId)
-        write_comments_to_file(filename=filename, jsons=json.loads(comments_raw.text))
-
-        comment_pages_cntr += 1
-        if comment_pages_cntr > int(COMMENTS_PAGES_THRESHOLD):
-            break
-        if nextPageToken == '':
-            break
\ No newline at end of file
+    # Download up to COMMENTS_PAGES_THRESHOLD + 1 pages of comments in the output directory
+    fetcher = YouTubeCommentsFetcher(api_key=API_KEY)
+    fetcher.download_video_comments(video_id=videoId, filename="%s/%s.json" % (output_dir, videoId), max_pages=int(COMMENTS_PAGES_THRESHOLD) + 1)
+    fetcher.close()
@@ -0,0 +1,7 @@
+#!/usr/bin/python
+
+import os
+import sys
+
+# Allow the tests to import scripts from src without specifying src (as run.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
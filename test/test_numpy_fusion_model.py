@@ -0,0 +1,46 @@
+#!/usr/bin/python
+
+import numpy as np
+import pytest
+
+tensorflow = pytest.importorskip('tensorflow')
+from tensorflow import keras
+# The Pseudoscience Deep Learning Model is built with the tf.keras 2 API (see requirements.txt)
+if int(keras.__version__.split('.')[0]) >= 3:
+    pytest.skip('PseudoscienceDeepLearningModel requires Keras 2, found Keras {0}'.format(keras.__version__), allow_module_level=True)
+
+from tensorflow.keras.models import load_model
+from classifier.config.ClassifierConfig import Config
+from classifier.model.PseudoscienceDeepLearningModel import PseudoscienceDeepLearningModel
+from pseudoscientificvideosdetection.NumPyFusionModel import NumPyFusionModel
+
+
+@pytest.fixture(scope='module')
+def model_filename(tmp_path_factory):
+    """
+    Fixture that builds the Pseudoscience Deep Learning Model, sets random weights (including the biases,
+    which are initialized with zeros), and saves it as .hdf5 exactly as the training does
+    """
+    model = PseudoscienceDeepLearningModel().get_model()
+    random_state = np.random.RandomState(seed=0)
+    model.set_weights([random_state.normal(scale=0.1, size=weights.shape).astype(np.float32) for weights in model.get_weights()])
+    filename = str(tmp_path_factory.mktemp('models') / 'pseudoscience_model.hdf5')
+    model.save(filename)
+    return filename
+
+
+def test_numpy_backend_reads_all_dense_layers(model_filename):
+    numpy_model = NumPyFusionModel(model_filename=model_filename)
+    assert [layer_name for layer_name, _, _, _ in numpy_model.LAYERS] == ['fully_connected_1', 'fully_connected_2', 'fully_connected_3', 'fully_connected_4', 'classification_layer']
+    assert [activation for _, _, _, activation in numpy_model.LAYERS] == ['relu', 'relu', 'relu', 'relu', 'softmax']
+    assert numpy_model.INPUT_DIM == Config.EMBESSING_DIM * sum(Config.INPUT_FEATURES_CONFIG.values())
+
+
+def test_numpy_backend_matches_keras(model_filename):
+    numpy_model = NumPyFusionModel(model_filename=model_filename)
+    assert numpy_model.check_parity(keras_model=load_model(model_filename), batch_size=256) <= 1e-5
+
+
+def test_numpy_backend_matches_keras_on_a_single_video(model_filename):
+    numpy_model = NumPyFusionModel(model_filename=model_filename)
+    assert numpy_model.check_parity(keras_model=load_model(model_filename), batch_size=1) <= 1e-5
@@ -0,0 +1,132 @@
+#!/usr/bin/python
+
+import re
+import random
+import string
+import unicodedata
+import pytest
+
+import nltk
+
+# The preprocessing needs the NLTK stopwords, WordNet, and Punkt data
+for resource in ('corpora/stopwords', 'corpora/wordnet', 'tokenizers/punkt'):
+    try:
+        nltk.data.find(resource)
+    except LookupError:
+        pytest.skip('NLTK resource {0} is not installed'.format(resource), allow_module_level=True)
+
+import contractions
+from bs4 import BeautifulSoup
+from nltk.tokenize import word_tokenize
+from dataset.TextPreprocessor import TextPreprocessor, stop_words, lematizer
+
+
+def original_preprocess_text(text):
+    """
+    Function that implements the original (multi-pass) DatasetUtils.preprocess_text() pipeline, which is
+    the reference output of the TextPreprocessor
+    :param text: the text to preprocess
+    :return: the preprocessed text
+    """
+    # Substituting multiple spaces with single space and remove extra newlines
+    text = re.sub(r'\s+', ' ', text, flags=re.I)
+    text = re.sub(r'[\r|\n|\r\n]+', ' ', text)
+    # Strip HTML Tags
+    text = BeautifulSoup(text, "html.parser").get_text()
+    # Remove URLs
+    text = re.sub('https?://[A-Za-z0-9./]+', '', text)
+    text = re.sub(r"http\S+", "", text)
+    # Remove all special characters and digits
+    text = re.sub(r'[^a-zA-z\s]', '', text)
+    # Remove accented characters (non-ascii)
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8', 'ignore')
+    # Replace Contractions (don't => do not)
+    text = contractions.fix(text)
+    # Remove Panctuations and Lowercase
+    text = text.translate(str.maketrans('', '', string.punctuation)).strip().lower()
+    # Lemmatize, remove stop words, and discard terms with less than 3 characters
+    tokens = [lematizer.lemmatize(word) for word in word_tokenize(text=text)]
+    tokens = [token for token in tokens if token not in stop_words]
+    return ' '.join([token for token in tokens if len(token) >= 3])
+
+
+# Texts that exercise each shortcut of the TextPreprocessor
+CORPUS = [
+    # Empty and whitespace-only text
+    '',
+    ' ',
+    '\n\r\n\t ',
+    # Plain lowercase text (tokenized without NLTK)
+    'the cats were running across the leaves',
+    'vaccines cause autism according to nobody',
+    # HTML tags and entities
+    '<b>Flat</b> earth <i>theory</i> explained',
+    'Tom &amp; Jerry &lt;3 &quot;cartoons&quot; &#39;forever&#39;',
+    'a < b and c > d but no tags',
+    '<a href="https://example.com">click here</a> for more',
+    # URLs
+    'watch https://www.youtube.com/watch?v=dQw4w9WgXcQ now',
+    'http://example.com/path/to/page.html and http://bit.ly/abc?x=1&y=2 links',
+    'visit www.example.com or https://example.org/',
+    # Contractions that NLTK splits without apostrophes
+    'i cannot believe it',
+    'we are gonna win and you wanna lose',
+    'gimme that lemme see gotta go',
+    'Cannot GONNA Wanna',
+    'wanna',
+    'wanna.',
+    'cannotx gonnabe',
+    # Contractions with apostrophes
+    "y'all don't know what you're doing",
+    "I'm sure it's fine, isn't it? We'll see, they'd've known",
+    "ain't won't can't shouldn't y'know ma'am o'clock",
+    # Non-ASCII text
+    'naïve café résumé über',
+    'Ελληνικά 日本語 русский текст',
+    'smart “quotes” and ‘apostrophes’ — dashes … ellipsis',
+    'emoji 🚀🔥 and accents é è ê',
+    # Pipes and newlines
+    'first line\nsecond line\r\nthird line',
+    'left | right || center',
+    'tags|separated|by|pipes',
+    'line one |\n| line two',
+    # Digits, special characters, and the A-z range ([\]^_`)
+    'the 1st and 2nd of 2020 cost $100!!!',
+    'snake_case [brackets] ^caret^ `backticks` back\\slash',
+    'U.S. e.g. Mr. Dr. etc.',
+    '"double quoted" and \'single quoted\' words',
+    # Mixed
+    'Check <b>THIS</b> out: https://t.co/xyz — you CANNOT miss it!!! gonna be #1 | 100% naïve\n\nreally',
+]
+
+
+@pytest.fixture(scope='module')
+def text_preprocessor():
+    return TextPreprocessor()
+
+
+@pytest.mark.parametrize('text', CORPUS)
+def test_preprocess_text_matches_original_pipeline(text_preprocessor, text):
+    assert text_preprocessor.preprocess_text(text=text) == original_preprocess_text(text=text)
+
+
+def test_preprocess_text_matches_original_pipeline_on_combined_texts(text_preprocessor):
+    # Deterministic combinations of the words and separators of the corpus
+    words = [word for text in CORPUS for word in text.split(' ') if word != ''] + ['cannot', 'gonna', "y'all", '&amp;', '|', 'é']
+    separators = ['', ' ', '  ', '\n', '\r\n', '|', '.', ',', '\t']
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = ''.join(rng.choice(words) + rng.choice(separators) for _ in range(rng.randint(1, 8)))
+        assert text_preprocessor.preprocess_text(text=text) == original_preprocess_text(text=text), repr(text)
+
+
+def test_preprocess_text_cached_result(text_preprocessor):
+    text = 'You cannot cache <b>this</b> twice'
+    first = text_preprocessor.preprocess_text(text=text)
+    assert text_preprocessor.preprocess_text(text=text) == first == original_preprocess_text(text=text)
+
+
+def test_preprocess_texts_merges_texts(text_preprocessor):
+    texts = ['first caption\n', 'second | caption', 'gonna be <i>third</i>']
+    expected = ' '.join([original_preprocess_text(text=text) for text in texts]).replace('\n', '')
+    assert text_preprocessor.preprocess_texts(texts=texts) == expected